@@ -3,100 +3,86 @@
 # AccountPaths class.
 #
 
-from App.Options import Options
+from App.Common.Profile import Profile
 
 ## Account Paths
-# @brief Creates an obeject of verified account paths at .pathsByGUID from the list of account paths
-#        strings passed in. Only tested with default GNUCash path seperatros.
+# @brief Creates an obeject of verified account paths at .pathsByGUID from the list of account
+#        selectors passed in. A selector is a full account path, a path with wildcards like
+#        "Expenses:*:Travel", or a regular expression like "re:^Assets:Brokerage", see
+#        AccountRegistry.select(). Only tested with default GNUCash path seperatros.
 class AccountPaths():
 
     ## Constructor
-    # @param[in]    GNUCashXML      **Object**, GNUCash XML parsed by ElementTree.
-    # @param[in]    namespaces      **Object**, namespaces used in GNUCash XML.
-    # @param[in]    accounts        **List** of strings representing GNUCash account paths.
-    def __init__(self, accounts):
+    # @param[in]    context         **ReportContext Object**, book to find the accounts in.
+    # @param[in]    accounts        **List** of strings representing GNUCash account selectors.
+    def __init__(self, context, accounts):
 
+        self.context      = context
         self.accounts     = accounts
 
-        self.verified    = False                # Set to true when paths are good.
-        self.pathsByGUID = self.verifyPaths()
+        self.verified    = False                # Set to true when every selector found an account.
+        self.paths       = []                   # Account path string of each path found.
+        self.sources     = []                   # Index in accounts of the selector each path came from.
+        self.unmatched   = []                   # Selectors that found no accounts, for the caller to report.
 
+        with Profile.stage('pathVerification'):
+            self.pathsByGUID = self.verifyPaths()
 
-    ## Verifies a single path string.
+
+    ## Verifies a single account selector.
     # @brief Expects path as string with account names seperated by colon.
     #        Example "Assets:Current Assets:Savings"
-    # @param[in]    path            **String** of account names.
-    # @return                       **List** of account GUIDs as a string for each account in path,
-    #                               in element order for given path.
+    # @param[in]    path            **String** of account names, or a selector.
+    # @return                       **List** of (path, GUIDs) tuples, GUIDs are for each account in
+    #                               path in element order. Empty if the selector found nothing.
     def verifyPath(self, path):
 
-        # List of GUID's to return if all account names are found with correct parent/child relations.
-        listOfGUIDs = []
-
-        # Keep count of accounts found to verify the accounts found and length of path is the same.
-        accountsFound = 0
-
-        # Path's always start with the top level account in GNUCash (not shown in GNUCash, hopefully
-        # always named Root Account).
-        rootElem = Options.GNUCashXML.find(".//gnc:account[act:name='Root Account']", Options.namespaces)
-        rootGUID = rootElem.find('act:id', Options.namespaces).text
-
-        # Id that will be used to verify this is a child of parent.
-        previousGUID = rootGUID
-
-        # Root GUID is always the first account in list.
-        listOfGUIDs.append(rootGUID)
-
-        # Split account paths into account names.
-        accountPath = path.split(':')
+        # Full paths are indexed when the book is read, finding one is a single lookup.
+        return self.context.book.registry.select(path)
 
-        # Loop through account path given.
-        for accountName in accountPath:
 
-            # Find accounts by parentId
-            for account in Options.GNUCashXML.findall(".//gnc:account[act:parent='{}']".format(previousGUID), Options.namespaces):
+    ## GUIDs of every account in the paths.
+    # @return                       **List** of GUIDs of the last account in each path and all accounts
+    #                               below them.
+    def getAccountIds(self):
+        accountIds = []
 
-                name     = account.find('./act:name', Options.namespaces).text
-                parentId = account.find('./act:parent', Options.namespaces).text
+        for path in self.pathsByGUID:
+            accountIds.extend(self.context.book.registry.descendants(path[-1]))
 
-                # But is this the account we're looking for?
-                if accountName == name:
+        return accountIds
 
-                    # Append this GUID to list.
-                    listOfGUIDs.append(account.find('./act:id', Options.namespaces).text)
 
-                    # Update previous for next go around.
-                    previousGUID  = account.find('./act:id', Options.namespaces).text
+    ## Settings given for each selector, repeated for each path it found.
+    # @param[in]    values          **List**, one setting for each selector (like depths).
+    # @return                       **List**, one setting for each path in .pathsByGUID.
+    def forEachPath(self, values):
+        return [values[index] for index in self.sources]
 
-                    # Account was found with this name, increment counter.
-                    accountsFound += 1
 
-                    # Move on to next account name in this path.
-                    break
-
-        # Verify this path makes sense.
-        if accountsFound == len(accountPath):
-            return listOfGUIDs
-
-        else:
-            return None
-
-
-    ## Verifies a all path strings passed to class.
+    ## Verifies a all account selectors passed to class.
+    # @brief An account found by more than one selector is only kept the first time.
     # @return                       **List** of verified paths.
     def verifyPaths(self):
 
         # Paths to return.
         accountPathGUIDs = []
-
-        # Check each path passed into class.
-        for accountPath in self.accounts:
-            pathGUIDs = self.verifyPath(accountPath)
-            accountPathGUIDs.append(pathGUIDs)
-
-        if None not in accountPathGUIDs:
+        found            = set()
+
+        # Check each selector passed into class.
+        for index, accountPath in enumerate(self.accounts):
+            paths = self.verifyPath(accountPath)
+            if (not paths):
+                self.unmatched.append(accountPath)
+
+            for path, pathGUIDs in paths:
+                if (pathGUIDs[-1] not in found):
+                    found.add(pathGUIDs[-1])
+                    accountPathGUIDs.append(list(pathGUIDs))
+                    self.paths.append(path)
+                    self.sources.append(index)
+
+        if (not self.unmatched):
             self.verified = True
-        else:
-            print("Account path could not be verified.")
 
         return accountPathGUIDs
@@ -0,0 +1,157 @@
+##
+# @file
+# Holds AccountRegistry class.
+#
+
+import re
+
+from fnmatch import fnmatchcase
+
+
+## Account Registry
+# @brief Indexes of the book's accounts and commodities, built once after the book is read so
+#        looking up an account, its children, or a commodity does not search the whole book.
+class AccountRegistry():
+
+    ## Constructor
+    # @param[in]    book            **Book Object**, records to index.
+    def __init__(self, book):
+
+        self.byId             = {}      # Account GUID to Account record.
+        self.childrenByParent = {}      # Parent GUID to list of child Account records, in file order.
+        self.childByName      = {}      # (Parent GUID, name) to child Account record.
+        self.commodityById    = {}      # Commodity id to Commodity record.
+        self.byPath           = {}      # Full account path to tuple of GUIDs from the root account down.
+        self.rootId           = None    # GUID of the top level account.
+
+        for account in book.accounts:
+            self.byId.setdefault(account.id, account)
+            self.childrenByParent.setdefault(account.parent, []).append(account)
+            self.childByName.setdefault((account.parent, account.name), account)
+
+            # Hopefully always named Root Account, the first one found is used.
+            if (self.rootId is None and account.name == 'Root Account'):
+                self.rootId = account.id
+
+        # When ids repeat the first one in the file is used.
+        for commodity in book.commodities:
+            self.commodityById.setdefault(commodity.id, commodity)
+
+        # Full paths of every account below the root, parents before children. Like child(), when
+        # siblings share a name the first one in the file is used.
+        if (self.rootId is not None):
+            paths = [('', (self.rootId,))]
+
+            # List grows while walking it, children are added as their parents are reached.
+            for path, accountIds in paths:
+                for child in self.children(accountIds[-1]):
+                    childPath = path + ':' + child.name if (path) else child.name
+                    if (childPath not in self.byPath):
+                        self.byPath[childPath] = accountIds + (child.id,)
+                        paths.append((childPath, self.byPath[childPath]))
+
+
+    ## Find an account by GUID.
+    # @param[in]    accountId       **String**, GUID of account.
+    # @return                       **Account** record.
+    def account(self, accountId):
+        return self.byId[accountId]
+
+
+    ## Find the children of an account.
+    # @param[in]    accountId       **String**, GUID of parent account.
+    # @return                       **List** of Account records, empty if it has no children.
+    def children(self, accountId):
+        return self.childrenByParent.get(accountId, [])
+
+
+    ## Find an account and everything below it.
+    # @param[in]    accountId       **String**, GUID of top account.
+    # @return                       **List** of account GUIDs, starting with accountId.
+    def descendants(self, accountId):
+        accountIds = [accountId]
+
+        # List grows while walking it, children are added as their parents are reached.
+        for each in accountIds:
+            accountIds.extend(child.id for child in self.children(each))
+
+        return accountIds
+
+
+    ## Find a child account by name.
+    # @param[in]    accountId       **String**, GUID of parent account.
+    # @param[in]    name            **String**, name of the child account.
+    # @return                       **Account** record, None if there is no child with that name.
+    def child(self, accountId, name):
+        return self.childByName.get((accountId, name))
+
+
+    ## Find a commodity by id.
+    # @param[in]    commodityId     **String**, id of commodity (like USD or FXNAX).
+    # @return                       **Commodity** record, None if not in the book.
+    def commodity(self, commodityId):
+        return self.commodityById.get(commodityId)
+
+
+    ## Find the accounts an account selector picks.
+    # @brief A selector is one of
+    #          - a full account path, "Assets:Current Assets", found with one lookup.
+    #          - a path with wildcards in its names, "Expenses:*:Travel". Names match like file
+    #            names, * is any name, ? any one character and [] any character in them.
+    #          - a regular expression after re:, "re:^Assets:Brokerage". Every full path it is found
+    #            in is picked.
+    #        Accounts below one already picked are left out, they are part of it.
+    # @param[in]    selector        **String**, account selector.
+    # @return                       **List** of (path, GUIDs) tuples, GUIDs are from the root account
+    #                               down to the account picked. Empty if nothing was found.
+    # @exception    ValueError      If the regular expression isn't right.
+    def select(self, selector):
+        pattern = self.pattern(selector)
+
+        if (pattern is not None):
+            found = [(path, accountIds) for path, accountIds in self.byPath.items() if (pattern.search(path))]
+
+        elif (any(char in selector for char in '*?[')):
+            found = [('', (self.rootId,))] if (self.rootId is not None) else []
+
+            # Walk down one level per name, only wildcards look at every child.
+            for name in selector.split(':'):
+                if (any(char in name for char in '*?[')):
+                    children = [(path, child.name) for path, accountIds in found
+                                for child in self.children(accountIds[-1]) if (fnmatchcase(child.name, name))]
+                else:
+                    children = [(path, name) for path, accountIds in found]
+
+                found = []
+                for path, childName in children:
+                    childPath = path + ':' + childName if (path) else childName
+                    if (childPath in self.byPath and (not found or found[-1][0] != childPath)):
+                        found.append((childPath, self.byPath[childPath]))
+
+        else:
+            found = [(selector, self.byPath[selector])] if (selector in self.byPath) else []
+
+        # Parents come before their children, so only ones above need checking.
+        picked   = set()
+        selected = []
+        for path, accountIds in found:
+            if (picked.isdisjoint(accountIds)):
+                picked.add(accountIds[-1])
+                selected.append((path, accountIds))
+
+        return selected
+
+
+    ## Regular expression of an account selector.
+    # @param[in]    selector        **String**, account selector.
+    # @return                       **Pattern Object**, None if the selector isn't a regular expression.
+    # @exception    ValueError      If the regular expression isn't right.
+    @staticmethod
+    def pattern(selector):
+        if (not selector.startswith('re:')):
+            return None
+
+        try:
+            return re.compile(selector[3:])
+        except re.error as err:
+            raise ValueError("Unexpected regular expression in account selector {}, {}.".format(selector, err))
@@ -0,0 +1,129 @@
+##
+# @file
+# Holds BalanceSweep class.
+#
+
+from App.Common.Profile import Profile
+
+
+## Balance Sweep
+# @brief Sums splits for every period of a report in one walk through the transactions. Periods are
+#        sorted by their boundaries, running balances are kept per account, and a copy of them is
+#        taken each time a boundary is passed. The cost is transactions + periods × accounts instead
+#        of rebuilding everything from the start of the book for each period. Iterating over it walks
+#        the transactions as the sums are asked for, so only the periods not given out yet are held.
+class BalanceSweep():
+
+    ## Constructor
+    # @param[in]    book            **Book Object**, transactions to sum.
+    # @param[in]    periods         **List** of (start, end) **DateTime Object** tuples.
+    # @param[in]    accountIds      **Optional Iterable** of account GUIDs to keep balances for. If not
+    #                               given every account with splits is kept.
+    # @param[in]    changes         **Optional Boolean**, when True sums are only for splits between
+    #                               the start and end dates. Otherwise sums are balances at the end
+    #                               date.
+    def __init__(self, book, periods, accountIds = None, changes = False):
+
+        self.book       = book
+        self.periods    = periods
+        self.accountIds = None if (accountIds is None) else list(accountIds)
+        self.changes    = changes
+        self.sums       = None      # Every period's sums, only kept if get() is used.
+
+
+    ## Sums for each period, worked out as they are asked for.
+    # @brief Periods whose boundaries come in a different order than the periods are held until the
+    #        ones before them are given out.
+    # @return                       **Iterator** of **Dictonary** of account GUID to (value, quantity)
+    #                               tuples, in the same order as the periods.
+    def __iter__(self):
+        if (self.sums is not None):
+            yield from self.sums
+            return
+
+        ready     = {}
+        nextIndex = 0
+
+        for index, sums in self.sweep():
+            ready[index] = sums
+            while (nextIndex in ready):
+                yield ready.pop(nextIndex)
+                nextIndex += 1
+
+
+    ## Walks the transactions once, taking snapshots of the running balances at each boundary.
+    # @return                       **Iterator** of (period index, sums) tuples, in the order the periods
+    #                               end. Sums are a **Dictonary** of account GUID to (value, quantity)
+    #                               tuple.
+    def sweep(self):
+
+        if (not self.periods):
+            return
+
+        # Running [value, quantity] per account, accounts are added as they are seen if none were given.
+        trackAll = self.accountIds is None
+        running  = {} if (trackAll) else {accountId : [0, 0] for accountId in self.accountIds}
+
+        # Boundaries sort by date then kind. A start boundary (kind 0) is the balance before any
+        # splits that day, an end boundary (kind 1) is the balance after all splits that day.
+        boundaries = []
+        for index, (startDate, endDate) in enumerate(self.periods):
+            boundaries.append((endDate, 1, index))
+            if (self.changes):
+                boundaries.append((startDate, 0, index))
+        boundaries.sort()
+
+        # Only need transactions up to the last boundary.
+        with Profile.stage('transactionLimiting'):
+            transactions = self.book.transactionIndex.window(boundaries[-1][0])
+        position     = 0
+        scanned      = 0
+
+        starts = {}     # Period index to the snapshot at its start, until its end is passed.
+
+        for date, kind, index in boundaries:
+
+            # Add transactions up to this boundary to the running balances.
+            while (position < len(transactions)):
+                transaction = transactions[position]
+                if (transaction.datePosted > date or (kind == 0 and transaction.datePosted == date)):
+                    break
+
+                scanned += len(transaction.splits)
+                for split in transaction.splits:
+                    if (split.account in running):
+                        balance     = running[split.account]
+                        balance[0] += split.value
+                        balance[1] += split.quantity
+                    elif (trackAll):
+                        running[split.account] = [split.value, split.quantity]
+
+                position += 1
+
+            snapshot = {accountId : (balance[0], balance[1]) for accountId, balance in running.items()}
+
+            if (kind == 0):
+                starts[index] = snapshot
+
+            # Change is the balance at the end less the balance before the start. A start after the
+            # end has nothing in between.
+            elif (self.changes):
+                before = starts.pop(index, snapshot)
+                yield index, {accountId : (value - before.get(accountId, (0, 0))[0],
+                                           quantity - before.get(accountId, (0, 0))[1])
+                              for accountId, (value, quantity) in snapshot.items()}
+
+            else:
+                yield index, snapshot
+
+        Profile.count('splitsScanned', scanned)
+
+
+    ## Returns the sums for each period, keeping them.
+    # @return                       **List** of **Dictonary** of account GUID to (value, quantity)
+    #                               tuples, in the same order as the periods.
+    def get(self):
+        if (self.sums is None):
+            self.sums = list(self)
+
+        return self.sums
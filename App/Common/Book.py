@@ -0,0 +1,459 @@
+##
+# @file
+# Holds Book class and the records it is made of.
+#
+
+import xml.etree.ElementTree as ET
+
+from collections import namedtuple
+from datetime    import datetime
+from fractions   import Fraction
+from math        import lcm
+
+from App.Common.AccountRegistry  import AccountRegistry
+from App.Common.BalanceSweep     import BalanceSweep
+from App.Common.SplitMatrix      import SplitMatrix
+from App.Common.Ledger           import Ledger
+from App.Common.PriceHistory     import PriceHistory
+from App.Common.Profile          import Profile
+from App.Common.TransactionIndex import TransactionIndex
+
+
+## Namespaces used in GNUCash XML.
+# Wasn't able to get element tree to return the root attributes. These shouldn't change often.
+NAMESPACES = {
+    'gnc'        : 'http://www.gnucash.org/XML/gnc',
+    'act'        : 'http://www.gnucash.org/XML/act',
+    'book'       : 'http://www.gnucash.org/XML/book',
+    'cd'         : 'http://www.gnucash.org/XML/cd',
+    'cmdty'      : 'http://www.gnucash.org/XML/cmdty',
+    'price'      : 'http://www.gnucash.org/XML/price',
+    'slot'       : 'http://www.gnucash.org/XML/slot',
+    'split'      : 'http://www.gnucash.org/XML/split',
+    'sx'         : 'http://www.gnucash.org/XML/sx',
+    'trn'        : 'http://www.gnucash.org/XML/trn',
+    'ts'         : 'http://www.gnucash.org/XML/ts',
+    'fs'         : 'http://www.gnucash.org/XML/fs',
+    'bgt'        : 'http://www.gnucash.org/XML/bgt',
+    'recurrence' : 'http://www.gnucash.org/XML/recurrence',
+    'lot'        : 'http://www.gnucash.org/XML/lot',
+    'addr'       : 'http://www.gnucash.org/XML/addr',
+    'billterm'   : 'http://www.gnucash.org/XML/billterm',
+    'bt-days'    : 'http://www.gnucash.org/XML/bt-days',
+    'bt-prox'    : 'http://www.gnucash.org/XML/bt-prox',
+    'cust'       : 'http://www.gnucash.org/XML/cust',
+    'employee'   : 'http://www.gnucash.org/XML/employee',
+    'entry'      : 'http://www.gnucash.org/XML/entry',
+    'invoice'    : 'http://www.gnucash.org/XML/invoice',
+    'job'        : 'http://www.gnucash.org/XML/job',
+    'order'      : 'http://www.gnucash.org/XML/order',
+    'owner'      : 'http://www.gnucash.org/XML/owner',
+    'taxtable'   : 'http://www.gnucash.org/XML/taxtable',
+    'tte'        : 'http://www.gnucash.org/XML/tte',
+    'vendor'     : 'http://www.gnucash.org/XML/vendor'
+}
+
+
+## Text of the first element matching a path.
+# @param[in]    elem            **Element** to look in.
+# @param[in]    path            **String**, path with NAMESPACES prefixes.
+# @return                       **String**, None if nothing matched.
+def findText(elem, path):
+    return elem.findtext(path, None, NAMESPACES)
+
+
+## First element matching a path.
+# @param[in]    elem            **Element** to look in.
+# @param[in]    path            **String**, path with NAMESPACES prefixes.
+# @return                       **Element**, None if nothing matched.
+def find(elem, path):
+    return elem.find(path, NAMESPACES)
+
+
+## Every element matching a path.
+# @param[in]    elem            **Element** to look in.
+# @param[in]    path            **String**, path with NAMESPACES prefixes.
+# @return                       **Iterator** of Elements.
+def iterFind(elem, path):
+    return elem.iterfind(path, NAMESPACES)
+
+
+## Account record.
+# @brief id, name, type, parent GUID, commodity id and namespace, and smallest commodity unit.
+Account = namedtuple('Account', ['id', 'name', 'type', 'parent', 'commodityId', 'commoditySpace', 'commodityScu'])
+
+## Commodity record.
+# @brief Namespace (category), id, full name, smallest fraction, and user defined symbol.
+Commodity = namedtuple('Commodity', ['space', 'id', 'name', 'fraction', 'symbol'])
+
+## Price record.
+# @brief Price of one commodity in a currency on a date, value is an exact Fraction.
+Price = namedtuple('Price', ['id', 'commodityId', 'commoditySpace', 'currencyId', 'date', 'value'])
+
+## Transaction record.
+# @brief Date posted is a datetime object (time of day dropped), date entered is the timestamp
+#        string as saved, splits is a tuple of Split records.
+Transaction = namedtuple('Transaction', ['id', 'currencyId', 'datePosted', 'dateEntered', 'splits'])
+
+## Split record.
+# @brief Value is in the transaction currency, quantity in the account commodity. Both are integers
+#        in units of 1 / Book.scale, so sums are exact.
+Split = namedtuple('Split', ['id', 'account', 'value', 'quantity'])
+
+## What changed when a book was updated.
+# @brief Sets of account GUIDs whose splits changed and commodity ids whose prices changed, and if
+#        the accounts or commodities themselves changed.
+BookChanges = namedtuple('BookChanges', ['accounts', 'commodities', 'structure'])
+
+
+## Converts a GNUCash date string to a datetime object.
+# @param[in]    dateString      **String**, formatted like "2020-11-30 10:59:00 +0000".
+# @return                       **DateTime Object** for that day, or None if no date given.
+def parseDate(dateString):
+    if (dateString is None):
+        return None
+
+    return datetime.strptime(dateString.split()[0], "%Y-%m-%d")
+
+
+## Converts a GNUCash fraction string to an exact Fraction.
+# @param[in]    fractionString  **String**, formatted like "12345/100".
+# @return                       **Fraction** value of the string.
+def parseFraction(fractionString):
+    fraction = fractionString.split('/')
+    return Fraction(int(fraction[0]), int(fraction[1]))
+
+
+## Book
+# @brief Reads a GNUCash XML file in one pass and keeps plain records of the accounts, commodities,
+#        prices and transactions in it. Elements are thrown away as soon as they are read so the
+#        whole XML tree is never held in memory.
+class Book():
+
+    ## Constructor
+    # @param[in]    source          **String** file name, or file object, of a GNUCash XML file.
+    def __init__(self, source):
+
+        self.accounts     = []  # Account records in file order.
+        self.commodities  = []  # Commodity records in file order.
+        self.prices       = []  # Price records in file order.
+        self.transactions = []  # Transaction records in file order.
+
+        # Split amounts are integers in units of 1 / scale. Scale is the smallest number every
+        # commodity fraction, account SCU, and split denominator divides into.
+        self.scale        = 1
+
+        self.load(source)
+        self.buildIndexes()
+
+
+    ## Builds the lookup structures used by the reports, call again if the records change.
+    def buildIndexes(self):
+        self.registry         = AccountRegistry(self)
+        self.priceHistory     = PriceHistory(self)
+        self.transactionIndex = TransactionIndex(self)
+        self.splitMatrix      = None    # Built the first time the NumPy engine is used.
+        self.builtLedger      = None    # Built the first time the ledger is used.
+
+
+    ## Splits by account with running totals, for queries and updates.
+    # @brief Reports don't use it, so it is only built the first time something asks for it.
+    # @return                       **Ledger Object**.
+    @property
+    def ledger(self):
+        if (self.builtLedger is None):
+            self.builtLedger = Ledger(self)
+
+        return self.builtLedger
+
+
+    ## What is saved to the cache, without what can be built again when it's used.
+    # @return                       **Dictonary** of attributes.
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['builtLedger'] = None
+
+        return state
+
+
+    ## Reads the file again, only updating the indexes for what changed since it was last read.
+    # @brief Transactions and prices are matched by GUID. A transaction is changed if any part of it
+    #        is different, not just date entered (GNUCash keeps that when a transaction is edited).
+    #        Reports can't tell if a book was read from scratch or updated.
+    # @param[in]    source          **String** file name, or file object, of the GNUCash file.
+    # @return                       **BookChanges** record.
+    def update(self, source):
+
+        oldAccounts, oldCommodities   = self.accounts, self.commodities
+        oldPrices,   oldTransactions = self.prices, self.transactions
+        oldScale                      = self.scale
+
+        self.accounts     = []
+        self.commodities  = []
+        self.prices       = []
+        self.transactions = []
+        self.scale        = 1
+        self.load(source)
+
+        # Every split amount is different if the scale changed, start over.
+        if (self.scale != oldScale):
+            self.buildIndexes()
+            accounts = {split.account for transaction in self.transactions for split in transaction.splits}
+            return BookChanges(accounts, set(self.priceHistory.dates), True)
+
+        # Accounts and commodities are small, rebuild their index if anything about them changed.
+        structure = (oldAccounts != self.accounts or oldCommodities != self.commodities)
+        if (structure):
+            self.registry = AccountRegistry(self)
+
+        # Transactions added, removed, or changed.
+        removed, added = self.compare(oldTransactions, self.transactions)
+        if (self.builtLedger is not None):
+            self.builtLedger.update(removed, added)
+        self.transactionIndex.update(removed, added)
+        if (removed or added):
+            self.splitMatrix = None
+
+        accounts = set()
+        for transaction in removed + added:
+            accounts.update(split.account for split in transaction.splits)
+
+        # Prices added, removed, or changed.
+        removedPrices, addedPrices = self.compare(oldPrices, self.prices)
+        commodities = {price.commodityId for price in removedPrices + addedPrices}
+        if (commodities):
+            self.priceHistory.update(self, commodities)
+
+        return BookChanges(accounts, commodities, structure)
+
+
+    ## Finds records that are only in one of two lists, matching by GUID.
+    # @param[in]    oldRecords      **List** of records from before.
+    # @param[in]    newRecords      **List** of records from now.
+    # @return                       **Tuple** of Lists; records removed (or the old version of ones
+    #                               changed), and records added (or the new version of ones changed).
+    def compare(self, oldRecords, newRecords):
+        oldById = {record.id : record for record in oldRecords}
+        newById = {record.id : record for record in newRecords}
+
+        removed = [record for record in oldRecords if (newById.get(record.id) != record)]
+        added   = [record for record in newRecords if (oldById.get(record.id) != record)]
+
+        return removed, added
+
+
+    ## Converts an amount to an integer in units of 1 / scale.
+    # @brief If the denominator doesn't divide into the scale, the scale is made bigger and amounts
+    #        already read are changed to match. GNUCash keeps amounts in their commodity's smallest
+    #        unit, so that only happens when a book has something unusual in it.
+    # @param[in]    numerator       **Integer**.
+    # @param[in]    denominator     **Integer**.
+    # @return                       **Integer**, numerator / denominator × scale.
+    def toScale(self, numerator, denominator):
+        if (self.scale % denominator):
+            self.useDenominator(denominator)
+
+        return numerator * (self.scale // denominator)
+
+
+    ## Makes sure amounts with a denominator can be kept exactly.
+    # @param[in]    denominator     **Integer**, commodity fraction, account SCU, or split denominator.
+    def useDenominator(self, denominator):
+        if (not denominator or self.scale % denominator == 0):
+            return
+
+        newScale   = lcm(self.scale, denominator)
+        multiplier = newScale // self.scale
+
+        self.transactions = [transaction._replace(splits = tuple(
+                                 split._replace(value    = split.value * multiplier,
+                                                quantity = split.quantity * multiplier)
+                                 for split in transaction.splits))
+                             for transaction in self.transactions]
+        self.scale = newScale
+
+
+    ## Converts a GNUCash fraction string to an integer in units of 1 / scale.
+    # @param[in]    fractionString  **String**, formatted like "12345/100".
+    # @return                       **Integer**.
+    def parseAmount(self, fractionString):
+        fraction = fractionString.split('/')
+        return self.toScale(int(fraction[0]), int(fraction[1]))
+
+
+    ## Sums for each period of a report.
+    # @brief Uses the NumPy engine when it's asked for and NumPy is installed, otherwise a BalanceSweep.
+    #        A BalanceSweep is also used if the book's amounts are too big for the NumPy engine's int64s.
+    # @param[in]    periods         **List** of (start, end) **DateTime Object** tuples.
+    # @param[in]    accountIds      **Optional Iterable** of account GUIDs to keep sums for.
+    # @param[in]    changes         **Optional Boolean**, sums between dates instead of balances.
+    # @param[in]    engine          **Optional String**, python or numpy.
+    # @return                       **BalanceSweep** or **SplitMatrixSums Object**.
+    def periodSums(self, periods, accountIds = None, changes = False, engine = 'python'):
+        self.useEngine(engine)
+        if (engine == 'numpy' and self.splitMatrix is not None and self.splitMatrix.exact):
+            return self.splitMatrix.periodSums(periods, accountIds, changes)
+
+        return BalanceSweep(self, periods, accountIds, changes)
+
+
+    ## Builds what an engine needs before it is used, like before forking workers that will use it.
+    # @param[in]    engine          **String**, python or numpy.
+    def useEngine(self, engine):
+        if (engine == 'numpy' and SplitMatrix.available() and self.splitMatrix is None):
+            self.splitMatrix = SplitMatrix(self)
+
+
+    ## Reads the file, turning each record element into a record as it is finished.
+    # @brief Lookups are only counted when profiling, otherwise the readers use the plain functions below.
+    # @param[in]    source          **String** file name, or file object, of a GNUCash XML file.
+    def load(self, source):
+
+        if (Profile.enabled):
+            self.lookups  = 0
+            self.findText = self.countFindText
+            self.find     = self.countFind
+            self.iterFind = self.countIterFind
+        else:
+            self.findText = findText
+            self.find     = find
+            self.iterFind = iterFind
+
+        handlers = {
+            '{{{}}}account'.format(NAMESPACES['gnc'])     : self.readAccount,
+            '{{{}}}commodity'.format(NAMESPACES['gnc'])   : self.readCommodity,
+            'price'                                       : self.readPrice,
+            '{{{}}}transaction'.format(NAMESPACES['gnc']) : self.readTransaction
+        }
+        bookTag = '{{{}}}book'.format(NAMESPACES['gnc'])
+
+        # Elements that have been started but not finished, the last one is the current parent.
+        parents = []
+
+        for event, elem in ET.iterparse(source, events=('start', 'end')):
+
+            if (event == 'start'):
+                parents.append(elem)
+                continue
+
+            parents.pop()
+
+            isRecord = elem.tag in handlers
+            if (isRecord):
+                handlers[elem.tag](elem)
+
+            # Done with records and anything else directly in the book, drop it from the tree.
+            if (parents and (isRecord or parents[-1].tag == bookTag)):
+                parents[-1].remove(elem)
+
+        # Only needed while reading, and kept out of the cache.
+        del self.findText, self.find, self.iterFind
+        if (Profile.enabled):
+            Profile.count('xpathEvaluations', self.lookups)
+            del self.lookups
+
+
+    ## Text of the first element matching a path, counting the lookup.
+    # @param[in]    elem            **Element** to look in.
+    # @param[in]    path            **String**, path with NAMESPACES prefixes.
+    # @return                       **String**, None if nothing matched.
+    def countFindText(self, elem, path):
+        self.lookups += 1
+        return elem.findtext(path, None, NAMESPACES)
+
+
+    ## First element matching a path, counting the lookup.
+    # @param[in]    elem            **Element** to look in.
+    # @param[in]    path            **String**, path with NAMESPACES prefixes.
+    # @return                       **Element**, None if nothing matched.
+    def countFind(self, elem, path):
+        self.lookups += 1
+        return elem.find(path, NAMESPACES)
+
+
+    ## Every element matching a path, counting the lookup.
+    # @param[in]    elem            **Element** to look in.
+    # @param[in]    path            **String**, path with NAMESPACES prefixes.
+    # @return                       **Iterator** of Elements.
+    def countIterFind(self, elem, path):
+        self.lookups += 1
+        return elem.iterfind(path, NAMESPACES)
+
+
+    ## Reads an account element.
+    # @param[in]    elem            **Element**, gnc:account.
+    def readAccount(self, elem):
+        scu = self.findText(elem, 'act:commodity-scu')
+        scu = int(scu) if (scu) else None
+        self.useDenominator(scu)
+
+        self.accounts.append(Account(
+            id             = self.findText(elem, 'act:id'),
+            name           = self.findText(elem, 'act:name'),
+            type           = self.findText(elem, 'act:type'),
+            parent         = self.findText(elem, 'act:parent'),
+            commodityId    = self.findText(elem, 'act:commodity/cmdty:id'),
+            commoditySpace = self.findText(elem, 'act:commodity/cmdty:space'),
+            commodityScu   = scu))
+
+
+    ## Reads a commodity element.
+    # @param[in]    elem            **Element**, gnc:commodity.
+    def readCommodity(self, elem):
+        fraction = self.findText(elem, 'cmdty:fraction')
+        fraction = int(fraction) if (fraction) else None
+        symbol   = None
+        self.useDenominator(fraction)
+
+        # Not all commodities have slots, the first one is the user defined symbol.
+        slotEl = self.find(elem, 'cmdty:slots/slot')
+        if (slotEl is not None):
+            symbol = self.findText(slotEl, 'slot:value')
+
+        self.commodities.append(Commodity(
+            space    = self.findText(elem, 'cmdty:space'),
+            id       = self.findText(elem, 'cmdty:id'),
+            name     = self.findText(elem, 'cmdty:name'),
+            fraction = fraction,
+            symbol   = symbol))
+
+
+    ## Reads a price element.
+    # @param[in]    elem            **Element**, price from the gnc:pricedb.
+    def readPrice(self, elem):
+        self.prices.append(Price(
+            id             = self.findText(elem, 'price:id'),
+            commodityId    = self.findText(elem, 'price:commodity/cmdty:id'),
+            commoditySpace = self.findText(elem, 'price:commodity/cmdty:space'),
+            currencyId     = self.findText(elem, 'price:currency/cmdty:id'),
+            date           = parseDate(self.findText(elem, 'price:time/ts:date')),
+            value          = parseFraction(self.findText(elem, 'price:value'))))
+
+
+    ## Reads a transaction element and its splits.
+    # @param[in]    elem            **Element**, gnc:transaction.
+    def readTransaction(self, elem):
+        splits = []
+
+        # Transasctions will have 2 or more splits.
+        for splitEl in self.iterFind(elem, 'trn:splits/trn:split'):
+            splits.append((self.findText(splitEl, 'split:id'),
+                           self.findText(splitEl, 'split:account'),
+                           self.findText(splitEl, 'split:value'),
+                           self.findText(splitEl, 'split:quantity')))
+
+        # Scale has to fit every split before any are converted, so they all use the same one.
+        for id, account, value, quantity in splits:
+            self.useDenominator(int(value.split('/')[1]))
+            self.useDenominator(int(quantity.split('/')[1]))
+
+        self.transactions.append(Transaction(
+            id          = self.findText(elem, 'trn:id'),
+            currencyId  = self.findText(elem, 'trn:currency/cmdty:id'),
+            datePosted  = parseDate(self.findText(elem, 'trn:date-posted/ts:date')),
+            dateEntered = self.findText(elem, 'trn:date-entered/ts:date'),
+            splits      = tuple(Split(id       = id,
+                                      account  = account,
+                                      value    = self.parseAmount(value),
+                                      quantity = self.parseAmount(quantity))
+                                for id, account, value, quantity in splits)))
@@ -0,0 +1,136 @@
+##
+# @file
+# Holds BookCache class.
+#
+
+import hashlib
+import os
+import pickle
+
+
+## Book Cache
+# @brief Saves a read Book (records and indexes) to a binary file next to the GNUCash file, so the
+#        next run on an unchanged book can skip reading it. The cache is keyed by the GNUCash file's
+#        size, modification time and content hash. Size and time are checked first, the hash is only
+#        worked out when they differ (a copy or touch of an unchanged file is still a hit).
+class BookCache():
+
+    ## Change when the records or indexes change, old caches are then ignored.
+    version = 5
+
+    ## Constructor
+    # @param[in]    filePath        **String**, GNUCash file the cache is for.
+    # @param[in]    cachePath       **Optional String**, where to save the cache. Defaults to the
+    #                               GNUCash file with ".cache" added.
+    def __init__(self, filePath, cachePath = None):
+        self.filePath    = filePath
+        self.cachePath   = cachePath if (cachePath) else filePath + '.cache'
+        self.fingerprint = None     # (size, mtime, hash) of the file when load() missed.
+        self.stale       = None     # Book from the cache when load() missed, can be updated.
+
+
+    ## Size and modification time of the GNUCash file.
+    # @return                       **Tuple** of Integers.
+    def stat(self):
+        stat = os.stat(self.filePath)
+        return stat.st_size, stat.st_mtime_ns
+
+
+    ## Hash of the GNUCash file contents.
+    # @return                       **String**, hex digest.
+    def hash(self):
+        digest = hashlib.sha256()
+
+        with open(self.filePath, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+
+        return digest.hexdigest()
+
+
+    ## Loads the book from the cache if it is for this GNUCash file.
+    # @brief On a miss the file's fingerprint is kept for save(). It is taken before the file is read,
+    #        so if the file changes while being read the cache won't match it next time. The out of
+    #        date book is kept at .stale so it can be updated instead of read from scratch.
+    # @return                       **Book Object**, None if there is no cache or it is out of date.
+    def load(self):
+        size, mtime      = self.stat()
+        self.fingerprint = None
+        self.stale       = None
+
+        try:
+            with open(self.cachePath, 'rb') as f:
+                cached = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            cached = None
+
+        if (not isinstance(cached, dict) or cached.get('version') != self.version):
+            cached = None
+
+        if (cached and cached['size'] == size and cached['mtime'] == mtime):
+            return cached['book']
+
+        # Size or time changed, it's still good if the contents didn't.
+        fileHash         = self.hash()
+        self.fingerprint = (size, mtime, fileHash)
+
+        if (cached and cached['size'] == size and cached['hash'] == fileHash):
+            cached['mtime'] = mtime
+            self.write(cached)
+            return cached['book']
+
+        if (cached):
+            self.stale = cached['book']
+
+        return None
+
+
+    ## Saves the book to the cache.
+    # @param[in]    book            **Book Object**, read from this GNUCash file.
+    # @return                       **Boolean**, True if the cache was written.
+    def save(self, book):
+        if (self.fingerprint is None):
+            self.fingerprint = self.stat() + (self.hash(),)
+
+        size, mtime, fileHash = self.fingerprint
+
+        return self.write({'version' : self.version,
+                           'size'    : size,
+                           'mtime'   : mtime,
+                           'hash'    : fileHash,
+                           'book'    : book})
+
+
+    ## Writes the cache file, a partly written file is never left in place.
+    # @brief The cache only saves time, if it can't be written (like a read only folder) a warning is
+    #        printed and the run carries on without it.
+    # @param[in]    cached          **Dictonary**, fingerprint and book to save.
+    # @return                       **Boolean**, True if the cache was written.
+    def write(self, cached):
+        tempPath = self.cachePath + '.tmp'
+
+        try:
+            with open(tempPath, 'wb') as f:
+                pickle.dump(cached, f, pickle.HIGHEST_PROTOCOL)
+
+            os.replace(tempPath, self.cachePath)
+
+        except OSError as err:
+            print("WARNING: Unable to save cache file {}. {}".format(self.cachePath, err))
+
+            try:
+                os.remove(tempPath)
+            except OSError:
+                pass
+
+            return False
+
+        return True
+
+
+    ## Deletes the cache file if there is one.
+    def clear(self):
+        try:
+            os.remove(self.cachePath)
+        except FileNotFoundError:
+            pass
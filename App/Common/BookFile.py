@@ -0,0 +1,68 @@
+##
+# @file
+# Finds what kind of file GNUCash saved and reads it.
+#
+
+import gzip
+import zlib
+
+from contextlib import nullcontext
+
+from App.Common.Book       import Book
+from App.Common.BookSQLite import BookSQLite
+
+
+## Find what kind of file GNUCash saved.
+# @param[in]    filePath    String for file path.
+# @return                   String, 'gzip', 'sqlite', or 'xml'.
+def getFileType(filePath):
+    with open(filePath, 'rb') as f:
+        magic = f.read(16)
+
+    # Gzip files always start with these two bytes, SQLite files with this string.
+    if (magic[:2] == b'\x1f\x8b'):
+        return 'gzip'
+    if (magic == b'SQLite format 3\x00'):
+        return 'sqlite'
+
+    return 'xml'
+
+
+## Open the GNUCash XML file to read.
+# @brief GNUCash saves compressed files by default. Those are read through gzip as they are parsed so
+#        the uncompressed XML never has to be written out or held in memory all at once.
+# @param[in]    filePath    String for file path.
+# @return                   Object, binary file to read the XML from.
+def openInputFile(filePath):
+    if (getFileType(filePath) == 'gzip'):
+        return gzip.open(filePath, 'rb')
+
+    return open(filePath, 'rb')
+
+
+## Reads the GNUCash file, or updates a book read from it before.
+# @param[in]    filePath    Name of GNUCash XML or SQLite file.
+# @param[in]    stale       Optional Book object read from the file before. It is updated with only
+#                           what changed if the file is still the same kind.
+# @return                   Tuple of the Book object and BookChanges, changes are None if the book
+#                           was read from scratch.
+# @exception    OSError     If the file can't be read, including a compressed file that is corrupt.
+def readBook(filePath, stale = None):
+    fileType = getFileType(filePath)
+
+    if (stale and isinstance(stale, BookSQLite) != (fileType == 'sqlite')):
+        stale = None
+
+    # SQLite is read by file name, XML from a file object.
+    try:
+        with (nullcontext(filePath) if (fileType == 'sqlite') else openInputFile(filePath)) as source:
+            if (stale):
+                return stale, stale.update(source)
+            if (fileType == 'sqlite'):
+                return BookSQLite(source), None
+
+            return Book(source), None
+
+    # A truncated gzip file is an EOFError, but a corrupt one is a zlib error the callers don't expect.
+    except zlib.error as err:
+        raise OSError("Corrupt compressed file {}: {}".format(filePath, err)) from err
@@ -0,0 +1,209 @@
+##
+# @file
+# Holds BookSQLite and SQLitePeriodSums classes.
+#
+
+import sqlite3
+
+from contextlib import closing
+from datetime   import datetime, timedelta
+from fractions  import Fraction
+from pathlib    import Path
+
+from App.Common.Book import Book, Account, Commodity, Price, Transaction, Split, parseDate
+
+
+## Converts a GNUCash SQL date string to a datetime object.
+# @brief Newer versions of GNUCash save "2020-11-30 10:59:00", older ones "20201130105900".
+# @param[in]    dateString      **String**, date from a GNUCash SQL table.
+# @return                       **DateTime Object** for that day, or None if no date given.
+def parseSQLDate(dateString):
+    if (dateString is None):
+        return None
+
+    if (dateString[4:5] == '-'):
+        return parseDate(dateString)
+
+    return datetime.strptime(dateString[:8], "%Y%m%d")
+
+
+## Book - SQLite
+# @brief Reads a GNUCash book saved as SQLite into the same records as the XML Book. Sums for report
+#        periods are done by SQLite instead of walking the transactions in Python.
+class BookSQLite(Book):
+
+    ## Reads the accounts, commodities, prices, transactions and splits tables.
+    # @param[in]    source          **String** file name of a GNUCash SQLite file.
+    def load(self, source):
+
+        self.filename = source
+
+        with closing(self.connect()) as connection:
+
+            # Commodities are referenced by GUID in the other tables, reports use the id (mnemonic).
+            commodities = {}
+            symbols     = dict(connection.execute(
+                "SELECT obj_guid, string_val FROM slots WHERE name = 'user_symbol'"))
+
+            for guid, space, mnemonic, fullname, fraction in connection.execute(
+                    "SELECT guid, namespace, mnemonic, fullname, fraction FROM commodities ORDER BY rowid"):
+                commodities[guid] = (space, mnemonic)
+                self.useDenominator(fraction)
+                self.commodities.append(Commodity(
+                    space    = space,
+                    id       = mnemonic,
+                    name     = fullname,
+                    fraction = fraction,
+                    symbol   = symbols.get(guid)))
+
+            for guid, name, accountType, parent, commodity, scu in connection.execute(
+                    "SELECT guid, name, account_type, parent_guid, commodity_guid, commodity_scu "
+                    "FROM accounts ORDER BY rowid"):
+                space, mnemonic = commodities.get(commodity, (None, None))
+                self.useDenominator(scu)
+                self.accounts.append(Account(
+                    id             = guid,
+                    name           = name,
+                    type           = accountType,
+                    parent         = parent,
+                    commodityId    = mnemonic,
+                    commoditySpace = space,
+                    commodityScu   = scu))
+
+            for guid, commodity, currency, date, valueNum, valueDenom in connection.execute(
+                    "SELECT guid, commodity_guid, currency_guid, date, value_num, value_denom "
+                    "FROM prices ORDER BY rowid"):
+                space, mnemonic = commodities.get(commodity, (None, None))
+                self.prices.append(Price(
+                    id             = guid,
+                    commodityId    = mnemonic,
+                    commoditySpace = space,
+                    currencyId     = commodities.get(currency, (None, None))[1],
+                    date           = parseSQLDate(date),
+                    value          = Fraction(valueNum, valueDenom)))
+
+            # Scale has to fit every split before any are converted, so they all use the same one.
+            rows = connection.execute(
+                "SELECT guid, tx_guid, account_guid, value_num, value_denom, quantity_num, quantity_denom "
+                "FROM splits ORDER BY rowid").fetchall()
+            for denominator, in connection.execute(
+                    "SELECT DISTINCT value_denom FROM splits UNION SELECT DISTINCT quantity_denom FROM splits"):
+                self.useDenominator(denominator)
+
+            splits = {}
+            for guid, transaction, account, valueNum, valueDenom, quantityNum, quantityDenom in rows:
+                splits.setdefault(transaction, []).append(Split(
+                    id       = guid,
+                    account  = account,
+                    value    = self.toScale(valueNum, valueDenom),
+                    quantity = self.toScale(quantityNum, quantityDenom)))
+
+            for guid, currency, postDate, enterDate in connection.execute(
+                    "SELECT guid, currency_guid, post_date, enter_date FROM transactions ORDER BY rowid"):
+                self.transactions.append(Transaction(
+                    id          = guid,
+                    currencyId  = commodities.get(currency, (None, None))[1],
+                    datePosted  = parseSQLDate(postDate),
+                    dateEntered = enterDate,
+                    splits      = tuple(splits.get(guid, ()))))
+
+            # Remember how dates are saved so SQL can compare them as strings.
+            dateRow = connection.execute("SELECT post_date FROM transactions LIMIT 1").fetchone()
+            self.dateFormat = "%Y%m%d" if (dateRow and dateRow[0][4:5] != '-') else "%Y-%m-%d"
+
+
+    ## Opens the file read only.
+    # @return                       **sqlite3 Connection**.
+    def connect(self):
+        return sqlite3.connect(Path(self.filename).resolve().as_uri() + '?mode=ro', uri=True)
+
+
+    ## Sums for each period of a report, done in SQL.
+    # @param[in]    periods         **List** of (start, end) **DateTime Object** tuples.
+    # @param[in]    accountIds      **Optional Iterable** of account GUIDs to keep sums for.
+    # @param[in]    changes         **Optional Boolean**, sums between dates instead of balances.
+    # @param[in]    engine          **Optional String**, not used, SQLite books are always summed in SQL.
+    # @return                       **SQLitePeriodSums Object**.
+    def periodSums(self, periods, accountIds = None, changes = False, engine = 'python'):
+        return SQLitePeriodSums(self, periods, accountIds, changes)
+
+
+    ## SQLite books are always summed in SQL, there is nothing to build.
+    # @param[in]    engine          **String**, not used.
+    def useEngine(self, engine):
+        pass
+
+
+## SQLite Period Sums
+# @brief Same results as BalanceSweep, but each period is one GROUP BY query using the post date and
+#        split account indexes GNUCash creates. Each query is run when its period is asked for.
+class SQLitePeriodSums():
+
+    ## Sums splits by account for splits posted before the end date. Amounts are integers in units
+    #  of 1 / scale, every denominator divides into the scale so the integer division is exact.
+    balanceQuery = ("SELECT s.account_guid, SUM(s.value_num * (:scale / s.value_denom)), "
+                    "SUM(s.quantity_num * (:scale / s.quantity_denom)) "
+                    "FROM transactions t JOIN splits s ON s.tx_guid = t.guid "
+                    "WHERE t.post_date < :end "
+                    "GROUP BY s.account_guid")
+
+    ## Sums splits by account for splits posted between the start and end dates.
+    changeQuery  = ("SELECT s.account_guid, SUM(s.value_num * (:scale / s.value_denom)), "
+                    "SUM(s.quantity_num * (:scale / s.quantity_denom)) "
+                    "FROM transactions t JOIN splits s ON s.tx_guid = t.guid "
+                    "WHERE t.post_date >= :start AND t.post_date < :end "
+                    "GROUP BY s.account_guid")
+
+    ## Constructor
+    # @param[in]    book            **BookSQLite Object**, book to query.
+    # @param[in]    periods         **List** of (start, end) **DateTime Object** tuples.
+    # @param[in]    accountIds      **Optional Iterable** of account GUIDs to keep sums for. If not
+    #                               given every account with splits is kept.
+    # @param[in]    changes         **Optional Boolean**, when True sums are only for splits between
+    #                               the start and end dates. Otherwise sums are balances at the end
+    #                               date.
+    def __init__(self, book, periods, accountIds = None, changes = False):
+
+        self.book    = book
+        self.periods = periods
+        self.keep    = None if (accountIds is None) else set(accountIds)
+        self.changes = changes
+        self.sums    = None     # Every period's sums, only kept if get() is used.
+
+
+    ## Sums for each period, queried as they are asked for.
+    # @return                       **Iterator** of **Dictonary** of account GUID to (value, quantity)
+    #                               tuples, in the same order as the periods.
+    def __iter__(self):
+        if (self.sums is not None):
+            yield from self.sums
+            return
+
+        book = self.book
+
+        with closing(book.connect()) as connection:
+            for startDate, endDate in self.periods:
+
+                # Dates are saved with the time of day, everything before the next day is included.
+                parameters = {'scale' : book.scale,
+                              'end'   : (endDate + timedelta(days=1)).strftime(book.dateFormat)}
+
+                # Nothing is before the first day, that's a balance.
+                if (self.changes and startDate > datetime.min):
+                    parameters['start'] = startDate.strftime(book.dateFormat)
+                    rows = connection.execute(self.changeQuery, parameters)
+                else:
+                    rows = connection.execute(self.balanceQuery, parameters)
+
+                yield {accountId : (value, quantity) for accountId, value, quantity in rows
+                       if (self.keep is None or accountId in self.keep)}
+
+
+    ## Returns the sums for each period, keeping them.
+    # @return                       **List** of **Dictonary** of account GUID to (value, quantity)
+    #                               tuples, in the same order as the periods.
+    def get(self):
+        if (self.sums is None):
+            self.sums = list(self)
+
+        return self.sums
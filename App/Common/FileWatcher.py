@@ -0,0 +1,71 @@
+##
+# @file
+# Holds FileWatcher class.
+#
+
+import os
+import time
+
+
+## File Watcher
+# @brief Polls the size and modification time of some files. A file only counts as changed once it
+#        has stopped changing for one poll, so a file still being saved isn't read half written.
+class FileWatcher():
+
+    ## Constructor
+    # @param[in]    filePaths       **Iterable** of file paths to watch.
+    # @param[in]    interval        **Optional Float**, seconds between polls.
+    def __init__(self, filePaths, interval = 0.2):
+        self.interval = interval
+        self.watch(filePaths)
+
+
+    ## Changes the files being watched, they count as unchanged as they are now.
+    # @param[in]    filePaths       **Iterable** of file paths to watch.
+    def watch(self, filePaths):
+        self.seen    = {filePath : self.stat(filePath) for filePath in filePaths}   # Path to stat last acted on.
+        self.pending = {}                                                           # Path to stat seen changed.
+
+
+    ## Size and modification time of a file.
+    # @param[in]    filePath        **String**, file to check.
+    # @return                       **Tuple** of Integers, None if the file doesn't exist right now.
+    @staticmethod
+    def stat(filePath):
+        try:
+            stat = os.stat(filePath)
+        except OSError:
+            return None
+
+        return stat.st_size, stat.st_mtime_ns
+
+
+    ## Checks the files once.
+    # @return                       **Set** of paths that changed and have stopped changing.
+    def poll(self):
+        changed = set()
+
+        for filePath, seen in self.seen.items():
+            stat = self.stat(filePath)
+
+            if (stat == seen or stat is None):
+                self.pending.pop(filePath, None)
+            elif (self.pending.get(filePath) != stat):
+                self.pending[filePath] = stat
+            else:
+                changed.add(filePath)
+                self.seen[filePath] = stat
+                del self.pending[filePath]
+
+        return changed
+
+
+    ## Waits until at least one file has changed.
+    # @return                       **Set** of paths that changed.
+    def wait(self):
+        while (True):
+            time.sleep(self.interval)
+
+            changed = self.poll()
+            if (changed):
+                return changed
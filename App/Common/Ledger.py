@@ -0,0 +1,111 @@
+##
+# @file
+# Holds Ledger class.
+#
+
+from bisect      import bisect_left, bisect_right
+from collections import Counter
+
+
+## Ledger
+# @brief Splits grouped by account GUID and sorted by date posted, with running totals so the sum of
+#        an account's splits over any date window is two binary searches and a subtraction.
+class Ledger():
+
+    ## Constructor
+    # @param[in]    book            **Book Object**, transactions to index.
+    def __init__(self, book):
+
+        # Account GUID to lists in date order. Running totals have an extra 0 at the front so sums
+        # can always subtract.
+        self.dates           = {}    # Dates the splits were posted.
+        self.values          = {}    # Split values.
+        self.quantities      = {}    # Split quantities.
+        self.totalValues     = {}    # Running total of values.
+        self.totalQuantities = {}    # Running total of quantities.
+
+        entries = {}
+        for transaction in book.transactions:
+            for split in transaction.splits:
+                entries.setdefault(split.account, []).append((transaction.datePosted, split.value, split.quantity))
+
+        for accountId in entries:
+            self.addAccount(accountId, entries[accountId])
+
+
+    ## Sorts an account's splits and calculates its running totals.
+    # @param[in]    accountId       **String**, GUID of account.
+    # @param[in]    entries         **List** of (date, value, quantity) tuples for the account.
+    def addAccount(self, accountId, entries):
+
+        # Sort is stable, splits on the same day stay in file order.
+        entries.sort(key=lambda entry: entry[0])
+
+        totalValues     = [0]
+        totalQuantities = [0]
+        for entry in entries:
+            totalValues.append(totalValues[-1] + entry[1])
+            totalQuantities.append(totalQuantities[-1] + entry[2])
+
+        self.dates[accountId]           = [entry[0] for entry in entries]
+        self.values[accountId]          = [entry[1] for entry in entries]
+        self.quantities[accountId]      = [entry[2] for entry in entries]
+        self.totalValues[accountId]     = totalValues
+        self.totalQuantities[accountId] = totalQuantities
+
+
+    ## Changes the accounts that had transactions removed or added.
+    # @param[in]    removed         **List** of Transaction records no longer in the book.
+    # @param[in]    added           **List** of Transaction records new to the book.
+    def update(self, removed, added):
+
+        removedEntries = {}
+        for transaction in removed:
+            for split in transaction.splits:
+                entry = (transaction.datePosted, split.value, split.quantity)
+                removedEntries.setdefault(split.account, Counter())[entry] += 1
+
+        addedEntries = {}
+        for transaction in added:
+            for split in transaction.splits:
+                addedEntries.setdefault(split.account, []).append((transaction.datePosted, split.value, split.quantity))
+
+        for accountId in set(removedEntries) | set(addedEntries):
+            entries = zip(self.dates.get(accountId, []),
+                          self.values.get(accountId, []),
+                          self.quantities.get(accountId, []))
+
+            # Drop one matching entry for each split removed, splits that look the same are interchangeable.
+            toRemove = removedEntries.get(accountId, Counter())
+            kept     = []
+            for entry in entries:
+                if (toRemove[entry] > 0):
+                    toRemove[entry] -= 1
+                else:
+                    kept.append(entry)
+
+            # Entries are still sorted, sorting again with the new ones at the end is quick.
+            self.addAccount(accountId, kept + addedEntries.get(accountId, []))
+
+
+    ## Sums an account's splits posted between two dates.
+    # @param[in]    accountId       **String**, GUID of account to sum splits for.
+    # @param[in]    endDate         **DateTime Object**, last day to include.
+    # @param[in]    startDate       **Optional DateTime Object**, first day to include. If not given
+    #                               the sum is from the beginning of the book (the balance).
+    # @return                       **Tuple**; First element is sum of account's value, second for
+    #                               quantity.
+    def sum(self, accountId, endDate, startDate = None):
+
+        # Account without splits.
+        if (accountId not in self.dates):
+            return 0, 0
+
+        dates = self.dates[accountId]
+        end   = bisect_right(dates, endDate)
+        start = 0 if (startDate is None) else bisect_left(dates, startDate, 0, end)
+
+        totalValues     = self.totalValues[accountId]
+        totalQuantities = self.totalQuantities[accountId]
+
+        return totalValues[end] - totalValues[start], totalQuantities[end] - totalQuantities[start]
@@ -0,0 +1,142 @@
+##
+# @file
+# Holds PeriodSpec and PeriodRule classes.
+#
+
+import re
+
+from datetime import datetime, timedelta
+
+
+## Adds months to the first day of a month.
+# @param[in]    day             **DateTime Object**, first day of a month.
+# @param[in]    months          **Integer**, months to add.
+# @return                       **DateTime Object**, first day of that month.
+def addMonths(day, months):
+    month = day.month - 1 + months
+    return day.replace(year=day.year + month // 12, month=month % 12 + 1)
+
+
+## Period Rule
+# @brief A run of periods made from a rule instead of listing every date, like "monthly 2000-01..2026-09".
+#        Periods are only made when iterated over.
+#
+#        daily 2020-01-01..2020-12-31       every day.
+#        weekly 2020-01-06..2020-12-31      7 days starting on the first date, through the week with the
+#                                           last date in it.
+#        monthly 2000-01..2026-09           calendar months.
+#        quarterly 2020-01..2020-12         3 months starting on the first month, through the quarter
+#                                           with the last month in it.
+#        yearly 2015..2025                  calendar years.
+#        fiscal-year:07-01 2015..2025       years starting on July 1st of each year.
+class PeriodRule():
+
+    ## Ranges each frequency takes, as a pattern and how to read the dates in it.
+    ranges = {'daily'       : (r'\d{4}-\d\d-\d\d', "%Y-%m-%d"),
+              'weekly'      : (r'\d{4}-\d\d-\d\d', "%Y-%m-%d"),
+              'monthly'     : (r'\d{4}-\d\d',      "%Y-%m"),
+              'quarterly'   : (r'\d{4}-\d\d',      "%Y-%m"),
+              'yearly'      : (r'\d{4}',           "%Y"),
+              'fiscal-year' : (r'\d{4}',           "%Y")}
+
+    ## Constructor
+    # @param[in]    rule            **String**, like "monthly 2000-01..2026-09".
+    def __init__(self, rule):
+        match = re.fullmatch(r'([a-z-]+)(?::(\d\d-\d\d))?\s+(\S+)\.\.(\S+)', rule.strip())
+        if (match is None or match.group(1) not in self.ranges):
+            raise ValueError("Unexpected period rule '{}'.".format(rule.strip()))
+
+        self.frequency, yearStart, first, last = match.groups()
+        pattern, dateFormat = self.ranges[self.frequency]
+
+        if (not re.fullmatch(pattern, first) or not re.fullmatch(pattern, last)):
+            raise ValueError("Unexpected range in period rule '{}'.".format(rule.strip()))
+        if (self.frequency == 'fiscal-year' and yearStart in (None, '02-29')):
+            raise ValueError("Fiscal years need a start day other than 02-29, like fiscal-year:07-01.")
+        if (self.frequency != 'fiscal-year' and yearStart is not None):
+            raise ValueError("Only fiscal-year takes a start day, like fiscal-year:07-01.")
+
+        # Fiscal years start on the given day of each year in the range.
+        if (yearStart):
+            first, last, dateFormat = first + '-' + yearStart, last + '-' + yearStart, "%Y-%m-%d"
+
+        try:
+            self.first = datetime.strptime(first, dateFormat)
+            self.last  = datetime.strptime(last, dateFormat)
+        except ValueError:
+            raise ValueError("Unexpected date in period rule '{}'.".format(rule.strip()))
+
+        if (self.last < self.first):
+            raise ValueError("Period rule '{}' ends before it starts.".format(rule.strip()))
+
+
+    ## Makes the periods one at a time.
+    # @return                       **Iterator** of (start, end) DateTime Object tuples, in order.
+    def __iter__(self):
+        start = self.first
+
+        while (start <= self.last):
+            if (self.frequency == 'daily'):
+                following = start + timedelta(days=1)
+            elif (self.frequency == 'weekly'):
+                following = start + timedelta(days=7)
+            elif (self.frequency == 'monthly'):
+                following = addMonths(start, 1)
+            elif (self.frequency == 'quarterly'):
+                following = addMonths(start, 3)
+            else:
+                following = start.replace(year=start.year + 1)
+
+            yield start, following - timedelta(days=1)
+            start = following
+
+
+    ## Number of periods.
+    def __len__(self):
+        return sum(1 for period in self)
+
+
+## Period Spec
+# @brief The dates from the config file: start and end date pairs and period rules, in any order. Rules
+#        are kept as rules until the periods are iterated over.
+class PeriodSpec():
+
+    ## Constructor
+    # @param[in]    text            **String**, comma separated dates ("yyyy-mm-dd", in start and end
+    #                               pairs) and period rules.
+    def __init__(self, text):
+        self.parts = []     # Lists of (start, end) pairs and PeriodRule objects, in config order.
+        dates      = []     # Dates waiting to be paired.
+
+        for item in filter(None, map(lambda item: item.strip(), text.split(','))):
+            if (re.fullmatch(r'\d{4}-\d\d-\d\d', item)):
+                try:
+                    dates.append(datetime.strptime(item, "%Y-%m-%d"))
+                except ValueError:
+                    raise ValueError("Unexpected date '{}' in config file.".format(item))
+                continue
+
+            if (len(dates) % 2 != 0):
+                raise ValueError("Unexpected number of dates in config file, they should be in pairs.")
+            if (dates):
+                self.parts.append(list(zip(dates[::2], dates[1::2])))
+                dates = []
+
+            self.parts.append(PeriodRule(item))
+
+        if (len(dates) % 2 != 0):
+            raise ValueError("Unexpected number of dates in config file, they should be in pairs.")
+        if (dates):
+            self.parts.append(list(zip(dates[::2], dates[1::2])))
+
+
+    ## Makes the periods one at a time.
+    # @return                       **Iterator** of (start, end) DateTime Object tuples.
+    def __iter__(self):
+        for part in self.parts:
+            yield from part
+
+
+    ## Number of periods.
+    def __len__(self):
+        return sum(len(part) for part in self.parts)
@@ -0,0 +1,91 @@
+##
+# @file
+# Holds PriceHistory class.
+#
+
+from bisect    import bisect_right
+from datetime  import datetime
+from fractions import Fraction
+
+from App.Common.Profile import Profile
+
+
+## Price History
+# @brief Prices of each commodity sorted by date, so the latest price on or before a date is a binary
+#        search instead of a look at every price in the book.
+class PriceHistory():
+
+    ## Most lookups to remember before starting over.
+    cacheSize = 4096
+
+    ## Constructor
+    # @param[in]    book            **Book Object**, prices to index.
+    def __init__(self, book):
+
+        self.dates  = {}    # Commodity id to list of price dates, sorted.
+        self.values = {}    # Commodity id to list of price values, same order as dates.
+        self.cache  = {}    # (Commodity id, date) to results of latest().
+
+        self.update(book)
+
+
+    ## Sorts the prices of commodities.
+    # @param[in]    book            **Book Object**, prices to index.
+    # @param[in]    commodityIds    **Optional Set** of commodity ids to sort prices for again. If not
+    #                               given every commodity is done.
+    def update(self, book, commodityIds = None):
+
+        prices = {}
+        for price in book.prices:
+            if (commodityIds is None or price.commodityId in commodityIds):
+                prices.setdefault(price.commodityId, []).append(price)
+
+        # Commodities that no longer have prices.
+        for commodityId in (commodityIds or ()):
+            self.dates.pop(commodityId, None)
+            self.values.pop(commodityId, None)
+
+        for commodityId in prices:
+
+            # Sort is stable, when there are prices on the same day the last one in the file wins.
+            prices[commodityId].sort(key=lambda price: price.date)
+
+            self.dates[commodityId]  = [price.date for price in prices[commodityId]]
+            self.values[commodityId] = [price.value for price in prices[commodityId]]
+
+        # Anything remembered may be out of date.
+        self.cache.clear()
+
+
+    ## Gets the latest price of a commodity without going past a date.
+    # @param[in]    commodityId     **String**, id of commodity.
+    # @param[in]    endDate         **DateTime Object**, latest date a price can be from.
+    # @return                       **Tuple** First element is commodity value as a Fraction, 0 if
+    #                               there is no price. Second is the date of the commodity value as a
+    #                               datetime object, datetime.min if there is no price.
+    def latest(self, commodityId, endDate):
+
+        Profile.count('priceLookups')
+
+        # Reports running in threads share the cache, it may be cleared between a check and a read.
+        key    = (commodityId, endDate)
+        cached = self.cache.get(key)
+        if (cached is not None):
+            Profile.count('priceCacheHits')
+            return cached
+
+        value = Fraction(0)
+        date  = datetime.min
+
+        if (commodityId in self.dates):
+            index = bisect_right(self.dates[commodityId], endDate) - 1
+            if (index >= 0):
+                value = self.values[commodityId][index]
+                date  = self.dates[commodityId][index]
+
+        # Keep the cache small, reports only ask about a few dates at a time.
+        if (len(self.cache) >= self.cacheSize):
+            self.cache.clear()
+        self.cache[key] = (value, date)
+
+        return value, date
@@ -0,0 +1,116 @@
+##
+# @file
+# Holds Profile class.
+#
+
+import json
+import os
+import threading
+import time
+
+from contextlib import contextmanager
+from datetime   import datetime
+
+
+## Profile
+# @brief Wall and CPU time of each stage of a run, and counts of work done in hot paths. Nothing is
+#        recorded unless enabled is set, so it costs nothing in a normal run. This class is not intended
+#        to be instantiated.
+class Profile:
+    enabled  = False
+    stages   = {}   # Stage name to {'wall', 'cpu', 'calls'}.
+    counters = {}   # Counter name to count.
+    lock     = threading.Lock()
+
+
+    ## Times a stage, use as "with Profile.stage('name'):". Time adds up if a stage runs more than once.
+    # @brief CPU time is for this thread only, so reports running in threads don't count each other.
+    # @param[in]    name            **String**, name of the stage.
+    @staticmethod
+    @contextmanager
+    def stage(name):
+        if (not Profile.enabled):
+            yield
+            return
+
+        wall = time.perf_counter()
+        cpu  = time.thread_time()
+        try:
+            yield
+        finally:
+            Profile.add(name, time.perf_counter() - wall, time.thread_time() - cpu)
+
+
+    ## Adds time to a stage.
+    # @param[in]    name            **String**, name of the stage.
+    # @param[in]    wall            **Float**, wall seconds.
+    # @param[in]    cpu             **Float**, CPU seconds.
+    # @param[in]    calls           **Optional Integer**, times the stage ran.
+    @staticmethod
+    def add(name, wall, cpu, calls = 1):
+        with Profile.lock:
+            stage           = Profile.stages.setdefault(name, {'wall' : 0.0, 'cpu' : 0.0, 'calls' : 0})
+            stage['wall']  += wall
+            stage['cpu']   += cpu
+            stage['calls'] += calls
+
+
+    ## Adds to a counter.
+    # @param[in]    name            **String**, name of the counter.
+    # @param[in]    amount          **Optional Integer**, how much to add.
+    @staticmethod
+    def count(name, amount = 1):
+        if (Profile.enabled):
+            with Profile.lock:
+                Profile.counters[name] = Profile.counters.get(name, 0) + amount
+
+
+    ## Takes what has been recorded so far and starts over. Forked workers send this back to be merged.
+    # @return                       **Dictonary** with stages and counters.
+    @staticmethod
+    def take():
+        with Profile.lock:
+            taken = {'stages' : Profile.stages, 'counters' : Profile.counters}
+            Profile.stages   = {}
+            Profile.counters = {}
+
+        return taken
+
+
+    ## Starts over in a forked worker, so the parent's work isn't counted twice. The lock may have been
+    #  held by another thread when the fork happened.
+    @staticmethod
+    def clear():
+        Profile.stages   = {}
+        Profile.counters = {}
+        Profile.lock     = threading.Lock()
+
+
+    ## Adds what another process recorded.
+    # @param[in]    taken           **Dictonary** from take(), None if it wasn't enabled.
+    @staticmethod
+    def merge(taken):
+        if (not taken):
+            return
+
+        for name, stage in taken['stages'].items():
+            Profile.add(name, stage['wall'], stage['cpu'], stage['calls'])
+
+        for name, amount in taken['counters'].items():
+            Profile.count(name, amount)
+
+
+    ## Writes everything recorded to a JSON file.
+    # @param[in]    filePath        **String**, file to write.
+    # @param[in]    details         **Optional Dictonary**, more about the run to save with it.
+    @staticmethod
+    def write(filePath, details = None):
+        with open(filePath, 'w', encoding='utf-8') as f:
+            json.dump({'date'     : datetime.now().isoformat(timespec='seconds'),
+                       'run'      : details or {},
+                       'stages'   : Profile.stages,
+                       'counters' : Profile.counters}, f, indent=2)
+
+
+if (hasattr(os, 'register_at_fork')):
+    os.register_at_fork(after_in_child=Profile.clear)
@@ -0,0 +1,63 @@
+##
+# @file
+# Holds ReportAccount and ReportNode classes.
+#
+
+
+## Report Account
+# @brief What a report knows about an account that doesn't change between periods: its name, depth,
+#        commodity and child accounts. Made once per report and shared by that account's node in every
+#        period.
+class ReportAccount():
+    __slots__ = ('id', 'name', 'level', 'commodityId', 'commodityNamespace', 'commoditySymbol', 'children')
+
+    ## Constructor
+    # @param[in]    id                  **String**, GUID of the account.
+    # @param[in]    name                **String**, human readable name.
+    # @param[in]    level               **Integer**, depth of the account relative to the report's top.
+    # @param[in]    commodityId         **String**, what the account is made of.
+    # @param[in]    commodityNamespace  **String**, category of the commodity.
+    # @param[in]    commoditySymbol     **String**, display symbol of the commodity.
+    # @param[in]    children            **Tuple** of ReportAccount objects, in file order.
+    def __init__(self, id, name, level, commodityId, commodityNamespace, commoditySymbol, children):
+        self.id                 = id
+        self.name               = name
+        self.level              = level
+        self.commodityId        = commodityId
+        self.commodityNamespace = commodityNamespace
+        self.commoditySymbol    = commoditySymbol
+        self.children           = children
+
+
+## Report Node
+# @brief An account's amounts for one period of a report, children are nodes for the same period.
+class ReportNode():
+    __slots__ = ('account', 'children', 'quantity', 'total', 'totalAccount', 'commodityValue', 'commodityDate')
+
+    ## Constructor
+    # @param[in]    account         **ReportAccount Object**, the account this is for.
+    # @param[in]    children        **Tuple** of ReportNode objects, same order as account.children.
+    # @param[in]    quantity        **Fraction**, how many commodities in the account (1:1 if USD).
+    # @param[in]    total           **Fraction**, value of this account alone.
+    # @param[in]    commodityValue  **Optional Fraction**, commodity price used for total.
+    # @param[in]    commodityDate   **Optional DateTime Object**, date of that price.
+    def __init__(self, account, children, quantity, total, commodityValue = None, commodityDate = None):
+        self.account        = account
+        self.children       = children
+        self.quantity       = quantity
+        self.total          = total
+        self.totalAccount   = 0         # This account value and its child values, see calculateTotals().
+        self.commodityValue = commodityValue
+        self.commodityDate  = commodityDate
+
+
+    ## Human readable name of the account.
+    @property
+    def name(self):
+        return self.account.name
+
+
+    ## Depth of the account relative to the top of the report.
+    @property
+    def level(self):
+        return self.account.level
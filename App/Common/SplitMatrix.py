@@ -0,0 +1,174 @@
+##
+# @file
+# Holds SplitMatrix and SplitMatrixSums classes.
+#
+
+from App.Common.Profile import Profile
+
+# NumPy is optional, without it Book.periodSums() uses BalanceSweep.
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+## Largest amount a numpy.int64 holds.
+INT64_MAX = 2**63 - 1
+
+
+## Split Matrix
+# @brief Every split in the book as NumPy columns: account index, day (date ordinal), value and
+#        quantity. Sums for all accounts and all periods of a report are worked out together with a
+#        few array operations instead of a Python loop over the splits.
+class SplitMatrix():
+
+    ## Is NumPy installed?
+    # @return                       **Boolean**.
+    @staticmethod
+    def available():
+        return numpy is not None
+
+
+    ## Constructor
+    # @param[in]    book            **Book Object**, splits to put in columns.
+    def __init__(self, book):
+
+        self.accountIds   = []      # Account GUID for each account index.
+        self.accountIndex = {}      # Account GUID to account index.
+        self.exact        = True    # False if sums could be too big for int64, then it can't be used.
+
+        accounts   = []
+        days       = []
+        values     = []
+        quantities = []
+
+        for transaction in book.transactions:
+            day = transaction.datePosted.toordinal()
+            for split in transaction.splits:
+                if (split.account not in self.accountIndex):
+                    self.accountIndex[split.account] = len(self.accountIds)
+                    self.accountIds.append(split.account)
+
+                accounts.append(self.accountIndex[split.account])
+                days.append(day)
+                values.append(split.value)
+                quantities.append(split.quantity)
+
+        # Amounts are integers in units of 1 / Book.scale. No sum, or difference of sums, can be bigger
+        # than every amount added up, if that fits in int64 nothing can overflow.
+        if (max(sum(map(abs, values)), sum(map(abs, quantities))) > INT64_MAX):
+            self.exact = False
+            return
+
+        self.accounts   = numpy.array(accounts, dtype=numpy.int64)
+        self.days       = numpy.array(days, dtype=numpy.int64)
+        self.values     = numpy.array(values, dtype=numpy.int64)
+        self.quantities = numpy.array(quantities, dtype=numpy.int64)
+
+
+    ## Sums for each period of a report.
+    # @param[in]    periods         **List** of (start, end) **DateTime Object** tuples.
+    # @param[in]    accountIds      **Optional Iterable** of account GUIDs to keep sums for.
+    # @param[in]    changes         **Optional Boolean**, sums between dates instead of balances.
+    # @return                       **SplitMatrixSums Object**.
+    def periodSums(self, periods, accountIds = None, changes = False):
+        return SplitMatrixSums(self, periods, accountIds, changes)
+
+
+    ## Balances of every account at a list of cut off days.
+    # @brief Each split is put in a bin by how many cut offs it is on or after, summed per account and
+    #        bin, then totaled across bins. Column j is the sum of splits before cut off j.
+    # @param[in]    cutoffs         **numpy Array** of sorted, unique day ordinals.
+    # @return                       **Tuple** of value and quantity **numpy Arrays**, accounts × cut offs.
+    def balances(self, cutoffs):
+        Profile.count('splitsScanned', len(self.days))
+
+        bins   = numpy.searchsorted(cutoffs, self.days, side='right')
+        width  = len(cutoffs) + 1
+        cells  = self.accounts * width + bins
+        size   = len(self.accountIds) * width
+
+        # bincount only sums floats, add.at keeps the integers.
+        values     = numpy.zeros(size, dtype=numpy.int64)
+        quantities = numpy.zeros(size, dtype=numpy.int64)
+        numpy.add.at(values, cells, self.values)
+        numpy.add.at(quantities, cells, self.quantities)
+
+        values     = values.reshape(-1, width)
+        quantities = quantities.reshape(-1, width)
+
+        return values.cumsum(axis=1)[:, :-1], quantities.cumsum(axis=1)[:, :-1]
+
+
+## Split Matrix Sums
+# @brief Same results as BalanceSweep, worked out from a SplitMatrix. The sums are kept as arrays, a
+#        period's dictonary is only made when it is given out.
+class SplitMatrixSums():
+
+    ## Constructor
+    # @param[in]    matrix          **SplitMatrix Object**, splits to sum.
+    # @param[in]    periods         **List** of (start, end) **DateTime Object** tuples.
+    # @param[in]    accountIds      **Optional Iterable** of account GUIDs to keep sums for. If not
+    #                               given every account with splits is kept.
+    # @param[in]    changes         **Optional Boolean**, when True sums are only for splits between
+    #                               the start and end dates. Otherwise sums are balances at the end
+    #                               date.
+    def __init__(self, matrix, periods, accountIds = None, changes = False):
+
+        self.keys       = []        # Account GUID of each column.
+        self.values     = None      # Periods × accounts numpy Array of values.
+        self.quantities = None      # Periods × accounts numpy Array of quantities.
+        self.sums       = None      # Every period's sums, only kept if get() is used.
+
+        if (not periods):
+            self.sums = []
+            return
+
+        # Balance at the end of a day is everything before the next day. Balance before a start date
+        # is everything before that day.
+        ends   = [endDate.toordinal() + 1 for startDate, endDate in periods]
+        starts = [startDate.toordinal() for startDate, endDate in periods]
+
+        cutoffs = numpy.unique(numpy.array(ends + starts if (changes) else ends, dtype=numpy.int64))
+        values, quantities = matrix.balances(cutoffs)
+
+        endColumns = numpy.searchsorted(cutoffs, ends)
+        endValues     = values[:, endColumns]
+        endQuantities = quantities[:, endColumns]
+
+        # A start after the end has nothing in between.
+        if (changes):
+            startColumns = numpy.minimum(numpy.searchsorted(cutoffs, starts), endColumns)
+            endValues     = endValues - values[:, startColumns]
+            endQuantities = endQuantities - quantities[:, startColumns]
+
+        # Only the accounts asked for, ones without splits aren't in the matrix.
+        if (accountIds is None):
+            rows = list(range(len(matrix.accountIds)))
+        else:
+            rows = [matrix.accountIndex[accountId] for accountId in accountIds if (accountId in matrix.accountIndex)]
+
+        self.keys       = [matrix.accountIds[row] for row in rows]
+        self.values     = numpy.ascontiguousarray(endValues[rows, :].T)
+        self.quantities = numpy.ascontiguousarray(endQuantities[rows, :].T)
+
+
+    ## Sums for each period, made as they are asked for.
+    # @return                       **Iterator** of **Dictonary** of account GUID to (value, quantity)
+    #                               tuples, in the same order as the periods.
+    def __iter__(self):
+        if (self.sums is not None):
+            yield from self.sums
+            return
+
+        for periodValues, periodQuantities in zip(self.values, self.quantities):
+            yield dict(zip(self.keys, zip(periodValues.tolist(), periodQuantities.tolist())))
+
+
+    ## Returns the sums for each period, keeping them.
+    # @return                       **List** of **Dictonary** of account GUID to (value, quantity)
+    #                               tuples, in the same order as the periods.
+    def get(self):
+        if (self.sums is None):
+            self.sums = list(self)
+
+        return self.sums
@@ -0,0 +1,86 @@
+##
+# @file
+# Holds TransactionIndex and TransactionWindow classes.
+#
+
+from bisect          import bisect_left, bisect_right
+from collections.abc import Sequence
+from heapq           import merge
+
+
+## Transaction Index
+# @brief The book's transactions sorted by date posted, so the transactions between two dates are
+#        found with two binary searches.
+class TransactionIndex():
+
+    ## Constructor
+    # @param[in]    book            **Book Object**, transactions to index.
+    def __init__(self, book):
+
+        # Sort is stable, transactions on the same day stay in file order.
+        self.transactions = sorted(book.transactions, key=lambda transaction: transaction.datePosted)
+        self.dates        = [transaction.datePosted for transaction in self.transactions]
+
+
+    ## Removes and adds transactions, keeping them sorted.
+    # @param[in]    removed         **List** of Transaction records no longer in the book.
+    # @param[in]    added           **List** of Transaction records new to the book.
+    def update(self, removed, added):
+        if (not removed and not added):
+            return
+
+        removedIds = {transaction.id for transaction in removed}
+        kept       = [transaction for transaction in self.transactions if (transaction.id not in removedIds)]
+        added      = sorted(added, key=lambda transaction: transaction.datePosted)
+
+        # Both are sorted, merge keeps transactions already in the book first on the same day.
+        self.transactions = list(merge(kept, added, key=lambda transaction: transaction.datePosted))
+        self.dates        = [transaction.datePosted for transaction in self.transactions]
+
+
+    ## Transactions posted between two dates.
+    # @param[in]    endDate         **DateTime Object**, last day to include.
+    # @param[in]    startDate       **Optional DateTime Object**, first day to include. If not given
+    #                               the window starts at the beginning of the book.
+    # @return                       **TransactionWindow Object**, view of the sorted transactions.
+    def window(self, endDate, startDate = None):
+        end   = bisect_right(self.dates, endDate)
+        start = 0 if (startDate is None) else bisect_left(self.dates, startDate, 0, end)
+
+        return TransactionWindow(self.transactions, start, end)
+
+
+## Transaction Window
+# @brief Read only view of a range of a list, nothing is copied.
+class TransactionWindow(Sequence):
+
+    ## Constructor
+    # @param[in]    transactions    **List**, sorted transactions this is a view of.
+    # @param[in]    start           **Integer**, index of first transaction in the window.
+    # @param[in]    end             **Integer**, index after the last transaction in the window.
+    def __init__(self, transactions, start, end):
+        self.transactions = transactions
+        self.range        = range(start, end)
+
+
+    ## Number of transactions in the window.
+    def __len__(self):
+        return len(self.range)
+
+
+    ## Transaction (or a narrower window when given a slice) at index in the window.
+    def __getitem__(self, index):
+        if (isinstance(index, slice)):
+            indexes = self.range[index]
+            if (indexes.step != 1):
+                return [self.transactions[i] for i in indexes]
+            return TransactionWindow(self.transactions, indexes.start, indexes.stop)
+
+        return self.transactions[self.range[index]]
+
+
+    ## Walk the transactions in the window.
+    def __iter__(self):
+        transactions = self.transactions
+        for i in self.range:
+            yield transactions[i]
@@ -5,145 +5,219 @@
 
 import csv
 
-from App.Options import Options
+from decimal     import Decimal
+
+from App.Common.Profile import Profile
+
+
+## Formats an amount to display like currency.
+# @param[in]    amount          **Fraction** (or Integer), exact amount.
+# @return                       **String**, like "$1,234.56".
+def formatCurrency(amount):
+    # Exact to well past a cent, float would round the last digit of large amounts.
+    amount = Decimal(amount.numerator) / Decimal(amount.denominator)
+    return '${:,.2f}'.format(amount)
 
 
 ## Create CSV
-# @brief Creates a CSV report from a ParseData object.
+# @brief Creates a CSV report from a ParseData object. The columns are worked out from the report's
+#        accounts, then each period is written as it is built by createFile(), or handed to writeRow()
+#        by something building them for more than one report.
 class CreateCSV():
 
     ## Constructor
-    # @param[in]    reportObj       **List**, output from ParseData class, reports to create the CSV for.
+    # @param[in]    context         **ReportContext Object**, book and settings.
+    # @param[in]    reportObj       **ParseData Object**, reports to create the CSV for.
     # @param[in]    options         **Object**, options from config file.
-    def __init__(self, reportObj, options):
+    def __init__(self, context, reportObj, options):
 
-        if (Options.verbose):
+        self.context    = context
+
+        if (context.verbose):
             print("    Creating {} CSV".format(options.ReportType))
 
-        self.reports    = reportObj.report
+        self.reportObj  = reportObj
         self.outputFile = options.OutputFile
-        self.depth      = options.Depth
+        self.depth      = reportObj.accountPaths.forEachPath(options.Depth)
+        self.file       = None
 
-        self.createFile()
+        with Profile.stage('csvWrite'):
+            self.createLayout()
 
 
     # Get number of children for current account at a certain depth.
-    # @param[in]    account         **Object**, An account from a report.
+    # @brief Each account is only counted once, the count is remembered for its parents.
+    # @param[in]    account         **ReportAccount Object**, An account from a report.
     # @param[in]    depth           **Integer**, Depth to count children at
     def countChildrenToDepth(self, account, depth):
-        if (account['level'] == depth):
-            return 1
+        key = (account.id, account.level, depth)
+
+        if (key not in self.widths):
+            if (account.level == depth):
+                self.widths[key] = 1
+            else:
+                self.widths[key] = sum(self.countChildrenToDepth(child, depth) for child in account.children)
 
-        subcount = 0
-        if (account['level'] < depth):
-            for child in account['children']:
-                subcount += self.countChildrenToDepth(account['children'][child], depth)
-            return subcount
+        return self.widths[key]
 
 
     ## The recursive part of creating the headers
-    # @param[in]    account         **Object**, An account from a report, first call is the top level account.
+    # @param[in]    account         **ReportAccount Object**, An account from a report, first call is the top level account.
     # @param[in]    depth           **Integer**, Depth for this report.
+    # @param[in]    start           **Integer**, first column of the top level account.
     # @param[out]   headers         **Dictonary**, Represents headers to be created.
-    def createAccountHeaders(self, account, depth, headers):
+    def createAccountHeaders(self, account, depth, start, headers):
 
         # Ignore children called below this depth.
-        if (account['level'] <= depth):
+        if (account.level <= depth):
 
             # New row
-            if (account['level'] not in headers):
-                headers[account['level']] = []
+            if (account.level not in headers):
+                headers[account.level] = []
 
-            # New account
-            if (account['name'] not in headers[account['level']]):
-                headers[account['level']].append(account['name'])
+            # New account, names are only shared under the same top level account.
+            if (account.name not in headers[account.level][start:]):
+                headers[account.level].append(account.name)
 
                 # Add column and space for children if needed.
                 colWidth = self.countChildrenToDepth(account, depth) - 1
                 for i in range(0, colWidth):
-                    headers[account['level']].append(None)
+                    headers[account.level].append(None)
 
             # Call again if this account has children.
-            if (account['children']):
-                for child in account['children']:
-                    self.createAccountHeaders(account['children'][child], depth, headers)
+            if (account.children):
+                for child in account.children:
+                    self.createAccountHeaders(child, depth, start, headers)
 
 
     ## Creates the CSV Headers
+    # @brief Every period has the same accounts, so headers come from the report's accounts.
     def createHeaders(self):
-        headers = {}
-        for report in self.reports: # break report up by dates
-            for index, topLevelAccounts in enumerate(report['data']): # break report up by top level accounts
-                self.createAccountHeaders(report['data'][topLevelAccounts], self.depth[index], headers)
+        headers     = {level : [] for level in range(max(self.depth, default=0) + 1)}
+        self.starts = []    # First column of each top level account.
+
+        for index, account in enumerate(self.topAccounts): # break report up by top level accounts
+
+            # Each top account starts after the longest row so far, so its columns still line up when
+            # another top account doesn't go as deep.
+            start = max(len(row) for row in headers.values())
+            for row in headers.values():
+                row.extend([None] * (start - len(row)))
+
+            self.starts.append(start + 1)
+            self.createAccountHeaders(account, self.depth[index], start, headers)
+
+        # Levels no account reaches have nothing to show.
+        headers = {level : row for level, row in headers.items() if (any(name is not None for name in row))}
 
         # Add empty column before each header row for date.
         for each in headers:
             headers[each].insert(0, None)
-        
+
         return headers
 
 
+    ## Maps accounts shown in the report to their columns.
+    # @brief Accounts with the same name at a level under the same top level account share the first
+    #        column with that name.
+    # @param[in]    account         **ReportAccount Object**, first call is a top level account.
+    # @param[in]    depth           **Integer**, Depth for this report.
+    # @param[in]    names           **Dictonary**, name to column in the header row at this depth.
+    # @param[out]   columns         **Dictonary**, (GUID, level) to column.
+    def createColumns(self, account, depth, names, columns):
+
+        if (account.level < depth):
+            for child in account.children:
+                self.createColumns(child, depth, names, columns)
+
+        elif (account.level == depth):
+            columns[(account.id, account.level)] = names[account.name]
+
+
+    ## Works out where everything goes once, before any rows are made.
+    def createLayout(self):
+        self.topAccounts = self.reportObj.getTopAccounts()
+        self.widths      = {}
+        self.headers     = self.createHeaders()
+        self.columns     = {}
+
+        # A depth below every account under a top account has no header row, and nothing to show.
+        for index, account in enumerate(self.topAccounts):
+            header = self.headers.get(self.depth[index], [])
+            names  = {name : column for column, name in reversed(list(enumerate(header))) if (column >= self.starts[index])}
+            self.createColumns(account, self.depth[index], names, self.columns)
+
+        # Rows are as long as the longest header row, depths can be different for each top account.
+        self.width = max((len(header) for header in self.headers.values()), default=1)
+
+
     ## Sum total for single report
     # @brief The recursive part of creating rows.
-    # @param[in]    account         **Object**, an account, first call is a top level account.
-    # @param[in]    headers         **Dictonary**, Headers to use.
-    # @param[in]    row             **String**, index for row.
-    def getTotals(self, account, headers, row, depth):
+    # @param[in]    account         **ReportNode Object**, an account, first call is a top level account.
+    # @param[in]    row             **List**, row to fill in.
+    # @param[in]    depth           **Integer**, Depth for this report.
+    def getTotals(self, account, row, depth):
 
         # No totals to update, just call on children.
-        if (account['level'] < depth):
-            for child in account['children']:
-                self.getTotals(account['children'][child], headers, row, depth)
+        if (account.level < depth):
+            for child in account.children:
+                self.getTotals(child, row, depth)
 
-        # This is the depth for building out this row.
-        elif (account['level'] == depth):
+        # This is the depth for building out this row. This will leave None's where this account is
+        # not in this batch of reports.
+        elif (account.level == depth):
+            row[self.columns[(account.account.id, account.level)]] = formatCurrency(account.totalAccount)
 
-            # Make sure this name is in the header, and get where it is.
-            index = headers.index(account['name'])
 
-            # This will leave None's where this account is not in this batch of reports.
-            formattedAmount = '${:,.2f}'.format(account['totalAccount'])
-            row[index] = formattedAmount
+    ## Create a CSV row for one period.
+    # @param[in]    report          **Dictonary**, one period of the report.
+    # @return                       **List** of the date then the formatted totals.
+    def createRow(self, report):
 
+        # Use date as string so it looks nice in CSV.
+        row    = [None] * self.width
+        row[0] = report['endDate'].strftime("%Y-%m-%d")
 
-    ## Create the CSV Rows
-    def createRows(self):
-        rows = {}
-        for report in self.reports:
-            # Use date as string so it looks nice in CSV.
-            dateIndex = report['endDate'].strftime("%Y-%m-%d")
+        # Loop through topLevelAccounts
+        for index, topLevelAccounts in enumerate(report['data']):
 
-            # Use report date as key for row, create row with max length of header.
-            rows[dateIndex] = [None] * (len(self.headers[max(self.headers, key=self.headers.get)]) - 1)
-            rows[dateIndex].insert(0, dateIndex)
+            # Fill in totals for this row.
+            self.getTotals(report['data'][topLevelAccounts], row, self.depth[index])
 
-            # Loop through topLevelAccounts
-            for index, topLevelAccounts in enumerate(report['data']):
+        return row
 
-                # Fill in totals for this row.
-                self.getTotals(report['data'][topLevelAccounts],
-                               self.headers[self.depth[index]], # pass in the header for these topLevelAccounts
-                               rows[dateIndex],
-                               self.depth[index])
-        return rows
 
+    ## Opens the CSV file and writes the headers.
+    def open(self):
+        with Profile.stage('csvWrite'):
+            self.file   = open(self.outputFile, 'w', newline='', encoding='utf-8')
+            self.writer = csv.writer(self.file, lineterminator="\n")
+            self.writer.writerows(self.headers.values())
 
-    ## Creates CSV File.
-    def createFile(self):
 
-        self.headers = self.createHeaders()
-        rows = self.createRows()
+    ## Writes one period, after open().
+    # @param[in]    report          **Dictonary**, one period of the report.
+    def writeRow(self, report):
+        with Profile.stage('csvWrite'):
+            self.writer.writerow(self.createRow(report))
 
-        # Write it all to a CSV.
-        allRows = []
 
-        for header in self.headers:
-            allRows.append(self.headers[header])
+    ## Closes the CSV file.
+    def close(self):
+        if (self.file is not None):
+            self.file.close()
+            self.file = None
 
-        for row in rows:
-            allRows.append(rows[row])
 
-        # Write it
-        with open(self.outputFile, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f, lineterminator="\n")
-            writer.writerows(allRows)
+    ## Creates CSV File.
+    # @brief Rows are written as each period is built, so only one is held at a time.
+    # @param[in]    reports         **Optional Iterable** of periods, defaults to building them from the
+    #                               report's parse data.
+    def createFile(self, reports = None):
+        self.open()
+
+        try:
+            for report in (reports if (reports is not None) else self.reportObj):
+                self.writeRow(report)
+        finally:
+            self.close()
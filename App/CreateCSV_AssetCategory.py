@@ -5,7 +5,8 @@
 
 import csv
 
-from App.Options import Options
+from App.CreateCSV      import formatCurrency
+from App.Common.Profile import Profile
 
 
 ## Create CSV - Asset Category
@@ -16,111 +17,120 @@ from App.Options import Options
 class CreateCSV_AssetCategory():
 
     ## Constructor
-    # @param[in]    assetBalanceReport  **List**, Asset Balance Report from ParseData.
+    # @param[in]    context             **ReportContext Object**, book and settings.
+    # @param[in]    assetBalanceReport  **ParseData Object**, Asset Balance Report.
     # @param[in]    options             **Object**, options from config file.
-    def __init__(self, assetBalanceReport, options):
+    def __init__(self, context, assetBalanceReport, options):
 
-        if (Options.verbose):
+        self.context    = context
+
+        if (context.verbose):
             print("    Creating Asset Category CSV")
 
-        self.reports    = assetBalanceReport.report
+        self.reportObj  = assetBalanceReport
         self.outputFile = options.OutputFile
-        self.depth      = options.Depth
+        self.depth      = assetBalanceReport.accountPaths.forEachPath(options.Depth)
+        self.file       = None
 
         self.columns = self.createHeaders()
-        self.rows    = self.createRows()
-
-        # Call sumRowTotals for each date range.
-        for report in self.reports:
-            self.sumRowTotals(report)
-
-        self.createFile()
 
 
-    ## Parse categoeis from GNUCash XML.
+    ## Parse categoeis from GNUCash book.
     # @brief Creates a dictonary with categories from GNUCash's security namespaces as keys and
-    #        float as values. A copy will be added for each row (date range).
+    #        exact amounts as values. A copy will be added for each row (date range).
     # @return                       **Dictonary** of categories to use as headers.
     def createHeaders(self):
-        if (Options.verbose):
+        if (self.context.verbose):
             print("      Creating categoris from security namespaces.")
 
         categories = {}
 
-        for commodity in Options.GNUCashXML.findall(".//gnc:commodity", Options.namespaces):
-            category = commodity.find("./cmdty:space", Options.namespaces).text
+        for commodity in self.context.book.commodities:
+            category = commodity.space
 
             if category not in categories:
-                categories[category] = 0.0
+                categories[category] = 0
 
         return categories
 
 
-    ## Setup rows from end date.
-    # @brief A row is made for each end date defined in the report (indexed as string with format
-    #        "yyyy-mm-dd"). Each has a copy of the self.columns dictionary from createHeaders().
-    # @return                       **Dictonary** of rows by date.
-    def createRows(self):
-        rows = {}
-
-        for report in self.reports:
-            date = report['endDate'].strftime("%Y-%m-%d")
-            rows[date] = self.columns.copy()
-
-        return rows
-
-
     ## Sums accounts by category for the give date.
     # @brief Adds the given account's total to the correct category. Recursively calls again if that
     #        account has children.
-    # @param[in]    dateIndex           **String**, date to use as index format "yyyy-mm-dd".
-    # @param[in]    account             **Object**, account to sum.
-    def addAccountTotalsToCategory(self, dateIndex, account):
-        category = account['commodity']['namespace']
-        ammount  = account['total']
+    # @param[in]    row                 **Dictonary**, category totals of the period.
+    # @param[in]    account             **ReportNode Object**, account to sum.
+    def addAccountTotalsToCategory(self, row, account):
+        category = account.account.commodityNamespace
+        ammount  = account.total
 
-        self.rows[dateIndex][category] += ammount
+        row[category] += ammount
 
-        for child in account['children']:
-            self.addAccountTotalsToCategory(dateIndex, account['children'][child])
+        for child in account.children:
+            self.addAccountTotalsToCategory(row, child)
 
 
     ## Sums accounts by category for single report (date range).
-    # @brief Calls addAccountTotalsToCategory for each date range.
-    # @param[in]    singleReport        **Object**, element of assetBalanceReport.
+    # @brief Each period gets its own row, even if periods share an end date (a month and the year it
+    #        ends). Each starts as a copy of the self.columns dictionary from createHeaders().
+    # @param[in]    singleReport        **Object**, one period of assetBalanceReport.
+    # @return                           **Dictonary** of category to total.
     def sumRowTotals(self, singleReport):
-        # Converted to stirng so it looks nice in the CSV.
-        dateIndex = singleReport['endDate'].strftime("%Y-%m-%d")
+        if (self.context.verbose):
+            print("      Totaling for {}".format(singleReport['endDate'].strftime("%Y-%m-%d")))
 
-        if (Options.verbose):
-            print("      Totaling for {}".format(dateIndex))
+        row = self.columns.copy()
 
         for account in singleReport['data']:
-            self.addAccountTotalsToCategory(dateIndex, singleReport['data'][account])
+            self.addAccountTotalsToCategory(row, singleReport['data'][account])
 
+        return row
 
-    ## Write date to CSV file.
-    def createFile(self):
-        if (Options.verbose):
-            print("      Making CSV.")
 
-        allRows = []
+    ## Opens the CSV file and writes the headers.
+    def open(self):
+        with Profile.stage('csvWrite'):
+            self.file   = open(self.outputFile, 'w', newline='', encoding='utf-8')
+            self.writer = csv.writer(self.file, lineterminator="\n")
 
-        # Format headers
-        headerRow = list(self.columns.keys()) # All the category dictionary have to be the same.
-        headerRow.insert(0, None)             # Insert blank in front (lines up with date).
-        allRows.append(headerRow)
+            # Format headers
+            headerRow = list(self.columns.keys()) # All the category dictionary have to be the same.
+            headerRow.insert(0, None)             # Insert blank in front (lines up with date).
+            self.writer.writerow(headerRow)
 
-        # Format rows
-        for each in self.rows:
+
+    ## Totals one period and writes it, after open().
+    # @param[in]    report          **Dictonary**, one period of the report.
+    def writeRow(self, report):
+        row = self.sumRowTotals(report)
+
+        with Profile.stage('csvWrite'):
             totalRow = []
-            totalRow.append(each) # Date is first.
-            for value in self.rows[each]:
-                formattedAmount = '${:,.2f}'.format(self.rows[each][value]) # Format to display like currency.
+            totalRow.append(report['endDate'].strftime("%Y-%m-%d")) # Date is first, as a string so it looks nice in the CSV.
+            for value in row:
+                formattedAmount = formatCurrency(row[value]) # Format to display like currency.
                 totalRow.append(formattedAmount)
-            allRows.append(totalRow)
+            self.writer.writerow(totalRow)
+
+
+    ## Closes the CSV file.
+    def close(self):
+        if (self.file is not None):
+            self.file.close()
+            self.file = None
+
+
+    ## Write date to CSV file.
+    # @brief Rows are written as each period is built, so only one is held at a time.
+    # @param[in]    reports         **Optional Iterable** of periods, defaults to building them from the
+    #                               report's parse data.
+    def createFile(self, reports = None):
+        if (self.context.verbose):
+            print("      Making CSV.")
+
+        self.open()
 
-        # Write it
-        with open(self.outputFile, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f, lineterminator="\n")
-            writer.writerows(allRows)
+        try:
+            for report in (reports if (reports is not None) else self.reportObj):
+                self.writeRow(report)
+        finally:
+            self.close()
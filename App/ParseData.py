@@ -1,57 +1,172 @@
 ##
 # @file
-# Parses data from GNUCash XML object to be passed to CreateCSV class.
+# Parses data from GNUCash book to be passed to CreateCSV class.
 #
 
-from datetime import datetime, date
+import multiprocessing
+import threading
 
-from App.Options import Options
+from collections        import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime           import datetime
+from fractions          import Fraction
+from itertools          import islice
+
+from App.Common.Profile    import Profile
+from App.Common.ReportNode import ReportAccount, ReportNode
+
+
+## Parse data and periods of reports being built by workers, by id of the parse data. Forked workers
+#  get a copy when they start so only the sums of each run have to be sent to them.
+shared = {}
+
+
+## Whether workers can be forked.
+# @brief Only when the OS has fork and this is the only thread. A fork copies locks held by other
+#        threads, which can then never be released in the worker, so with other threads running (like
+#        reports made from several threads at once) workers are threads or the work is done here.
+# @return                       **Boolean**.
+def canFork():
+    return ('fork' in multiprocessing.get_all_start_methods() and
+            threading.current_thread() is threading.main_thread() and threading.active_count() == 1)
+
+
+## Builds the report rows for some periods in a worker.
+# @param[in]    key             **Integer**, key of the report in shared.
+# @param[in]    indexes         **Range** of period indexes to build.
+# @param[in]    sums            **List** of sums for each period in indexes.
+# @return                       **Tuple** of a **List** of report rows, in the same order as indexes,
+#                               and what the worker profiled.
+def buildPeriods(key, indexes, sums):
+    parseData, periods = shared[key]
+    rows = [parseData.buildReport(periodSums, periods[i][1]) for i, periodSums in zip(indexes, sums)]
+    return rows, Profile.take()
 
 
 ## Parse Data
 # @brief Creates an object suitable for parsing data into a CSV. Balance uses
 # all data in the GNUCash file to the end date. Change is the same except it
-# only has data from the beginning to end date.
+# only has data from the beginning to end date. Iterating over it builds the
+# report a period at a time, so only the periods being written are held.
 class ParseData():
 
+    ## Most periods a worker builds at once, fewer runs are held waiting to be written.
+    periodsPerRun = 64
+
     ## Constructor - must be implemented in subclass.
     def __init__(self):
         raise NotImplementedError
 
 
-    ## Sums transactions value and quantity for given account id.
-    # Uses subset of transaction limited by end date.
-    # @param[in]    accountId       **String**, GUID of account to sum transactions for.
-    # @param[in]    transctions     **List**, Transasctions to get the sum of.
-    # @return                       **Tuple**; First element is sum of account's value, second for
-    #                               quantity. Both floats.
-    def sumTransactionsForAccount(self, accountId, transactions):
+    ## Turns the dates from the config file into periods, period rules are expanded here.
+    # @param[in]    dates           **PeriodSpec Object**, dates from the config file.
+    # @return                       **List** of (start, end) DateTime Object tuples.
+    @staticmethod
+    def getPeriods(dates):
+        return list(dates)
+
+
+    ## Builds the report a period at a time, in order.
+    # @return                       **Iterator** of **Dictonary** with the startDate, endDate and data
+    #                               of each period.
+    def __iter__(self):
+        for (startDate, endDate), row in zip(self.periods, self.buildReports(self.periods, self.timeSums(self.sums))):
+            yield {
+                'startDate' : startDate,
+                'endDate'   : endDate,
+                'data'      : row
+            }
+
+
+    ## Sums for each period, the time taken to work each one out is added to the periodSums stage.
+    # @param[in]    sums            **Iterable** of sums for each period from Book.periodSums().
+    # @return                       **Iterator** of sums for each period.
+    def timeSums(self, sums):
+        sums = iter(sums)
+
+        while (True):
+            with Profile.stage('periodSums'):
+                periodSums = next(sums, None)
+
+            if (periodSums is None):
+                return
+            yield periodSums
+
+
+    ## Builds the rows of each period.
+    # @brief Each period is built on its own. When the context's periodJobs is more than one the
+    #        periods are split into runs of periods, each built in a forked worker with its sums and
+    #        given back in order. Only a few runs more than there are workers are waiting at a time.
+    #        When workers can't be forked (see canFork()) they are built one after another.
+    # @param[in]    periods         **List** of (start, end) DateTime Object tuples.
+    # @param[in]    sums            **Iterable** of sums for each period from Book.periodSums().
+    # @return                       **Iterator** of report rows from buildReport(), one for each period.
+    def buildReports(self, periods, sums):
+        jobs = min(self.context.periodJobs, len(periods))
+
+        if (jobs <= 1 or not canFork()):
+            for (startDate, endDate), periodSums in zip(periods, sums):
+                yield self.buildReport(periodSums, endDate)
+            return
+
+        key         = id(self)
+        shared[key] = (self, periods)
+        sums        = iter(sums)
+
+        size    = min(-(-len(periods) // jobs), self.periodsPerRun)
+        indexes = [range(i, min(i + size, len(periods))) for i in range(0, len(periods), size)]
+        pending = deque()
+
+        try:
+            with ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context('fork')) as executor:
+                for run in indexes:
+                    pending.append(executor.submit(buildPeriods, key, run, list(islice(sums, len(run)))))
+                    if (len(pending) > jobs):
+                        yield from self.finishRun(pending.popleft())
+
+                while (pending):
+                    yield from self.finishRun(pending.popleft())
+        finally:
+            del shared[key]
+
 
-        # Return's to calculate.
-        value    = 0
-        quantity = 0
+    ## Rows of a run of periods built by a worker.
+    # @param[in]    future          **Future Object**, from buildPeriods().
+    # @return                       **List** of report rows.
+    def finishRun(self, future):
+        rows, profiled = future.result()
+        Profile.merge(profiled)
 
-        # Loop through global transaction subset.
-        for each in transactions:
+        # Each worker sent back its own copy of the account details.
+        for row in rows:
+            for node in row.values():
+                self.shareAccounts(node)
 
-            # Transasctions will have 2 or more splits.
-            for split in each.findall('.//trn:split', Options.namespaces):
+        return rows
 
-                account = split.find('./split:account', Options.namespaces).text
 
-                if account == accountId:
+    ## Account details of the report level accounts, the same in every period.
+    # @return                       **List** of **ReportAccount Objects**, in the order of the paths.
+    def getTopAccounts(self):
+        return [self.getReportAccount(path[-1]) for path in self.accountPaths.pathsByGUID]
 
-                    # Convert value from text, split fraction, and accumulate.
-                    splitValue = split.find('./split:value', Options.namespaces).text
-                    splitValue = splitValue.split('/') # split fraction
-                    value += (int(splitValue[0])) / (int(splitValue[1]))
 
-                    # Convert value from text, split fraction, and accumulate.
-                    splitQuatity = split.find('./split:quantity', Options.namespaces).text
-                    splitQuatity = splitQuatity.split('/')
-                    quantity += (int(splitQuatity[0])) / (int(splitQuatity[1]))
+    ## GUIDs of every account in the report.
+    # @return                       **List** of GUIDs of the report level accounts and all accounts
+    #                               below them.
+    def getAccountIds(self):
+        return self.accountPaths.getAccountIds()
 
-        return value, quantity
+
+    ## Sums transactions value and quantity for given account id.
+    # @param[in]    accountId       **String**, GUID of account to sum transactions for.
+    # @param[in]    sums            **Dictonary**, sums for one period from Book.periodSums().
+    # @return                       **Tuple**; First element is sum of account's value, second for
+    #                               quantity. Both integers in units of 1 / Book.scale.
+    def sumTransactionsForAccount(self, accountId, sums):
+
+        # Sums are already done for every account, accounts without splits won't be in them.
+        return sums.get(accountId, (0, 0))
 
 
     ## Find commodity id for an account.
@@ -71,10 +186,7 @@ class ParseData():
         #     <act:parent type="guid">3af4bc34b6af4dda845cb156340c3b53</act:parent>
         # </gnc:account>
 
-        accountEl   = Options.GNUCashXML.find(".//gnc:account[act:id='{}']".format(accountId), Options.namespaces)
-        commodityId = accountEl.find('./act:commodity/cmdty:id', Options.namespaces)
-
-        return commodityId.text
+        return self.context.book.registry.account(accountId).commodityId
 
 
     ## Find commodity's namespace and user defined symbol (what is displayed instead of $).
@@ -97,15 +209,11 @@ class ParseData():
         namespace = None
         symbol    = None
 
-        commodityEl     = Options.GNUCashXML.find(".//gnc:commodity[cmdty:id='{}']".format(commodityId), Options.namespaces)
-        commoditySlotsEl = commodityEl.find('./cmdty:slots/slot', Options.namespaces)
-
-        if commodityEl:
-            namespace = commodityEl.find('./cmdty:space', Options.namespaces).text
+        commodity = self.context.book.registry.commodity(commodityId)
 
-        # Not all commodities have slots
-        if commoditySlotsEl:
-            symbol = commoditySlotsEl.find('./slot:value', Options.namespaces).text
+        if (commodity is not None):
+            namespace = commodity.space
+            symbol    = commodity.symbol    # Not all commodities have slots
 
         return namespace, symbol
 
@@ -114,130 +222,109 @@ class ParseData():
     # @param[in]    commodityId     **String**, GUID of commodity.
     # @param[in]    endDate         **DateTime Object**, get the commodity price closest to this
     #                               date without going past it.
-    # @return                       **Tuple** First element is commodity value as a float. Second is
+    # @return                       **Tuple** First element is commodity value as a Fraction. Second is
     #                               the date of the commodity value as a datetime object.
     def getCommodityValue(self, commodityId, endDate):
 
         # Returns to calculate.
-        commodityValue     = 0.0
+        commodityValue     = Fraction(0)
         commodityValueDate = datetime.min
 
         # Don't bother if it's USD (an issue for GNUCash files setup to use otheer currencies).
         if (commodityId == 'USD'):
-            commodityValue = 1.0
+            commodityValue = Fraction(1)
             return commodityValue, commodityValueDate
 
-        for commodity in Options.GNUCashXML.findall(".//price:commodity[cmdty:id='{}']...".format(commodityId), Options.namespaces):
+        # Prices are sorted by date, finds the closest one without going past end date.
+        commodityValue, commodityValueDate = self.context.book.priceHistory.latest(commodityId, endDate)
 
-            dateString = commodity.find("./price:time/ts:date", Options.namespaces).text
-            dateObject = datetime.strptime(dateString.split()[0], "%Y-%m-%d")
+        return commodityValue, commodityValueDate
 
-            # limit by dates
-            if ((dateObject <= endDate) and (dateObject >= commodityValueDate)):
-                commodityValue     = commodity.find("./price:value", Options.namespaces).text
-                commodityValueDate = dateObject
 
-        if (isinstance(commodityValue, str)):
-            commodityValue = commodityValue.split('/')
-            commodityValue = int(commodityValue[0]) / int(commodityValue[1])
+    ## Account details for a report, made once and shared by every period.
+    # @param[in]    accountId       **String**, GUID of account.
+    # @param[in]    level           **Optional Integer**, depth of the account relative to the top
+    #                               account it is reported under.
+    # @return                       **ReportAccount Object**, with the same for its children.
+    def getReportAccount(self, accountId, level = 0):
+        key = (accountId, level)
+
+        if (key not in self.reportAccounts):
+            account     = self.context.book.registry.account(accountId)
+            commodityId = self.getCommodityId(accountId)
+            commodityNamespace, commoditySymbol = self.getCommodityData(commodityId)
+
+            children = tuple(self.getReportAccount(child.id, level + 1)
+                             for child in self.context.book.registry.children(accountId))
+
+            self.reportAccounts[key] = ReportAccount(accountId, account.name, level, commodityId,
+                                                     commodityNamespace, commoditySymbol, children)
+
+        return self.reportAccounts[key]
 
-        return commodityValue, commodityValueDate
+
+    ## Points nodes built in another process back at this process's account details.
+    # @param[in]    node            **ReportNode Object**, top node of a tree to fix.
+    def shareAccounts(self, node):
+        node.account = self.getReportAccount(node.account.id, node.account.level)
+
+        for child in node.children:
+            self.shareAccounts(child)
 
 
     ## Build the intial report data object.
     # @brief Populates the necessary elements of the top level results, recursively calls itself for
     #        children. Calculates everything except values, this is done in calculateTotals().
-    # @param[in]    accountId       **String**, GUID of account to sum transactions for.
-    # @param[in]    transctions     **List**, Transasctions for a set of dates in the report.
+    # @param[in]    account         **ReportAccount Object**, account to build a node for.
+    # @param[in]    sums            **Dictonary**, sums for a set of dates in the report from Book.periodSums().
     # @param[in]    endDate         **DateTime Object**, used to getCommodityValue().
-    # @param[in]    level           **Optional Integer**, current depth account is at realative to
-    #                               accountId given.
-    # @return                       **Dictonary**, report data with initial account information.
-    def buildReportData(self, accountId, transctions, endDate, level = 0):
-
-        accountEl = Options.GNUCashXML.find(".//gnc:account[act:id='{}']".format(accountId), Options.namespaces)
-        children = {}
+    # @return                       **ReportNode Object**, report data with initial account information.
+    def buildReportData(self, account, sums, endDate):
 
         # Recursive call on children for this account.
-        for child in Options.GNUCashXML.findall(".//gnc:account[act:parent='{}']".format(accountId), Options.namespaces):
-            childId = child.find('./act:id', Options.namespaces).text
-            children[childId] = self.buildReportData(childId, transctions, endDate, level + 1)
-
-        # Setup elements for this report data object.
-        name                                = accountEl.find('./act:name', Options.namespaces).text
-        value, quantity                     = self.sumTransactionsForAccount(accountId, transctions) # value and quantity from gnucash xml
-        commodityId                         = self.getCommodityId(accountId)
-        commodityNamespace, commoditySymbol = self.getCommodityData(commodityId)
-        commodityValue, commodityValueDate  = self.getCommodityValue(commodityId, endDate)
-
-        # Commodity information object.
-        commodity = {'id'        : commodityId,         # What is this account made of?
-                     'namespace' : commodityNamespace,  # Category for this commodity.
-                     'symbol'    : commoditySymbol,     # Display symbol of commodity.
-                     'value'     : commodityValue,      # Commodity value at commodityValueDate.
-                     'date'      : commodityValueDate}  # Date used to determine commodity Value
-
-        # Add new object for each account in report.
-        return {'name'      : name,                 # Human readable name.
-                'level'     : level,                # Depth this account is relative to top.
-                'children'  : children,             # Sub-Object for children.
-                'commodity' : commodity,            # Object describing this account's commodity.
-                'quantity'  : quantity,             # How many commodities in account (1:1 if USD).
-                'total'     : quantity * commodityValue,
-                'totalAccount' : 0.0}               # This account value and its child values
+        children = tuple(self.buildReportData(child, sums, endDate) for child in account.children)
+
+        value, quantity                    = self.sumTransactionsForAccount(account.id, sums)  # value and quantity from gnucash book
+        quantity                           = Fraction(quantity, self.context.book.scale)
+        commodityValue, commodityValueDate = self.getCommodityValue(account.commodityId, endDate)
+
+        return ReportNode(account, children, quantity, quantity * commodityValue, commodityValue, commodityValueDate)
 
 
     ## Total up sums of child accounts.
     # @brief Recursivly get sums from children accounts, when account has no child just copy sum to
     #        total.
-    # @param[in]    reportData      **Dictonary** report data for children accounts.
-    def calculateTotals(self, reportData):
+    # @param[in]    node            **ReportNode Object**, report data for an account.
+    def calculateTotals(self, node):
 
-        # Total up sums of children if it has children.
-        if (reportData['children']):
+        # Start with this accounts sum.
+        total = node.total
 
-            # Start with this accounts sum.
-            tempTotal = reportData['total']
+        # If a child has children of its own, do this at that level first.
+        for child in node.children:
+            self.calculateTotals(child)
+            total += child.totalAccount
 
-            # Get total from children.
-            for child in reportData['children']:
-
-                # If this child has children of its own, do this at that level first.
-                self.calculateTotals(reportData['children'][child])
-
-                # Add this child's tottal to running total.
-                tempTotal += reportData['children'][child]['totalAccount']
-
-            # After getting all the childrens totals assign this value back to this total.
-            reportData['totalAccount'] = tempTotal
-
-        # This has no children, just assign value to totalAccountValue.
-        else:
-            reportData['totalAccount'] = reportData['total']
+        node.totalAccount = total
 
 
     ## Build out the report object.
-    # @param[in]    transctions     **List**, Transasctions for a set of dates in the report.
+    # @param[in]    sums            **Dictonary**, sums for a set of dates in the report from Book.periodSums().
     # @param[in]    endDate         **DateTime Object**, used to getCommodityValue().
     # @return                       **Dictonary** data for report.
-    def buildReport(self, transctions, endDate):
+    def buildReport(self, sums, endDate):
 
         row = {}
 
         # Create reports for all accounts passed in, add them to Results.
-        for account in self.accountPaths.pathsByGUID:
-            reportLevelGUID      = account[-1]
-            row[reportLevelGUID] = self.buildReportData(reportLevelGUID, transctions, endDate)
+        with Profile.stage('treeBuild'):
+            for account in self.accountPaths.pathsByGUID:
+                reportLevelGUID      = account[-1]
+                row[reportLevelGUID] = self.buildReportData(self.getReportAccount(reportLevelGUID), sums, endDate)
 
         # Calculate the totals for all accounts.
-        for each in row:
-
-            # Children
-            if row[each]['children']:
+        with Profile.stage('totals'):
+            for each in row:
                 self.calculateTotals(row[each])
 
-            # No children, just assign totalAccountValue to value.
-            else:
-                row[each]['totalAccount'] = row[each]['total']
-
         return row
@@ -3,38 +3,39 @@
 # Holds Parse Data Balances class
 #
 
-from datetime import datetime, date
-
-from App.Options                  import Options
 from App.ParseData                import ParseData
 from App.Common.AccountPaths      import AccountPaths
-from App.Common.LimitTransactions import LimitTransactions
 
 
 ## Parse Data - Balances
-# @brief Turns GNUCashXML and options object into a data structure.
+# @brief Turns GNUCash book and options object into a data structure.
 class ParseData_Balance(ParseData):
 
     ## Constructor
-    def __init__(self, accounts):
-
-        if (Options.verbose):
+    # @param[in]    context         **ReportContext Object**, book and settings.
+    # @param[in]    accounts        **List** of account path strings to report on, or an
+    #                               **AccountPaths Object** already made from them.
+    # @param[in]    sums            **Optional Iterable** of sums for each period, from a ReportPlan.
+    #                               If not given they are worked out for just this report.
+    # @param[in]    periods         **Optional List** of (start, end) DateTime Object tuples, defaults
+    #                               to the config's dates.
+    def __init__(self, context, accounts, sums = None, periods = None):
+
+        self.context = context
+
+        if (context.verbose):
             print("    Parsing Data")
 
         # Get a list of accounts to make report for.
-        self.accountPaths = AccountPaths(accounts)
-
-        # Build report object. List will be ordered by sets of start and end dates defined in the
-        # config file.
-        self.report = []
-
-        for i in range(0, len(Options.accountBalances.Dates), 2):
-            startDate   = datetime.strptime(Options.accountBalances.Dates[i], "%Y-%m-%d")
-            endDate     = datetime.strptime(Options.accountBalances.Dates[i+1], "%Y-%m-%d")
-            transctions = LimitTransactions(endDate)
-
-            self.report.append({
-                'startDate' : startDate,
-                'endDate'   : endDate,
-                'data'      : self.buildReport(transctions.get(), endDate)
-            })
+        self.accountPaths = accounts if (isinstance(accounts, AccountPaths)) else AccountPaths(context, accounts)
+
+        self.reportAccounts = {}    # (GUID, level) to ReportAccount, shared by every period.
+
+        if (periods is None):
+            periods = self.getPeriods(context.accountBalances.Dates)
+        if (sums is None):
+            sums = context.book.periodSums(periods, self.getAccountIds(), engine = context.engine)
+
+        # Periods, and their sums, are built when iterated over.
+        self.periods = periods
+        self.sums    = sums
@@ -3,76 +3,65 @@
 # Parse Data Account Changes class
 #
 
-from datetime import datetime, date
+from fractions import Fraction
 
-from App.Options                  import Options
 from App.ParseData                import ParseData
 from App.Common.AccountPaths      import AccountPaths
-from App.Common.LimitTransactions import LimitTransactions
+from App.Common.ReportNode        import ReportNode
 
 
 ## Parse Data - Account Changes
-# @brief Turns GNUCashXML and options object into a data structure. The primary
+# @brief Turns GNUCash book and options object into a data structure. The primary
 # difference between this and Balances structure is this one is limited to a
 # beginning date.
 class ParseData_Changes(ParseData):
 
     ## Constructor
-    def __init__(self):
-
-        if (Options.verbose):
+    # @param[in]    context         **ReportContext Object**, book and settings.
+    # @param[in]    sums            **Optional Iterable** of sums for each period, from a ReportPlan.
+    #                               If not given they are worked out for just this report.
+    # @param[in]    accounts        **Optional List** of account path strings, defaults to the config's,
+    #                               or an **AccountPaths Object** already made from them.
+    # @param[in]    periods         **Optional List** of (start, end) DateTime Object tuples, defaults
+    #                               to the config's dates.
+    def __init__(self, context, sums = None, accounts = None, periods = None):
+
+        self.context = context
+
+        if (context.verbose):
             print("    Parsing Data")
 
         # Get a list of accounts to make report for.
-        self.accountPaths = AccountPaths(Options.accountChanges.Accounts)
+        if (accounts is None):
+            accounts = context.accountChanges.Accounts
+        self.accountPaths = accounts if (isinstance(accounts, AccountPaths)) else AccountPaths(context, accounts)
 
-        # Build report object. List will be ordered by sets of start and end dates defined in the
-        # config file.
-        self.report = []
+        self.reportAccounts = {}    # (GUID, level) to ReportAccount, shared by every period.
 
-        for i in range(0, len(Options.accountChanges.Dates), 2):
-            startDate   = datetime.strptime(Options.accountChanges.Dates[i], "%Y-%m-%d")
-            endDate     = datetime.strptime(Options.accountChanges.Dates[i+1], "%Y-%m-%d")
-            transctions = LimitTransactions(endDate, startDate)
+        if (periods is None):
+            periods = self.getPeriods(context.accountChanges.Dates)
+        if (sums is None):
+            sums = context.book.periodSums(periods, self.getAccountIds(), changes = True, engine = context.engine)
 
-            self.report.append({
-                'startDate' : startDate,
-                'endDate'   : endDate,
-                'data'      : self.buildReport(transctions.get(), endDate)
-            })
+        # Periods, and their sums, are built when iterated over.
+        self.periods = periods
+        self.sums    = sums
 
 
     ## Build the intial report data object.
     # @brief Populates the necessary elements of the top level results, recursively calls itself for
     #        children. Calculates everything except values, this is done in calculateTotals().
-    # @param[in]    accountId       **String**, GUID of account to sum transactions for.
-    # @param[in]    transctions     **List**, Transasctions for a set of dates in the report.
-    # @param[in]    endDate         **DateTime Object**, used to getCommodityValue().
-    # @param[in]    level           **Optional Integer**, current depth account is at realative to
-    #                               accountId given.
-    # @return                       **Dictonary**, report data with initial account information.
-    def buildReportData(self, accountId, transctions, endDate, level = 0):
-
-        accountEl = Options.GNUCashXML.find(".//gnc:account[act:id='{}']".format(accountId), Options.namespaces)
-        children = {}
+    # @param[in]    account         **ReportAccount Object**, account to build a node for.
+    # @param[in]    sums            **Dictonary**, sums for a set of dates in the report from Book.periodSums().
+    # @param[in]    endDate         **DateTime Object**, not used, changes don't need commodity values.
+    # @return                       **ReportNode Object**, report data with initial account information.
+    def buildReportData(self, account, sums, endDate):
 
         # Recursive call on children for this account.
-        for child in Options.GNUCashXML.findall(".//gnc:account[act:parent='{}']".format(accountId), Options.namespaces):
-            childId = child.find('./act:id', Options.namespaces).text
-            children[childId] = self.buildReportData(childId, transctions, endDate, level + 1)
+        children = tuple(self.buildReportData(child, sums, endDate) for child in account.children)
 
-        # Setup elements for this report data object.
-        name            = accountEl.find('./act:name', Options.namespaces).text
-        value, quantity = self.sumTransactionsForAccount(accountId, transctions) # value and quantity from gnucash xml
+        value, quantity = self.sumTransactionsForAccount(account.id, sums) # value and quantity from gnucash book
 
-        # Don't care about commondity info for Asset Investments, we want what was actually paid
+        # Don't care about commondity value for Asset Investments, we want what was actually paid
         # during the time period.
-
-        # Add new object for each account in report.
-        return {'name'      : name,                 # Human readable name.
-                'level'     : level,                # Depth this account is relative to top.
-                'children'  : children,             # Sub-Object for children.
-                'commodity' : None,
-                'quantity'  : quantity,             # How many commodities in account (1:1 if USD).
-                'total'     : value,
-                'totalAccount' : 0.0}               # This account value and its child values
+        return ReportNode(account, children, Fraction(quantity, self.context.book.scale), Fraction(value, self.context.book.scale))
@@ -0,0 +1,235 @@
+##
+# @file
+# Holds QueryService and QueryHandler classes.
+#
+
+import json
+import logging
+
+from datetime     import datetime
+from http.server  import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from App.ParseData_Balances   import ParseData_Balance
+from App.ParseData_Changes    import ParseData_Changes
+from App.Common.AccountPaths  import AccountPaths
+from App.Common.PeriodSpec    import PeriodSpec
+
+
+## Requests are logged here, shown by serve() when verbose.
+logger = logging.getLogger(__name__)
+
+
+## Query Service
+# @brief Answers questions about a book without a config file or CSV, for dashboards.
+#        Balances, changes and asset categories are built by the same parse data classes as the
+#        reports, so they come out the same. Sums come from the book's ledger, two binary searches per
+#        account and period, so a query doesn't walk the transactions.
+#
+#        GET /balance?account=Assets:Investments&date=2024-03-15
+#        GET /change?account=Income&dates=monthly 2023-01..2023-12
+#        GET /category?account=Assets&date=2024-03-15
+#
+#        account can be given more than once, and can be a selector like Expenses:*:Travel or
+#        re:^Assets:Brokerage (see AccountRegistry.select()). Dates are date (one end date), start and end (one
+#        period), or dates (pairs and period rules, like the config file). depth is how many levels
+#        of child accounts to include, 0 if not given.
+class QueryService():
+
+    ## Query names to the measure they are built from.
+    queries = {'balance'  : 'balance',
+               'change'   : 'change',
+               'category' : 'balance'}
+
+    ## Constructor
+    # @brief Nothing is printed while answering, unknown accounts and bad dates come back as errors.
+    # @param[in]    context         **ReportContext Object**, book to answer questions about.
+    def __init__(self, context):
+        self.context = context.quiet()
+
+
+    ## Answers a query.
+    # @param[in]    query           **String**, balance, change, or category.
+    # @param[in]    params          **Dictonary** of parameter name to List of Strings, from parse_qs().
+    # @return                       **Dictonary** ready to be sent as JSON.
+    # @exception    ValueError      If the query or its parameters aren't right.
+    def answer(self, query, params):
+        if (query not in self.queries):
+            raise ValueError("Unknown query '{}', use {}.".format(query, ', '.join(self.queries)))
+
+        accounts = params.get('account', [])
+        if (not accounts):
+            raise ValueError("At least one account is needed.")
+
+        periods = self.getPeriods(params)
+        depth   = int(params.get('depth', ['0'])[0])
+        changes = (self.queries[query] == 'change')
+
+        accountPaths = AccountPaths(self.context, accounts)
+        if (not accountPaths.verified):
+            raise ValueError("Unknown account path {}.".format(', '.join(accountPaths.unmatched)))
+
+        sums = self.getSums(periods, accountPaths.getAccountIds(), changes)
+
+        if (changes):
+            parseData = ParseData_Changes(self.context, sums, accountPaths, periods)
+        else:
+            parseData = ParseData_Balance(self.context, accountPaths, sums, periods)
+
+        results = []
+        for report in parseData:
+            result = {'start' : report['startDate'].strftime("%Y-%m-%d") if (changes) else None,
+                      'end'   : report['endDate'].strftime("%Y-%m-%d")}
+
+            if (query == 'category'):
+                categories = {}
+                for node in report['data'].values():
+                    self.addCategories(node, categories)
+                result['categories'] = {category : self.toNumber(total) for category, total in categories.items()}
+            else:
+                result['accounts'] = [self.toJSON(report['data'][guids[-1]], path, depth, changes)
+                                      for path, guids in zip(accountPaths.paths, accountPaths.pathsByGUID)]
+
+            results.append(result)
+
+        return {'query' : query, 'periods' : results}
+
+
+    ## Reads the periods asked for.
+    # @param[in]    params          **Dictonary** of parameter name to List of Strings.
+    # @return                       **List** of (start, end) DateTime Object tuples.
+    def getPeriods(self, params):
+        try:
+            if ('dates' in params):
+                periods = list(PeriodSpec(params['dates'][0]))
+            elif ('date' in params):
+                date    = datetime.strptime(params['date'][0], "%Y-%m-%d")
+                periods = [(date, date)]
+            elif ('start' in params and 'end' in params):
+                periods = [(datetime.strptime(params['start'][0], "%Y-%m-%d"),
+                            datetime.strptime(params['end'][0], "%Y-%m-%d"))]
+            else:
+                periods = []
+        except ValueError as err:
+            raise ValueError("Unexpected dates, {}".format(err))
+
+        if (not periods):
+            raise ValueError("Dates are needed, as date, start and end, or dates.")
+
+        return periods
+
+
+    ## Sums for each period from the book's ledger, in the form Book.periodSums() gives them.
+    # @param[in]    periods         **List** of (start, end) DateTime Object tuples.
+    # @param[in]    accountIds      **List** of account GUIDs to sum.
+    # @param[in]    changes         **Boolean**, sums between dates instead of balances.
+    # @return                       **List** of **Dictonary** of account GUID to (value, quantity).
+    def getSums(self, periods, accountIds, changes):
+        ledger = self.context.book.ledger
+
+        return [{accountId : ledger.sum(accountId, endDate, startDate if (changes) else None)
+                 for accountId in accountIds}
+                for startDate, endDate in periods]
+
+
+    ## Adds the value of an account and its children to their asset categories, the same way the
+    #  Assets by Category report does.
+    # @param[in]    node            **ReportNode Object**, account to add.
+    # @param[in]    categories      **Dictonary** of category to total, added to.
+    def addCategories(self, node, categories):
+        category             = node.account.commodityNamespace
+        categories[category] = categories.get(category, 0) + node.total
+
+        for child in node.children:
+            self.addCategories(child, categories)
+
+
+    ## Turns an account's node into something that can be sent as JSON.
+    # @param[in]    node            **ReportNode Object**, account to send.
+    # @param[in]    path            **String**, account path of the node.
+    # @param[in]    depth           **Integer**, levels of children to include.
+    # @param[in]    changes         **Boolean**, node is a change so it has no price.
+    # @return                       **Dictonary**.
+    def toJSON(self, node, path, depth, changes):
+        result = {'account'   : path,
+                  'commodity' : node.account.commodityId,
+                  'quantity'  : float(node.quantity),
+                  'value'     : self.toNumber(node.total),
+                  'total'     : self.toNumber(node.totalAccount)}
+
+        if (not changes):
+            result['price']     = float(node.commodityValue)
+            result['priceDate'] = (node.commodityDate.strftime("%Y-%m-%d")
+                                   if (node.commodityDate != datetime.min) else None)
+
+        if (depth > 0):
+            result['children'] = [self.toJSON(child, path + ':' + child.name, depth - 1, changes)
+                                  for child in node.children]
+
+        return result
+
+
+    ## Rounds an amount to cents, the same way the CSVs do.
+    # @param[in]    amount          **Fraction**, exact amount.
+    # @return                       **Float**.
+    @staticmethod
+    def toNumber(amount):
+        return float(round(amount, 2))
+
+
+## Query Handler
+# @brief Sends each GET request to the server's QueryService, answers are JSON.
+class QueryHandler(BaseHTTPRequestHandler):
+
+    ## Answers a GET request.
+    def do_GET(self):
+        url = urlsplit(self.path)
+
+        try:
+            status = 200
+            body   = self.server.service.answer(url.path.strip('/'), parse_qs(url.query))
+        except ValueError as err:
+            status = 400
+            body   = {'error' : str(err)}
+
+        content = json.dumps(body).encode('utf-8')
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+    ## Logs requests to the module's logger instead of printing them.
+    def log_message(self, format, *args):
+        logger.info("%s - %s", self.address_string(), format % args)
+
+
+## Makes a server answering queries about a book, it doesn't start answering until serve_forever().
+# @param[in]    context         **ReportContext Object**, book to answer questions about.
+# @param[in]    port            **Integer**, port to listen on, 0 for any free port.
+# @param[in]    host            **Optional String**, address to listen on, only this computer by default.
+# @return                       **ThreadingHTTPServer Object**, port it got is in server_address.
+def makeServer(context, port, host = '127.0.0.1'):
+    server         = ThreadingHTTPServer((host, port), QueryHandler)
+    server.service = QueryService(context)
+
+    return server
+
+
+## Starts a server answering queries about a book, runs until interrupted.
+# @brief Requests are logged to stderr when verbose.
+# @param[in]    context         **ReportContext Object**, book to answer questions about.
+# @param[in]    port            **Integer**, port to listen on.
+# @param[in]    host            **Optional String**, address to listen on, only this computer by default.
+def serve(context, port, host = '127.0.0.1'):
+    server = makeServer(context, port, host)
+
+    if (context.verbose):
+        logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    print("Answering queries on http://{}:{}/, Ctrl+C to stop.".format(host, server.server_address[1]))
+
+    with server:
+        server.serve_forever()
@@ -0,0 +1,150 @@
+##
+# @file
+# Holds ReportContext class.
+#
+
+import copy
+
+from pathlib import Path
+from types   import SimpleNamespace
+
+from App.Common.AccountRegistry import AccountRegistry
+from App.Common.PeriodSpec      import PeriodSpec
+from App.Common.SplitMatrix     import SplitMatrix
+
+
+## Open the files to write teh CSVs to.
+# @brief Create path if it doesn't exist. These should get closed in the CreateCSV* class.
+# @param[in]    filePath    String for file path.
+# @return                   Object, file to use.
+def openOutputFile(filePath):
+    filePathList = filePath.split('/')                      # Convert to list, split on path delimeter.
+    del filePathList[-1]                                    # Last element will be filename.
+    filePathString = '/'.join(filePathList)                 # Create string of path without file.
+    Path(filePathString).mkdir(parents=True, exist_ok=True) # Create directories.
+
+    return filePath
+
+
+## Report Context
+# @brief Everything one run of reports needs: the book, how to sum it, and the settings of each report.
+#        It is passed to each part of the pipeline instead of being kept in one place for the whole
+#        program, so different books and configs can be reported on at the same time in one process.
+class ReportContext():
+
+    ## Constructor
+    # @param[in]    book                **Book Object**, book to report on.
+    # @param[in]    accountBalances     **Object**, settings of the Account Balances report.
+    # @param[in]    accountChanges      **Object**, settings of the Account Changes report.
+    # @param[in]    assetsByCategory    **Object**, settings of the Assets by Category report.
+    # @param[in]    incomeStatement     **Object**, settings of the Income Statement report.
+    # @param[in]    engine              **Optional String**, how report periods are summed, python or numpy.
+    # @param[in]    verbose             **Optional Boolean**, show some output while running.
+    # @param[in]    periodJobs          **Optional Integer**, processes to build each report's periods in.
+    # @param[in]    input               **Optional String**, GNUCash file the book was read from.
+    # @param[in]    config              **Optional Object**, config file the settings came from.
+    def __init__(self, book, accountBalances, accountChanges, assetsByCategory, incomeStatement,
+                 engine = 'python', verbose = False, periodJobs = 1, input = None, config = None):
+        self.book             = book
+        self.accountBalances  = accountBalances
+        self.accountChanges   = accountChanges
+        self.assetsByCategory = assetsByCategory
+        self.incomeStatement  = incomeStatement
+        self.engine           = engine
+        self.verbose          = verbose
+        self.periodJobs       = periodJobs
+        self.input            = input
+        self.config           = config
+
+
+    ## Same context without any output, for work done over and over like answering queries.
+    # @return                       **ReportContext Object**, sharing this one's book and settings.
+    def quiet(self):
+        context         = copy.copy(self)
+        context.verbose = False
+        return context
+
+
+    ## Settings of one report.
+    # @param[in]    reportType      **String**, human readable name of the report.
+    # @param[in]    runReport       **Boolean**, make this report.
+    # @param[in]    outputFile      **String**, CSV to write, None if not run.
+    # @param[in]    accounts        **List** of account path strings.
+    # @param[in]    depth           **List** of Integers, depth shown for each account path.
+    # @param[in]    dates           **PeriodSpec Object**, periods of the report.
+    # @return                       **Object** with the settings.
+    @staticmethod
+    def report(reportType, runReport, outputFile, accounts, depth, dates):
+        return SimpleNamespace(ReportType = reportType,
+                               RunReport  = runReport,
+                               OutputFile = outputFile,
+                               Accounts   = accounts,
+                               Depth      = depth,
+                               Dates      = dates)
+
+
+    ## Makes a context from a config file.
+    # @brief Folders for the output files are made if they don't exist.
+    # @param[in]    config          **ConfigParser Object**, config file read.
+    # @param[in]    book            **Book Object**, book to report on, None to set later.
+    # @param[in]    verbose         **Optional Boolean**, show output even if the config file doesn't.
+    # @param[in]    periodJobs      **Optional Integer**, processes to build each report's periods in.
+    # @param[in]    input           **Optional String**, GNUCash file used instead of the config's.
+    # @return                       **ReportContext Object**.
+    # @exception    ValueError      If something in the config file isn't right.
+    @staticmethod
+    def fromConfig(config, book, verbose = False, periodJobs = 1, input = None):
+
+        # GNUCash file, XML (compressed or not) or SQLite
+        input = input or config['GENERAL']['input']
+
+        # Show output in terminal?
+        verbose = verbose or config['GENERAL'].getboolean('verbose')
+
+        # How to sum report periods, numpy falls back to python if NumPy isn't installed
+        engine = config['GENERAL'].get('engine', 'python').strip().lower()
+        if (engine not in ('python', 'numpy')):
+            raise ValueError("Unexpected engine in config file, it should be python or numpy.")
+        if (engine == 'numpy' and verbose and not SplitMatrix.available()):
+            print("NumPy is not installed, using the python engine.")
+
+        # Which reports to run
+        runAccountBalances  = config['GENERAL'].getboolean('accountBalances')
+        runAccountChanges   = config['GENERAL'].getboolean('accountChanges')
+        runAssetsByCategory = config['GENERAL'].getboolean('assetsByCategory')
+        runIncomeStatement  = config['GENERAL'].getboolean('incomeStatment')
+
+        # Where to save report CSVs
+        accountBalancesOutput  = openOutputFile(config['GENERAL']['accountBalancesOutput'])  if (runAccountBalances)  else None
+        accountChangesOutput   = openOutputFile(config['GENERAL']['accountChangesOutput'])   if (runAccountChanges)   else None
+        assetsByCategoryOutput = openOutputFile(config['GENERAL']['assetsByCategoryOutput']) if (runAssetsByCategory) else None
+        incomeStatementOutput  = openOutputFile(config['GENERAL']['incomeStatmentOutput'])   if (runIncomeStatement)  else None
+
+        # Report dates, in pairs or period rules like "monthly 2020-01..2020-12"
+        reportDates = PeriodSpec(config['GENERAL']['dates'])
+
+        # Balance report account paths
+        assetAccounts = list(filter(None, map(lambda account: account.strip(), config['BALANCE REPORTS']['accounts'].split(',')[::2])))
+        assetDepths   = list(filter(None, map(lambda account: account.strip(), config['BALANCE REPORTS']['accounts'].split(',')[1::2])))
+        assetDepths   = [int(numeric_string) for numeric_string in assetDepths]
+
+        # Income report account paths
+        incomeAccounts   = list(filter(None, map(lambda account: account.strip(), config['INCOME REPORTS']['accounts'].split(',')[::2])))
+        incomeDepth      = list(filter(None, map(lambda account: account.strip(), config['INCOME REPORTS']['accounts'].split(',')[1::2])))
+        incomeDepth      = [int(numeric_string) for numeric_string in incomeDepth]
+
+        # Account selectors are found in the book when reports are planned, bad expressions are caught now
+        for account in assetAccounts + incomeAccounts:
+            AccountRegistry.pattern(account)
+
+        report = ReportContext.report
+
+        return ReportContext(book,
+                             accountBalances  = report('Account Balances',   runAccountBalances,  accountBalancesOutput,  assetAccounts,  assetDepths, reportDates),
+                             accountChanges   = report('Account Changes',    runAccountChanges,   accountChangesOutput,   assetAccounts,  assetDepths, reportDates),
+                             assetsByCategory = report('Assets by Category', runAssetsByCategory, assetsByCategoryOutput, assetAccounts,  assetDepths, reportDates),
+                             incomeStatement  = report('Income Statement',   runIncomeStatement,  incomeStatementOutput,  incomeAccounts, incomeDepth, reportDates),
+                             engine           = engine,
+                             verbose          = verbose,
+                             periodJobs       = periodJobs,
+                             input            = input)
@@ -0,0 +1,254 @@
+##
+# @file
+# Holds ReportPlan class.
+#
+
+import multiprocessing
+import threading
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from types              import SimpleNamespace
+
+from App.ParseData                import ParseData, canFork
+from App.ParseData_Balances       import ParseData_Balance
+from App.ParseData_Changes        import ParseData_Changes
+from App.CreateCSV                import CreateCSV
+from App.CreateCSV_AssetCategory  import CreateCSV_AssetCategory # This report type is unique.
+from App.Common.AccountPaths      import AccountPaths
+from App.Common.Profile           import Profile
+
+
+## Plans being run by workers, by id of the plan. Forked workers get a copy when they start so nothing
+#  has to be sent to them.
+plans = {}
+
+
+## Creates the reports that share one parse data object, in a worker.
+# @param[in]    key             **Integer**, key of the plan in plans.
+# @param[in]    reportNames     **List** of report names.
+# @return                       **Dictonary**, what was profiled while running them.
+def runReportGroup(key, reportNames):
+    plans[key].runReports(reportNames)
+
+    return Profile.take()
+
+
+## Report Plan
+# @brief Works out what every enabled report needs before any of them run, so work they share is only
+#        done once. Reports on the same accounts and measure (balances or changes) share one parse data
+#        object, and its periods are summed once for all of them. Sums come from one Book.periodSums()
+#        call for each parse data, as balances or as changes, and are worked out a period at a time as
+#        the reports are written so they are never all held at once.
+class ReportPlan():
+
+    ## Reports in the order they are run, with the measure each one is built from.
+    reports = (('accountBalances',  'balance'),
+               ('accountChanges',   'change'),
+               ('assetsByCategory', 'balance'),
+               ('incomeStatement',  'balance'))
+
+    ## Constructor
+    # @param[in]    context         **ReportContext Object**, book and settings of the reports.
+    # @param[in]    reportNames     **Optional Iterable** of report names to plan, defaults to every
+    #                               report turned on.
+    def __init__(self, context, reportNames = None):
+
+        self.context    = context
+        self.trees      = {}    # (measure, account paths) to what's needed to build its parse data.
+        self.treeKeys   = {}    # Report name to key of the parse data it uses.
+
+        for reportName, measure in self.reports:
+            report = getattr(context, reportName)
+            if (not report.RunReport or (reportNames is not None and reportName not in reportNames)):
+                continue
+
+            key = (measure, tuple(report.Accounts))
+            self.treeKeys[reportName] = key
+
+            if (key in self.trees):
+                self.trees[key].reports.append(reportName)
+                continue
+
+            # Income Statement uses the same dates as the balance reports.
+            dates      = context.accountChanges.Dates if (measure == 'change') else context.accountBalances.Dates
+            periods    = ParseData.getPeriods(dates)
+            paths      = AccountPaths(context, report.Accounts)
+            accountIds = paths.getAccountIds()
+
+            if (not paths.verified):
+                print("Account path could not be verified: {}.".format(', '.join(paths.unmatched)))
+
+            self.trees[key] = SimpleNamespace(measure    = measure,
+                                              accounts   = report.Accounts,
+                                              accountIds = accountIds,
+                                              periods    = periods,
+                                              reports    = [reportName],
+                                              parseData  = None,
+                                              lock       = threading.Lock())
+
+
+    ## Parse data for a report, built the first time it's asked for and shared by reports that use it.
+    # @param[in]    reportName      **String**, name of the report in the context.
+    # @return                       **ParseData Object**.
+    def getParseData(self, reportName):
+        tree = self.trees[self.treeKeys[reportName]]
+
+        with tree.lock:
+            if (tree.parseData is None):
+                sums = self.context.book.periodSums(tree.periods, tree.accountIds, changes = (tree.measure == 'change'),
+                                                    engine = self.context.engine)
+
+                if (tree.measure == 'change'):
+                    tree.parseData = ParseData_Changes(self.context, sums)
+                else:
+                    tree.parseData = ParseData_Balance(self.context, tree.accounts, sums)
+
+        return tree.parseData
+
+
+    ## Makes the CSV writer of one report.
+    # @param[in]    reportName      **String**, name of the report in the context.
+    # @return                       **CreateCSV** or **CreateCSV_AssetCategory Object**.
+    def getWriter(self, reportName):
+        report = getattr(self.context, reportName)
+
+        if (self.context.verbose):
+            print("\n== Running {} ==".format(report.ReportType))
+
+        # Assets by Category is unique, the rest are generic.
+        if (reportName == 'assetsByCategory'):
+            return CreateCSV_AssetCategory(self.context, self.getParseData(reportName), report)
+
+        return CreateCSV(self.context, self.getParseData(reportName), report)
+
+
+    ## Creates reports that use the same parse data.
+    # @brief Each period is built once and written to every one of their CSVs before the next is
+    #        built, so only one period is held at a time. Only reads from the context, its book and
+    #        the plan, so groups can run at the same time. In a forked process they have their own copy
+    #        of them, in a thread they share them.
+    # @param[in]    reportNames     **List** of report names sharing parse data.
+    def runReports(self, reportNames):
+        writers   = [self.getWriter(reportName) for reportName in reportNames]
+        parseData = self.getParseData(reportNames[0])
+
+        try:
+            for writer in writers:
+                writer.open()
+
+            for report in parseData:
+                for writer in writers:
+                    writer.writeRow(report)
+        finally:
+            for writer in writers:
+                writer.close()
+
+
+    ## Creates one report.
+    # @param[in]    reportName      **String**, name of the report in the context.
+    def runReport(self, reportName):
+        self.runReports([reportName])
+
+
+    ## Creates every report in the plan.
+    # @brief With more than one job the reports run at the same time. Forked processes are used when
+    #        they can be (see canFork()), each starts with the book read and ready to be summed.
+    #        Otherwise, like when called from a thread, threads are used. Reports sharing parse data
+    #        run in the same job so it is only built once.
+    # @param[in]    jobs            **Optional Integer**, most jobs to run at once.
+    def run(self, jobs = 1):
+        groups = [tree.reports for tree in self.trees.values()]
+
+        if (jobs <= 1 or len(groups) <= 1):
+            for reportNames in groups:
+                self.runReports(reportNames)
+            return
+
+        jobs = min(jobs, len(groups))
+
+        # Get the engine ready before forking so every worker has it.
+        self.context.book.useEngine(self.context.engine)
+
+        if (canFork()):
+            executor = ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context('fork'))
+        else:
+            executor = ThreadPoolExecutor(max_workers=jobs)
+
+        key        = id(self)
+        plans[key] = self
+
+        try:
+            with executor:
+                # result() raises anything a report raised.
+                for future in [executor.submit(runReportGroup, key, reportNames) for reportNames in groups]:
+                    Profile.merge(future.result())
+        finally:
+            del plans[key]
+
+
+    ## Finds the reports that would come out different after a book was updated.
+    # @brief Every report is if accounts or commodities changed. Otherwise a report is if a split in
+    #        one of its accounts changed, or for balances, a price of one of their commodities.
+    # @param[in]    changes         **BookChanges** record from Book.update().
+    # @return                       **List** of report names, in the order they are run.
+    def affectedBy(self, changes):
+        reportNames = []
+
+        for reportName, measure in self.reports:
+            if (reportName not in self.treeKeys):
+                continue
+
+            tree = self.trees[self.treeKeys[reportName]]
+            if (changes.structure or not changes.accounts.isdisjoint(tree.accountIds)):
+                reportNames.append(reportName)
+                continue
+
+            if (measure == 'balance' and changes.commodities):
+                commodities = {self.context.book.registry.account(accountId).commodityId for accountId in tree.accountIds}
+                if (not changes.commodities.isdisjoint(commodities)):
+                    reportNames.append(reportName)
+
+        return reportNames
+
+
+    ## Counts the splits that have to be summed to get to a date.
+    # @param[in]    windows         **List** of (start, end) windows.
+    # @return                       **Integer**, splits posted up to the last end date.
+    def countSplits(self, windows):
+        if (not windows):
+            return 0
+
+        lastDate = max(endDate for startDate, endDate in windows)
+        return sum(len(transaction.splits) for transaction in self.context.book.transactionIndex.window(lastDate))
+
+
+    ## Prints the plan and how much work it saves over running each report on its own.
+    def explain(self):
+        print("Report plan")
+
+        # Each report on its own sums its periods and builds its parse data.
+        alone = SimpleNamespace(windows=0, splits=0, rows=0)
+
+        for number, tree in enumerate(self.trees.values(), 1):
+            names = [getattr(self.context, reportName).ReportType for reportName in tree.reports]
+            rows  = len(tree.accountIds) * len(tree.periods)
+
+            print("  Parse data {}: {} of {}".format(number, 'changes' if (tree.measure == 'change') else 'balances',
+                                                     ', '.join(tree.accounts)))
+            print("    {} accounts, {} periods, {} account rows".format(len(tree.accountIds), len(tree.periods), rows))
+            print("    Used by {}".format(', '.join(names)))
+
+            alone.windows += len(tree.periods) * len(tree.reports)
+            alone.splits  += self.countSplits(tree.periods) * len(tree.reports)
+            alone.rows    += rows * len(tree.reports)
+
+        trees   = self.trees.values()
+        rows    = sum(len(tree.accountIds) * len(tree.periods) for tree in trees)
+        windows = sum(len(tree.periods) for tree in trees)
+        splits  = sum(self.countSplits(tree.periods) for tree in trees)
+
+        print("  Period sums: one pass for each parse data, a period at a time as it is written")
+        print("  Estimated cost          planned   each report alone")
+        print("    Windows summed     {:>10} {:>19}".format(windows, alone.windows))
+        print("    Splits summed      {:>10} {:>19}".format(splits, alone.splits))
+        print("    Account rows built {:>10} {:>19}".format(rows, alone.rows))
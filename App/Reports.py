@@ -0,0 +1,44 @@
+##
+# @file
+# Makes reports from a book and config without the command line.
+#
+
+import configparser
+
+from App.ReportContext      import ReportContext
+from App.ReportPlan         import ReportPlan
+from App.Common.Book        import Book
+from App.Common.BookFile    import readBook
+
+
+## Makes every report a config file turns on.
+# @brief Everything the reports need is passed down from here, nothing is shared with other calls
+#        except the book if it's passed in. Different books and configs can be reported on from
+#        different threads at the same time, and a book read once can be reused for many configs.
+#        Jobs are only forked processes when this is the only thread running (see canFork()). Called
+#        from threads, jobs are threads and each report's periods are built one after another.
+# @param[in]    book            **Book Object**, or **String** path of a GNUCash file to read.
+# @param[in]    config          **ConfigParser Object**, or **String** path of a config file to read.
+# @param[in]    jobs            **Optional Integer**, most reports to run at the same time.
+# @param[in]    verbose         **Optional Boolean**, show output even if the config file doesn't.
+# @return                       **Dictonary** of report type to the CSV file written.
+# @exception    ValueError      If the config file can't be read or something in it isn't right.
+# @exception    KeyError        If the config file is missing a setting.
+def generate_reports(book, config, jobs = 1, verbose = False):
+    if (not isinstance(config, configparser.ConfigParser)):
+        filePath = config
+        config   = configparser.ConfigParser()
+        if (not config.read(filePath)):
+            raise ValueError("Unable to read config file {}.".format(filePath))
+
+    input = None
+    if (not isinstance(book, Book)):
+        input   = book
+        book, _ = readBook(book)
+
+    context = ReportContext.fromConfig(config, book, verbose, input = input)
+    plan    = ReportPlan(context)
+    plan.run(jobs)
+
+    return {getattr(context, reportName).ReportType : getattr(context, reportName).OutputFile
+            for reportName, measure in plan.reports if (reportName in plan.treeKeys)}
@@ -0,0 +1,170 @@
+##
+# @file
+# Benchmark of reading and summing split amounts as floats against exact fixed point integers, on a
+# generated book.
+#
+# Run from the top folder: python -m Benchmarks.FixedPoint [--transactions 20000] [--repeat 3]
+#
+
+import argparse
+import csv
+import os
+import tempfile
+
+from fractions import Fraction
+
+from App.ReportContext       import ReportContext
+from App.ParseData_Balances  import ParseData_Balance
+from App.ParseData_Changes   import ParseData_Changes
+from App.CreateCSV           import CreateCSV
+from App.Common.Book         import Book
+from App.Common.BookFile     import openInputFile
+
+from Benchmarks.GenerateBook import generateBook
+from Benchmarks.Scaling      import ACCOUNTS, monthlyDates, timed
+
+
+## Book - Float
+# @brief Keeps split amounts as floats, the way they were summed before fixed point. Everything else
+#        is read and summed by Book and BalanceSweep the same as the integer path. Only the sums are
+#        compared, reports need exact amounts.
+class FloatBook(Book):
+
+    ## Converts an amount to a float.
+    # @param[in]    numerator       **Integer**.
+    # @param[in]    denominator     **Integer**.
+    # @return                       **Float**, numerator / denominator.
+    def toScale(self, numerator, denominator):
+        return numerator / denominator
+
+
+    ## Floats don't need a scale, it stays 1.
+    # @param[in]    denominator     **Integer**, not used.
+    def useDenominator(self, denominator):
+        pass
+
+
+## Book - Fraction
+# @brief Keeps split amounts as exact Fractions. Slow, but what the other two are checked against,
+#        its CSVs are what the integer path's have to match.
+class FractionBook(Book):
+
+    ## Converts an amount to a Fraction.
+    # @param[in]    numerator       **Integer**.
+    # @param[in]    denominator     **Integer**.
+    # @return                       **Fraction**, numerator / denominator.
+    def toScale(self, numerator, denominator):
+        return Fraction(numerator, denominator)
+
+
+    ## Fractions don't need a scale, it stays 1.
+    # @param[in]    denominator     **Integer**, not used.
+    def useDenominator(self, denominator):
+        pass
+
+
+## Ways of keeping amounts, in the order they are run.
+KINDS = (('float', FloatBook), ('integer', Book), ('fraction', FractionBook))
+
+
+## Reads a GNUCash file the way readBook() does.
+# @param[in]    bookClass       **Class**, Book or a subclass.
+# @param[in]    filePath        **String**, GNUCash XML file.
+# @return                       **Book Object**.
+def readAs(bookClass, filePath):
+    with openInputFile(filePath) as source:
+        return bookClass(source)
+
+
+## Writes the Account Balances and Account Changes CSVs of a book.
+# @param[in]    book            **Book Object**.
+# @param[in]    folder          **String**, folder to write the CSVs to.
+# @param[in]    dates           **PeriodSpec Object**, report dates.
+# @return                       **List** of CSV file paths.
+def writeReports(book, folder, dates):
+    depths   = [2] * len(ACCOUNTS)
+    balances = ReportContext.report('Account Balances', True, os.path.join(folder, 'balances.csv'), ACCOUNTS, depths, dates)
+    changes  = ReportContext.report('Account Changes', True, os.path.join(folder, 'changes.csv'), ACCOUNTS, depths, dates)
+    context  = ReportContext(book, balances, changes, None, None)
+
+    CreateCSV(context, ParseData_Balance(context, ACCOUNTS), balances).createFile()
+    CreateCSV(context, ParseData_Changes(context), changes).createFile()
+
+    return [balances.OutputFile, changes.OutputFile]
+
+
+## Counts the cells of CSVs that differ from the same CSVs made another way.
+# @param[in]    filePaths       **List** of CSV file paths.
+# @param[in]    expectedPaths   **List** of CSV file paths to compare with, in the same order.
+# @return                       **Tuple** of cells that differ and cells compared.
+def compareCSVs(filePaths, expectedPaths):
+    differ = 0
+    cells  = 0
+
+    for filePath, expectedPath in zip(filePaths, expectedPaths):
+        with open(filePath, newline='') as f, open(expectedPath, newline='') as expected:
+            for row, expectedRow in zip(csv.reader(f), csv.reader(expected)):
+                cells  += len(expectedRow)
+                differ += sum(cell != expectedCell for cell, expectedCell in zip(row, expectedRow))
+                differ += abs(len(row) - len(expectedRow))
+
+    return differ, cells
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time reading and summing a generated book with float, integer and Fraction amounts.')
+    parser.add_argument('--transactions', type=int, default=20000, help='Transactions in the generated book.')
+    parser.add_argument('--splits',       type=int, default=3,     help='Splits in each transaction.')
+    parser.add_argument('--years',        type=int, default=10,    help='Years the book covers, one period per month.')
+    parser.add_argument('--seed',         type=int, default=0,     help='Random seed.')
+    parser.add_argument('--repeat',       type=int, default=3,     help='Times to run each stage, the fastest is kept.')
+    settings = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        filePath = os.path.join(folder, 'book.gnucash')
+        generateBook(filePath, transactions=settings.transactions, splits=settings.splits, years=settings.years,
+                     seed=settings.seed)
+
+        dates   = monthlyDates(settings.years)
+        periods = list(dates)
+        results = {}
+
+        for kind, bookClass in KINDS:
+            parseTime, book = timed(settings.repeat, lambda: readAs(bookClass, filePath))
+            sumTime, values = timed(settings.repeat, lambda: book.periodSums(periods).get())
+
+            results[kind] = {'parse' : parseTime['wall'], 'sums' : sumTime['wall'], 'book' : book, 'values' : values}
+
+            # Reports make Fractions from the sums, floats would have to be converted first.
+            if (kind != 'float'):
+                os.mkdir(os.path.join(folder, kind))
+                results[kind]['csvs'] = writeReports(book, os.path.join(folder, kind), dates)
+
+        # Sums as exact amounts, the integers are in units of 1 / scale.
+        exact    = results['fraction']['values']
+        integers = results['integer']
+        scale    = integers['book'].scale
+
+        wrong = sum(Fraction(value, scale) != exact[index][account][0]
+                    for index, period in enumerate(integers['values']) for account, (value, quantity) in period.items())
+        drift = max((abs(Fraction(value) - exact[index][account][0])
+                     for index, period in enumerate(results['float']['values'])
+                     for account, (value, quantity) in period.items()), default=0)
+
+        print("{} transactions, {} splits, {} periods".format(settings.transactions,
+                                                             sum(len(transaction.splits) for transaction in integers['book'].transactions),
+                                                             len(periods)))
+        print("  {:10} {:>10} {:>10} {:>16}".format('', 'read', 'sums', 'CSV cells off'))
+
+        for kind, bookClass in KINDS:
+            csvs = '-'
+            if ('csvs' in results[kind]):
+                csvs = '{} of {}'.format(*compareCSVs(results[kind]['csvs'], results['fraction']['csvs']))
+            print("  {:10} {:9.3f}s {:9.3f}s {:>16}".format(kind, results[kind]['parse'], results[kind]['sums'], csvs))
+
+        print("  integer sums not exact: {}".format(wrong))
+        print("  largest float error:    {:.3e}".format(float(drift)))
+
+
+if __name__ == "__main__":
+    main()
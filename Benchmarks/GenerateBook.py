@@ -0,0 +1,354 @@
+##
+# @file
+# Writes synthetic GNUCash books, XML or SQLite, for benchmarks and tests.
+#
+# Run from the top folder: python -m Benchmarks.GenerateBook output.gnucash [options]
+#
+
+import argparse
+import gzip
+import hashlib
+import os
+import random
+import sqlite3
+
+from contextlib       import closing
+from datetime         import date, timedelta
+from xml.sax.saxutils import escape
+
+from App.Common.Book import NAMESPACES
+
+
+## Commodity namespaces to spread generated securities over, they become Assets by Category columns.
+SPACES = ('STOCK', 'FUND', 'BOND', 'BULLION')
+
+## Top level accounts and their GNUCash account types. Assets also get an account per commodity.
+TOPS = (('Assets', 'ASSET'), ('Liabilities', 'LIABILITY'), ('Income', 'INCOME'), ('Expenses', 'EXPENSE'))
+
+
+## Book Generator
+# @brief Makes a random but valid GNUCash book: an account tree of a given depth and width under each
+#        top level account, securities with prices, and balanced transactions between the accounts.
+#        The same settings and seed always make the same book.
+class BookGenerator():
+
+    ## Constructor
+    # @param[in]    depth           **Integer**, levels of accounts below each top level account.
+    # @param[in]    width           **Integer**, children of each account that has children.
+    # @param[in]    transactions    **Integer**, number of transactions.
+    # @param[in]    splits          **Integer**, splits in each transaction, at least 2.
+    # @param[in]    commodities     **Integer**, number of securities.
+    # @param[in]    prices          **Integer**, price points for each security.
+    # @param[in]    years           **Integer**, years the transactions and prices are spread over.
+    # @param[in]    seed            **Integer**, random seed.
+    def __init__(self, depth = 2, width = 3, transactions = 1000, splits = 2, commodities = 8, prices = 50,
+                 years = 10, seed = 0):
+
+        self.random       = random.Random(seed)
+        self.width        = width
+        self.transactions = transactions
+        self.splits       = max(2, splits)
+        self.prices       = prices
+        self.startDate    = date(2026 - years, 1, 1)
+        self.days         = years * 365
+
+        # (space, id, name) for each security.
+        self.commodities = [(SPACES[i % len(SPACES)], 'SEC{:04d}'.format(i), 'Security {}'.format(i))
+                            for i in range(commodities)]
+
+        # (guid, name, type, parent guid, commodity space, commodity id, scu) for each account.
+        self.accounts = []
+        self.leaves   = {}      # Top level name to GUIDs of accounts with no children.
+        self.holdings = []      # (GUID, commodity id) of accounts holding a security.
+
+        rootId = self.guid()
+        self.accounts.append((rootId, 'Root Account', 'ROOT', None, 'CURRENCY', 'USD', 100))
+
+        topIds = {}
+        for name, accountType in TOPS:
+            topIds[name]      = self.addAccount(name, accountType, rootId)
+            self.leaves[name] = []
+            self.addChildren(name, topIds[name], accountType, name, depth)
+
+        # Securities are held under Assets:Investments.
+        investmentsId = self.addAccount('Investments', 'ASSET', topIds['Assets'])
+        for space, commodityId, commodityName in self.commodities:
+            accountId = self.addAccount(commodityId, 'STOCK', investmentsId, space, commodityId, 10000)
+            self.holdings.append((accountId, commodityId))
+
+
+    ## Random GUID.
+    # @return                       **String**, 32 hex digits.
+    def guid(self):
+        return '{:032x}'.format(self.random.getrandbits(128))
+
+
+    ## Adds an account.
+    # @return                       **String**, GUID of the account.
+    def addAccount(self, name, accountType, parentId, space = 'CURRENCY', commodityId = 'USD', scu = 100):
+        accountId = self.guid()
+        self.accounts.append((accountId, name, accountType, parentId, space, commodityId, scu))
+        return accountId
+
+
+    ## Adds a tree of accounts below an account.
+    # @param[in]    top             **String**, top level account the tree is under.
+    # @param[in]    parentId        **String**, GUID of the account to add children to.
+    # @param[in]    accountType     **String**, GNUCash account type of the children.
+    # @param[in]    name            **String**, name of the parent, children are named after it.
+    # @param[in]    depth           **Integer**, levels left to add.
+    def addChildren(self, top, parentId, accountType, name, depth):
+        if (depth <= 0):
+            self.leaves[top].append(parentId)
+            return
+
+        for i in range(self.width):
+            childName = '{} {}'.format(name, i + 1)
+            childId   = self.addAccount(childName, accountType, parentId)
+            self.addChildren(top, childId, accountType, childName, depth - 1)
+
+
+    ## Random date in the book.
+    # @return                       **Date Object**.
+    def randomDate(self):
+        return self.startDate + timedelta(days=self.random.randrange(self.days))
+
+
+    ## Writes the book.
+    # @param[in]    f               **File Object**, text file to write the XML to.
+    def write(self, f):
+        f.write('<?xml version="1.0" encoding="utf-8" ?>\n<gnc-v2\n')
+        f.write('\n'.join('     xmlns:{}="{}"'.format(prefix, uri) for prefix, uri in NAMESPACES.items()))
+        f.write('>\n<gnc:count-data cd:type="book">1</gnc:count-data>\n')
+        f.write('<gnc:book version="2.0.0">\n<book:id type="guid">{}</book:id>\n'.format(self.guid()))
+        f.write('<gnc:count-data cd:type="commodity">{}</gnc:count-data>\n'.format(len(self.commodities) + 1))
+        f.write('<gnc:count-data cd:type="account">{}</gnc:count-data>\n'.format(len(self.accounts)))
+        f.write('<gnc:count-data cd:type="transaction">{}</gnc:count-data>\n'.format(self.transactions))
+        f.write('<gnc:count-data cd:type="price">{}</gnc:count-data>\n'.format(len(self.commodities) * self.prices))
+
+        f.write('<gnc:commodity version="2.0.0">\n  <cmdty:space>CURRENCY</cmdty:space>\n'
+                '  <cmdty:id>USD</cmdty:id>\n</gnc:commodity>\n')
+        for space, commodityId, commodityName in self.commodities:
+            f.write('<gnc:commodity version="2.0.0">\n  <cmdty:space>{}</cmdty:space>\n  <cmdty:id>{}</cmdty:id>\n'
+                    '  <cmdty:name>{}</cmdty:name>\n  <cmdty:fraction>10000</cmdty:fraction>\n</gnc:commodity>\n'
+                    .format(space, commodityId, escape(commodityName)))
+
+        self.writePrices(f)
+
+        for accountId, name, accountType, parentId, space, commodityId, scu in self.accounts:
+            f.write('<gnc:account version="2.0.0">\n  <act:name>{}</act:name>\n  <act:id type="guid">{}</act:id>\n'
+                    '  <act:type>{}</act:type>\n  <act:commodity>\n    <cmdty:space>{}</cmdty:space>\n'
+                    '    <cmdty:id>{}</cmdty:id>\n  </act:commodity>\n  <act:commodity-scu>{}</act:commodity-scu>\n'
+                    .format(escape(name), accountId, accountType, space, commodityId, scu))
+            if (parentId):
+                f.write('  <act:parent type="guid">{}</act:parent>\n'.format(parentId))
+            f.write('</gnc:account>\n')
+
+        self.writeTransactions(f)
+
+        f.write('</gnc:book>\n</gnc-v2>\n')
+
+
+    ## Makes the price database, a random walk for each security.
+    # @brief The last price of each security is kept in lastPrices for the transactions.
+    # @return                       **Iterator** of (GUID, space, commodity id, date, price in cents) tuples.
+    def priceRecords(self):
+        self.lastPrices = {}
+
+        for space, commodityId, commodityName in self.commodities:
+            price = self.random.randint(1000, 500000)   # Cents.
+
+            for i in range(self.prices):
+                day   = self.startDate + timedelta(days=i * self.days // max(1, self.prices))
+                price = max(1, price + self.random.randint(-price // 20, price // 20))
+
+                yield self.guid(), space, commodityId, day, price
+
+            self.lastPrices[commodityId] = price
+
+
+    ## Makes the transactions. Each one moves money between random accounts and balances to zero.
+    # @brief Prices have to be made first, securities are bought and sold at about their last price.
+    # @return                       **Iterator** of (GUID, date posted, number, splits) tuples. Splits
+    #                               are (GUID, account GUID, value, quantity) tuples, value and
+    #                               quantity are (numerator, denominator) tuples.
+    def transactionRecords(self):
+        accounts = [accountId for top in self.leaves for accountId in self.leaves[top]]
+        holdings = dict(self.holdings)
+
+        for i in range(self.transactions):
+            posted = self.randomDate()
+
+            splits = []
+            total  = 0
+            for j in range(self.splits - 1):
+                accountId = self.random.choice(accounts + list(holdings))
+                value     = self.random.randint(-100000, 100000)
+                total    += value
+
+                if (accountId in holdings):
+                    quantity = (value * 10000 // self.lastPrices[holdings[accountId]], 10000)
+                else:
+                    quantity = (value, 100)
+
+                splits.append((accountId, (value, 100), quantity))
+
+            splits.append((self.random.choice(accounts), (-total, 100), (-total, 100)))
+
+            transactionId = self.guid()
+            yield transactionId, posted, i + 1, [(self.guid(),) + split for split in splits]
+
+
+    ## Writes the price database.
+    # @param[in]    f               **File Object**, text file to write the XML to.
+    def writePrices(self, f):
+        f.write('<gnc:pricedb version="1">\n')
+
+        for priceId, space, commodityId, day, price in self.priceRecords():
+            f.write('  <price>\n    <price:id type="guid">{}</price:id>\n    <price:commodity>\n'
+                    '      <cmdty:space>{}</cmdty:space>\n      <cmdty:id>{}</cmdty:id>\n    </price:commodity>\n'
+                    '    <price:currency>\n      <cmdty:space>CURRENCY</cmdty:space>\n'
+                    '      <cmdty:id>USD</cmdty:id>\n    </price:currency>\n'
+                    '    <price:time>\n      <ts:date>{} 10:59:00 +0000</ts:date>\n    </price:time>\n'
+                    '    <price:source>user:price</price:source>\n    <price:type>last</price:type>\n'
+                    '    <price:value>{}/100</price:value>\n  </price>\n'
+                    .format(priceId, space, commodityId, day.isoformat(), price))
+
+        f.write('</gnc:pricedb>\n')
+
+
+    ## Writes the transactions.
+    # @param[in]    f               **File Object**, text file to write the XML to.
+    def writeTransactions(self, f):
+        for transactionId, posted, number, splits in self.transactionRecords():
+            f.write('<gnc:transaction version="2.0.0">\n  <trn:id type="guid">{}</trn:id>\n'
+                    '  <trn:currency>\n    <cmdty:space>CURRENCY</cmdty:space>\n    <cmdty:id>USD</cmdty:id>\n'
+                    '  </trn:currency>\n  <trn:date-posted>\n    <ts:date>{} 10:59:00 +0000</ts:date>\n'
+                    '  </trn:date-posted>\n  <trn:date-entered>\n    <ts:date>{} 12:00:00 +0000</ts:date>\n'
+                    '  </trn:date-entered>\n  <trn:description>Transaction {}</trn:description>\n  <trn:splits>\n'
+                    .format(transactionId, posted.isoformat(), posted.isoformat(), number))
+
+            for splitId, accountId, value, quantity in splits:
+                f.write('    <trn:split>\n      <split:id type="guid">{}</split:id>\n'
+                        '      <split:reconciled-state>n</split:reconciled-state>\n'
+                        '      <split:value>{}/{}</split:value>\n      <split:quantity>{}/{}</split:quantity>\n'
+                        '      <split:account type="guid">{}</split:account>\n    </trn:split>\n'
+                        .format(splitId, *value, *quantity, accountId))
+
+            f.write('  </trn:splits>\n</gnc:transaction>\n')
+
+
+    ## Writes the same book in GNUCash's SQLite format, the tables and indexes BookSQLite reads.
+    # @brief Records are made in the same order as write(), so the same settings and seed make the same
+    #        book either way. Commodities have no GUID in XML, here they get one from their name.
+    # @param[in]    connection      **sqlite3 Connection**, empty database to write to.
+    def writeSQLite(self, connection):
+        connection.executescript(SQLITE_SCHEMA)
+
+        commodityIds = {commodityId : hashlib.md5('{}:{}'.format(space, commodityId).encode()).hexdigest()
+                        for space, commodityId in [('CURRENCY', 'USD')] + [commodity[:2] for commodity in self.commodities]}
+        usd = commodityIds['USD']
+
+        rootId = self.accounts[0][0]
+        connection.execute("INSERT INTO books VALUES (?, ?, NULL)", (self.guid(), rootId))
+
+        connection.execute("INSERT INTO commodities VALUES (?, 'CURRENCY', 'USD', NULL, NULL, 100, 1, 'currency', '')", (usd,))
+        connection.executemany("INSERT INTO commodities VALUES (?, ?, ?, ?, NULL, 10000, 0, NULL, '')",
+                               [(commodityIds[commodityId], space, commodityId, commodityName)
+                                for space, commodityId, commodityName in self.commodities])
+
+        connection.executemany("INSERT INTO prices VALUES (?, ?, ?, ?, 'user:price', 'last', ?, 100)",
+                               [(priceId, commodityIds[commodityId], usd, '{} 10:59:00'.format(day.isoformat()), price)
+                                for priceId, space, commodityId, day, price in self.priceRecords()])
+
+        connection.executemany("INSERT INTO accounts VALUES (?, ?, ?, ?, ?, 0, ?, '', '', 0, 0)",
+                               [(accountId, name, accountType, commodityIds[commodityId], scu, parentId)
+                                for accountId, name, accountType, parentId, space, commodityId, scu in self.accounts])
+
+        for transactionId, posted, number, splits in self.transactionRecords():
+            connection.execute("INSERT INTO transactions VALUES (?, ?, '', ?, ?, ?)",
+                               (transactionId, usd, '{} 10:59:00'.format(posted.isoformat()),
+                                '{} 12:00:00'.format(posted.isoformat()), 'Transaction {}'.format(number)))
+            connection.executemany("INSERT INTO splits VALUES (?, ?, ?, '', '', 'n', NULL, ?, ?, ?, ?, NULL)",
+                                   [(splitId, transactionId, accountId) + value + quantity
+                                    for splitId, accountId, value, quantity in splits])
+
+        connection.commit()
+
+
+## Tables and indexes of a GNUCash SQLite book, the columns GNUCash 3 and later use.
+SQLITE_SCHEMA = """
+CREATE TABLE books        (guid text(32) PRIMARY KEY NOT NULL, root_account_guid text(32) NOT NULL,
+                           root_template_guid text(32));
+CREATE TABLE commodities  (guid text(32) PRIMARY KEY NOT NULL, namespace text(2048) NOT NULL,
+                           mnemonic text(2048) NOT NULL, fullname text(2048), cusip text(2048),
+                           fraction integer NOT NULL, quote_flag integer NOT NULL, quote_source text(2048),
+                           quote_tz text(2048));
+CREATE TABLE accounts     (guid text(32) PRIMARY KEY NOT NULL, name text(2048) NOT NULL,
+                           account_type text(2048) NOT NULL, commodity_guid text(32), commodity_scu integer NOT NULL,
+                           non_std_scu integer NOT NULL, parent_guid text(32), code text(2048),
+                           description text(2048), hidden integer, placeholder integer);
+CREATE TABLE prices       (guid text(32) PRIMARY KEY NOT NULL, commodity_guid text(32) NOT NULL,
+                           currency_guid text(32) NOT NULL, date text(19) NOT NULL, source text(2048),
+                           type text(2048), value_num bigint NOT NULL, value_denom bigint NOT NULL);
+CREATE TABLE transactions (guid text(32) PRIMARY KEY NOT NULL, currency_guid text(32) NOT NULL,
+                           num text(2048) NOT NULL, post_date text(19), enter_date text(19),
+                           description text(2048));
+CREATE TABLE splits       (guid text(32) PRIMARY KEY NOT NULL, tx_guid text(32) NOT NULL,
+                           account_guid text(32) NOT NULL, memo text(2048) NOT NULL, action text(2048) NOT NULL,
+                           reconcile_state text(1) NOT NULL, reconcile_date text(19), value_num bigint NOT NULL,
+                           value_denom bigint NOT NULL, quantity_num bigint NOT NULL, quantity_denom bigint NOT NULL,
+                           lot_guid text(32));
+CREATE TABLE slots        (id integer PRIMARY KEY AUTOINCREMENT NOT NULL, obj_guid text(32) NOT NULL,
+                           name text(4096) NOT NULL, slot_type integer NOT NULL, int64_val bigint,
+                           string_val text(4096), double_val float8, timespec_val text(19), guid_val text(32),
+                           numeric_val_num bigint, numeric_val_denom bigint, gdate_val text(8));
+CREATE INDEX tx_post_date_index        ON transactions (post_date);
+CREATE INDEX splits_tx_guid_index      ON splits (tx_guid);
+CREATE INDEX splits_account_guid_index ON splits (account_guid);
+CREATE INDEX slots_guid_index          ON slots (obj_guid);
+"""
+
+
+## Writes a generated book to a file.
+# @param[in]    filePath        **String**, where to save it. Compressed if it ends in ".gz".
+# @param[in]    sqlite          **Optional Boolean**, save as a GNUCash SQLite file instead of XML.
+# @param[in]    settings        Keyword arguments for BookGenerator.
+def generateBook(filePath, sqlite = False, **settings):
+    generator = BookGenerator(**settings)
+
+    if (sqlite):
+        if (os.path.exists(filePath)):
+            os.remove(filePath)
+        with closing(sqlite3.connect(filePath)) as connection:
+            generator.writeSQLite(connection)
+        return generator
+
+    with (gzip.open(filePath, 'wt', encoding='utf-8') if (filePath.endswith('.gz'))
+          else open(filePath, 'w', encoding='utf-8')) as f:
+        generator.write(f)
+
+    return generator
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write a synthetic GNUCash book.')
+    parser.add_argument('output', help='File to write, compressed if it ends in .gz.')
+    parser.add_argument('--sqlite',       action='store_true',    help='Write a GNUCash SQLite file instead of XML.')
+    parser.add_argument('--depth',        type=int, default=2,    help='Levels of accounts below each top level account.')
+    parser.add_argument('--width',        type=int, default=3,    help='Children of each account that has children.')
+    parser.add_argument('--transactions', type=int, default=1000, help='Number of transactions.')
+    parser.add_argument('--splits',       type=int, default=2,    help='Splits in each transaction.')
+    parser.add_argument('--commodities',  type=int, default=8,    help='Number of securities.')
+    parser.add_argument('--prices',       type=int, default=50,   help='Price points for each security.')
+    parser.add_argument('--years',        type=int, default=10,   help='Years the book covers.')
+    parser.add_argument('--seed',         type=int, default=0,    help='Random seed.')
+    args = parser.parse_args()
+
+    generateBook(args.output, sqlite=args.sqlite, depth=args.depth, width=args.width, transactions=args.transactions,
+                 splits=args.splits, commodities=args.commodities, prices=args.prices, years=args.years,
+                 seed=args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+##
+# @file
+# Times each stage of making reports on generated books of increasing size.
+#
+# Run from the top folder: python -m Benchmarks.Scaling [--sizes 1000,10000] [--output results.json]
+#                          [--baseline baseline.json] [--save-baseline baseline.json]
+#
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+from App.ReportContext       import ReportContext
+from App.Common.Book         import Book
+from App.Common.AccountPaths import AccountPaths
+from App.Common.PeriodSpec   import PeriodSpec
+from App.ParseData_Balances  import ParseData_Balance
+from App.CreateCSV           import CreateCSV
+
+from Benchmarks.GenerateBook import generateBook
+
+
+## Stages timed, in the order they run.
+STAGES = ('parse', 'accountPaths', 'limitTransactions', 'periodSums', 'buildReport', 'createCSV')
+
+## Accounts reported on, every top level account the generator makes.
+ACCOUNTS = ['Assets', 'Liabilities', 'Income', 'Expenses']
+
+
+## Runs a function a few times, keeping the fastest.
+# @param[in]    repeat          **Integer**, times to run it.
+# @param[in]    function        **Function** to time, called with no arguments.
+# @return                       **Tuple** of a **Dictonary** with wall and cpu seconds, and the
+#                               function's last result.
+def timed(repeat, function):
+    best = None
+
+    for i in range(repeat):
+        wall   = time.perf_counter()
+        cpu    = time.process_time()
+        result = function()
+        times  = {'wall' : time.perf_counter() - wall, 'cpu' : time.process_time() - cpu}
+
+        if (best is None or times['wall'] < best['wall']):
+            best = times
+
+    return best, result
+
+
+## Report dates, each month the generated book covers.
+# @param[in]    years           **Integer**, years the book covers, ending with 2025.
+# @return                       **PeriodSpec Object**, a monthly period rule.
+def monthlyDates(years):
+    return PeriodSpec('monthly {}-01..2025-12'.format(2026 - years))
+
+
+## Makes a context the way the config file would for one report on the generated book.
+# @param[in]    book            **Book Object**, generated book.
+# @param[in]    folder          **String**, folder to write the CSV to.
+# @param[in]    dates           **PeriodSpec Object**, report dates.
+# @return                       **ReportContext Object**.
+def getContext(book, folder, dates):
+    report = ReportContext.report('Account Balances', True, os.path.join(folder, 'Account_Balances.csv'),
+                                  ACCOUNTS, [1] * len(ACCOUNTS), dates)
+
+    return ReportContext(book, report, report, report, report)
+
+
+## Times every stage on a book with a given number of transactions.
+# @param[in]    transactions    **Integer**, transactions in the generated book.
+# @param[in]    settings        **Object**, command line arguments.
+# @return                       **Dictonary** of results for this size.
+def runSize(transactions, settings):
+    with tempfile.TemporaryDirectory() as folder:
+        filePath = os.path.join(folder, 'book.gnucash')
+        generateBook(filePath, depth=settings.depth, width=settings.width, transactions=transactions,
+                     splits=settings.splits, commodities=settings.commodities, prices=settings.prices,
+                     years=settings.years, seed=settings.seed)
+
+        dates  = monthlyDates(settings.years)
+        stages = {}
+
+        stages['parse'], book = timed(settings.repeat, lambda: Book(filePath))
+        context = getContext(book, folder, dates)
+
+        stages['accountPaths'], accountPaths = timed(settings.repeat, lambda: AccountPaths(context, ACCOUNTS))
+
+        periods    = ParseData_Balance.getPeriods(dates)
+        accountIds = accountPaths.getAccountIds()
+
+        stages['limitTransactions'], windows = timed(settings.repeat,
+            lambda: [book.transactionIndex.window(endDate, startDate) for startDate, endDate in periods])
+        stages['periodSums'], sums = timed(settings.repeat,
+            lambda: book.periodSums(periods, accountIds).get())
+        parseData = ParseData_Balance(context, ACCOUNTS, sums)
+
+        # Periods are normally written as they're built, they're kept here to time each stage on its own.
+        stages['buildReport'], rows = timed(settings.repeat, lambda: list(parseData))
+        stages['createCSV'], csv = timed(settings.repeat,
+            lambda: CreateCSV(context, parseData, context.accountBalances).createFile(rows))
+
+    return {'transactions' : transactions,
+            'splits'       : sum(len(transaction.splits) for transaction in book.transactions),
+            'accounts'     : len(book.accounts),
+            'periods'      : len(periods),
+            'stages'       : stages}
+
+
+## Finds stages slower than in the baseline.
+# @param[in]    results         **Dictonary**, results of this run.
+# @param[in]    baseline        **Dictonary**, results saved from an earlier run.
+# @param[in]    tolerance       **Float**, how much slower is allowed, 0.25 is 25%.
+# @param[in]    floor           **Float**, seconds slower that are always allowed, for timer noise.
+# @return                       **List** of (transactions, stage, baseline seconds, seconds) tuples.
+def findRegressions(results, baseline, tolerance, floor):
+    regressions = []
+    before      = {size['transactions'] : size['stages'] for size in baseline['sizes']}
+
+    for size in results['sizes']:
+        for stage, times in size['stages'].items():
+            old = before.get(size['transactions'], {}).get(stage)
+            if (old is None):
+                continue
+
+            if (times['wall'] > old['wall'] * (1 + tolerance) and times['wall'] - old['wall'] > floor):
+                regressions.append((size['transactions'], stage, old['wall'], times['wall']))
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time each report stage on generated books of increasing size.')
+    parser.add_argument('--sizes',         default='1000,10000,50000', help='Transactions in each book, comma separated.')
+    parser.add_argument('--depth',         type=int, default=2,        help='Levels of accounts below each top level account.')
+    parser.add_argument('--width',         type=int, default=3,        help='Children of each account that has children.')
+    parser.add_argument('--splits',        type=int, default=3,        help='Splits in each transaction.')
+    parser.add_argument('--commodities',   type=int, default=8,        help='Number of securities.')
+    parser.add_argument('--prices',        type=int, default=120,      help='Price points for each security.')
+    parser.add_argument('--years',         type=int, default=10,       help='Years each book covers, reports are monthly.')
+    parser.add_argument('--seed',          type=int, default=0,        help='Random seed.')
+    parser.add_argument('--repeat',        type=int, default=3,        help='Times each stage runs, the fastest is kept.')
+    parser.add_argument('--output',                                    help='Write results to this JSON file.')
+    parser.add_argument('--baseline',                                  help='Compare with results saved in this JSON file.')
+    parser.add_argument('--save-baseline', dest='saveBaseline',        help='Also write results to this JSON file as the new baseline.')
+    parser.add_argument('--tolerance',     type=float, default=0.25,   help='How much slower than the baseline is a regression.')
+    parser.add_argument('--floor',         type=float, default=0.005,  help='Seconds slower that are never a regression.')
+    settings = parser.parse_args()
+
+    results = {'python'   : platform.python_version(),
+               'platform' : platform.platform(),
+               'settings' : {key : value for key, value in vars(settings).items()
+                             if (key not in ('output', 'baseline', 'saveBaseline'))},
+               'sizes'    : []}
+
+    print("{:>12} {:>8}  ".format('transactions', 'splits') + ' '.join('{:>17}'.format(stage) for stage in STAGES))
+
+    for transactions in [int(size) for size in settings.sizes.split(',')]:
+        size = runSize(transactions, settings)
+        results['sizes'].append(size)
+        print("{:>12} {:>8}  ".format(transactions, size['splits']) +
+              ' '.join('{:>16.4f}s'.format(size['stages'][stage]['wall']) for stage in STAGES))
+
+    for filePath in (settings.output, settings.saveBaseline):
+        if (filePath):
+            with open(filePath, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+
+    if (settings.baseline):
+        with open(settings.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+        regressions = findRegressions(results, baseline, settings.tolerance, settings.floor)
+        for transactions, stage, old, new in regressions:
+            print("REGRESSION: {} at {} transactions, {:.4f}s -> {:.4f}s".format(stage, transactions, old, new))
+
+        if (regressions):
+            sys.exit(1)
+
+        print("No regressions against {}".format(settings.baseline))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+##
+# @file
+# Makes the reports for many GNUCash books and config files in one run.
+#
+# python GNUCashBatch.py manifest.txt [--workers N] [--summary summary.json]
+#
+
+import argparse
+import configparser
+import io
+import json
+import os
+import sys
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib         import redirect_stdout
+from datetime           import datetime
+from types              import SimpleNamespace
+
+from App.ReportPlan import ReportPlan
+
+import GNUCashReport
+
+
+## Get command line arguments.
+# @return                   Argparse object.
+def getArguments():
+    parser = argparse.ArgumentParser(description='Create reports for many GNUCash books and config files.')
+
+    parser.add_argument('manifest',
+                        metavar  = 'path_to_file',
+                        help     = 'Lines of "book, config" or just "config" to use the book in the config file.')
+
+    parser.add_argument('-w', '--workers',
+                        dest     = 'workers',
+                        metavar  = 'N',
+                        type     = int,
+                        default  = os.cpu_count(),
+                        help     = 'Books to work on at the same time, defaults to the number of CPUs.')
+
+    parser.add_argument('--summary',
+                        dest     = 'summary',
+                        metavar  = 'path_to_file',
+                        help     = 'Save timings and failures of each book and config to a JSON file.')
+
+    parser.add_argument('--no-cache',
+                        dest     = 'noCache',
+                        action   = 'store_true',
+                        help     = 'Read the GNUCash files even if config files turn on the cache.')
+
+    return parser.parse_args()
+
+
+## Reads the manifest, grouping config files by the book they use.
+# @brief Blank lines and lines starting with # are skipped. Paths are relative to where this is run,
+#        the same as paths in the config files.
+# @param[in]    filePath    String, manifest file.
+# @return                   Dictonary of book path to list of config paths, in manifest order. Configs
+#                           whose book can't be found are under None.
+def readManifest(filePath):
+    books = {}
+
+    with open(filePath, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if (not line or line.startswith('#')):
+                continue
+
+            paths = [path.strip() for path in line.split(',')]
+            configPath = paths[-1]
+            bookPath   = paths[0] if (len(paths) > 1) else None
+
+            # Without a book the config file says which one.
+            if (bookPath is None):
+                config = configparser.ConfigParser()
+                try:
+                    config.read(configPath)
+                    bookPath = config['GENERAL']['input']
+                except (KeyError, configparser.Error):
+                    bookPath = None
+
+            key = os.path.abspath(bookPath) if (bookPath) else None
+            books.setdefault(key, []).append(configPath)
+
+    return books
+
+
+## Makes the reports for every config that uses one book. The book is read once, with the first
+#  config's cache settings, and shared by the rest.
+# @brief Runs in a worker process. Nothing a book or config does stops the others, output that would
+#        have been printed is kept and the last line of it is the error.
+# @param[in]    bookPath    String, GNUCash file, None if the configs didn't say which.
+# @param[in]    configPaths List of config file paths.
+# @param[in]    noCache     Boolean, ignore the cache settings in the config files.
+# @return                   Dictonary of results for the book.
+def runBook(bookPath, configPaths, noCache = False):
+    result   = {'book' : bookPath, 'parse' : None, 'configs' : []}
+    previous = None
+
+    for configPath in configPaths:
+        output = io.StringIO()
+        start  = time.perf_counter()
+        error  = None
+        names  = []
+
+        try:
+            with redirect_stdout(output):
+                if (bookPath is None):
+                    raise ValueError("No GNUCash file given and none in the config file.")
+
+                with open(configPath, 'r') as config:
+                    args = SimpleNamespace(config=config, input=bookPath, verbose=False,
+                                           noCache=noCache, clearCache=False, periodJobs=1)
+                    opts = GNUCashReport.getConfigFile(args, previous)
+
+                if (previous is None):
+                    result['parse'] = time.perf_counter() - start
+                previous = opts
+
+                plan  = ReportPlan(opts)
+                names = [getattr(opts, reportName).ReportType for reportName in plan.treeKeys]
+                plan.run()
+
+        # Config and book errors print a message and exit.
+        except (Exception, SystemExit) as err:
+            lines = output.getvalue().strip().splitlines()
+            error = str(err) or (lines[-1] if (lines) else type(err).__name__)
+
+        result['configs'].append({'config'  : configPath,
+                                  'reports' : names,
+                                  'seconds' : time.perf_counter() - start,
+                                  'error'   : error})
+
+    return result
+
+
+# Start here.
+if __name__ == '__main__':
+
+    args  = getArguments()
+    start = time.perf_counter()
+
+    try:
+        books = readManifest(args.manifest)
+    except OSError as err:
+        print("ERROR: Unable to read manifest. {}".format(err))
+        sys.exit(1)
+
+    results = []
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = [executor.submit(runBook, bookPath, configPaths, args.noCache)
+                   for bookPath, configPaths in books.items()]
+
+        for (bookPath, configPaths), future in zip(books.items(), futures):
+            try:
+                results.append(future.result())
+
+            # A worker that died takes its book with it, but not the batch.
+            except Exception as err:
+                results.append({'book' : bookPath, 'parse' : None,
+                                'configs' : [{'config' : configPath, 'reports' : [], 'seconds' : None,
+                                              'error' : "Worker failed: {}".format(err)}
+                                             for configPath in configPaths]})
+
+    failures = [(book['book'], config) for book in results for config in book['configs'] if (config['error'])]
+
+    for book in results:
+        parse = '{:.2f}s'.format(book['parse']) if (book['parse'] is not None) else '-'
+        print("{} (read in {})".format(book['book'], parse))
+
+        for config in book['configs']:
+            if (config['error']):
+                print("  FAILED {}: {}".format(config['config'], config['error']))
+            else:
+                print("  {:.2f}s {}: {}".format(config['seconds'], config['config'], ', '.join(config['reports'])))
+
+    wall = time.perf_counter() - start
+    print("{} books, {} configs, {} failed in {:.2f}s".format(len(results), sum(len(book['configs']) for book in results),
+                                                             len(failures), wall))
+
+    if (args.summary):
+        with open(args.summary, 'w', encoding='utf-8') as f:
+            json.dump({'date'     : datetime.now().isoformat(timespec='seconds'),
+                       'workers'  : args.workers,
+                       'wall'     : wall,
+                       'failures' : len(failures),
+                       'books'    : results}, f, indent=2)
+
+    if (failures):
+        sys.exit(1)
@@ -4,60 +4,99 @@
 #
 import argparse
 import configparser
+import sqlite3
 import sys
+import time
 import xml.etree.ElementTree as ET
 
-from pathlib import Path
-from types   import SimpleNamespace
+from App.Common.BookCache   import BookCache
+from App.Common.BookFile    import readBook
+from App.Common.Profile     import Profile
+from App.Common.FileWatcher import FileWatcher
 
-from App.Options import Options
-
-from App.ParseData_Balances import ParseData_Balance
-from App.ParseData_Changes  import ParseData_Changes
-
-from App.CreateCSV               import CreateCSV
-from App.CreateCSV_AssetCategory import CreateCSV_AssetCategory # This report type is unique.
+from App.ReportContext import ReportContext
+from App.ReportPlan    import ReportPlan
+from App.QueryService  import serve
 
 
 ## Get command line arguments.
 # @return                   Argparse object.
 def getArguments():
-    parser = argparse.ArgumentParser(description='Create simple reports from an uncompressed GNUCash file.')
+    parser = argparse.ArgumentParser(description='Create simple reports from a GNUCash XML file.')
 
     parser.add_argument('-c', '--config',
                         required = True,
                         metavar  = 'path_to_file',
                         type     = argparse.FileType('r'),
-                        help     = 'Uncompressed GNUCash file, required file to configure report options.')
+                        help     = 'Required file to configure report options.')
+
+    parser.add_argument('-i', '--input',
+                        dest     = 'input',
+                        metavar  = 'path_to_file',
+                        help     = 'GNUCash file to use instead of the one in the config file.')
 
     parser.add_argument('-v', '--verbose',
                         dest     = 'verbose',
                         action   = 'store_true',
                         help     = 'Shows some terminal output while running.')
 
-    # Update display flags.
-    options = parser.parse_args()
+    parser.add_argument('--explain',
+                        dest     = 'explain',
+                        action   = 'store_true',
+                        help     = 'Print the plan for the reports and its estimated cost, then stop.')
 
-    return options
+    parser.add_argument('--watch',
+                        dest     = 'watch',
+                        action   = 'store_true',
+                        help     = 'Keep running, remaking the reports when the GNUCash or config file is saved.')
+
+    parser.add_argument('--serve',
+                        dest     = 'serve',
+                        metavar  = 'port',
+                        type     = int,
+                        help     = 'Answer balance, change and category queries as JSON on this port instead of making reports.')
+
+    parser.add_argument('--profile',
+                        dest     = 'profile',
+                        metavar  = 'path_to_file',
+                        help     = 'Time each stage, count work done, and save both to a JSON file.')
+
+    parser.add_argument('--no-cache',
+                        dest     = 'noCache',
+                        action   = 'store_true',
+                        help     = 'Read the GNUCash file even if the config file turns on the cache.')
 
+    parser.add_argument('--clear-cache',
+                        dest     = 'clearCache',
+                        action   = 'store_true',
+                        help     = 'Delete the cached copy of the GNUCash file before running.')
+
+    parser.add_argument('-j', '--jobs',
+                        dest     = 'jobs',
+                        metavar  = 'N',
+                        type     = int,
+                        default  = 1,
+                        help     = 'Run up to N reports at the same time.')
+
+    parser.add_argument('--period-jobs',
+                        dest     = 'periodJobs',
+                        metavar  = 'N',
+                        type     = int,
+                        default  = 1,
+                        help     = 'Build the periods of each report in up to N processes.')
 
-## Open the files to write teh CSVs to.
-# @brief Create path if it doesn't exist. These should get closed in the CreateCSV* class.
-# @param[in]    filePath    String for file path.
-# @return                   Object, file to use.
-def openOutputFile(filePath):
-    filePathList = filePath.split('/')                      # Convert to list, split on path delimeter.
-    del filePathList[-1]                                    # Last element will be filename.
-    filePathString = '/'.join(filePathList)                 # Create string of path without file.
-    Path(filePathString).mkdir(parents=True, exist_ok=True) # Create directories.
+    # Update display flags.
+    options = parser.parse_args()
 
-    return filePath
+    return options
 
 
 ## Get arguments from config file if -c option.
 # @param[in]    options     Config file object from argparse.
-# @return                   An object with options for each report.
-def getConfigFile(options):
+# @param[in]    previous    Optional object from an earlier call, its book is used if the input file
+#                           is the same.
+# @return                   ReportContext object with options for each report.
+def getConfigFile(options, previous = None):
 
     print(options)
 
@@ -65,155 +104,155 @@ def getConfigFile(options):
     config = configparser.ConfigParser()
     config.read(options.config.name)
 
-    # GNUCash XML file path
-    input = open(config['GENERAL']['input'], 'r')
+    try:
+        context = ReportContext.fromConfig(config, None, options.verbose, options.periodJobs, options.input)
+    except ValueError as error:
+        print(error)
+        sys.exit()
 
-    # Show output in terminal?
-    verbose = options.verbose or config['GENERAL'].getboolean('verbose')
+    context.config = options.config
 
-    # Which reports to run
-    runAccountBalances  = config['GENERAL'].getboolean('accountBalances')
-    runAccountChanges   = config['GENERAL'].getboolean('accountChanges')
-    runAssetsByCategory = config['GENERAL'].getboolean('assetsByCategory')
-    runIncomeStatement  = config['GENERAL'].getboolean('incomeStatment')
+    # Keep a cache of what is read from the GNUCash file?
+    cache = BookCache(context.input, config['GENERAL'].get('cacheFile'))
+    if (options.clearCache):
+        cache.clear()
+    if (options.noCache or not config['GENERAL'].getboolean('cache', fallback=False)):
+        cache = None
 
-    # Where to save report CSVs
-    accountBalancesOutput  = openOutputFile(config['GENERAL']['accountBalancesOutput'])  if (runAccountBalances)  else None
-    accountChangesOutput   = openOutputFile(config['GENERAL']['accountChangesOutput'])   if (runAccountChanges)   else None
-    assetsByCategoryOutput = openOutputFile(config['GENERAL']['assetsByCategoryOutput']) if (runAssetsByCategory) else None
-    incomeStatementOutput  = openOutputFile(config['GENERAL']['incomeStatmentOutput'])   if (runIncomeStatement)  else None
+    # Read the GNUCash file
+    if (previous and previous.input == context.input):
+        context.book = previous.book
+    else:
+        with Profile.stage('parse'):
+            context.book = getBook(context.input, cache)
 
-    # Report dates, should be in pairs
-    reportDates = list(filter(None, map(lambda date: date.strip(), config['GENERAL']['dates'].split(','))))
-    if (len(reportDates) %2 != 0):
-        print("Unexpected number of dates in config file, they should be in pairs.")
-        sys.exit()
+    return context
+
+
+## Returns the GNUCash book read from the file.
+# @param[in]    filePath    Name of GNUCash XML or SQLite file.
+# @param[in]    cache       Optional BookCache object, used instead of reading the file when it's
+#                           up to date. When it's out of date the cached book is updated with only
+#                           what changed, then saved back to the cache.
+# @return                   Book object.
+def getBook(filePath, cache = None):
+    stale = None
 
-    # Balance report account paths
-    assetAccounts = list(filter(None, map(lambda account: account.strip(), config['BALANCE REPORTS']['accounts'].split(',')[::2])))
-    assetDepths   = list(filter(None, map(lambda account: account.strip(), config['BALANCE REPORTS']['accounts'].split(',')[1::2])))
-    assetDepths   = [int(numeric_string) for numeric_string in assetDepths]
-
-    # Income report account paths
-    incomeAccounts   = list(filter(None, map(lambda account: account.strip(), config['INCOME REPORTS']['accounts'].split(',')[::2])))
-    incomeDepth      = list(filter(None, map(lambda account: account.strip(), config['INCOME REPORTS']['accounts'].split(',')[1::2])))
-    incomeDepth      = [int(numeric_string) for numeric_string in incomeDepth]
-
-    return SimpleNamespace(config          = options.config,
-                           input           = input,
-                           verbose         = verbose,
-                           accountBalances  = SimpleNamespace(ReportType = 'Account Balances',
-                                                              RunReport  = runAccountBalances,
-                                                              OutputFile = accountBalancesOutput,
-                                                              Accounts   = assetAccounts,
-                                                              Depth      = assetDepths,
-                                                              Dates      = reportDates),
-                           accountChanges   = SimpleNamespace(ReportType = 'Account Changes',
-                                                              RunReport  = runAccountChanges,
-                                                              OutputFile = accountChangesOutput,
-                                                              Accounts   = assetAccounts,
-                                                              Depth      = assetDepths,
-                                                              Dates      = reportDates),
-                           assetsByCategory = SimpleNamespace(ReportType = 'Assets by Category',
-                                                              RunReport  = runAssetsByCategory,
-                                                              OutputFile = assetsByCategoryOutput,
-                                                              Accounts   = assetAccounts,
-                                                              Depth      = assetDepths,
-                                                              Dates      = reportDates),
-                           incomeStatement  = SimpleNamespace(ReportType = 'Income Statement',
-                                                              RunReport  = runIncomeStatement,
-                                                              OutputFile = incomeStatementOutput,
-                                                              Accounts   = incomeAccounts,
-                                                              Depth      = incomeDepth,
-                                                              Dates      = reportDates),
-                           GNUCashXML = getParsedXML(input.name),
-                           namespaces = getNamespaces() )
-
-
-## Returns the GNUCash XML as an ElementTree object.
-# @param[in]    filename    Name of uncompressed GNUCash xml file.
-# @return                   ElementTree object.
-def getParsedXML(filename):
     try:
-        tree = ET.parse(filename)
-    except ET.ParseError as err:
-        print("ERROR: Unable to read GNUCash file. Is it saved as an uncompressed XML?")
+        if (cache):
+            book = cache.load()
+            if (book is not None):
+                Profile.count('bookCacheHits')
+                return book
+
+            Profile.count('bookCacheMisses')
+            stale = cache.stale
+
+        book, _ = readBook(filePath, stale)
+
+    except (ET.ParseError, OSError, EOFError, sqlite3.Error):
+        print("ERROR: Unable to read GNUCash file. Is it saved as XML (compressed or not) or SQLite?")
         sys.exit()
 
-    return tree.getroot()
-
-
-## Return an object of namespaces.
-# @return                   Dictonary suitable for use with ElementTree.
-def getNamespaces():
-
-    # Wasn't able to get element tree to return the root attributes. These shouldn't change often.
-    return {
-        'gnc'        : 'http://www.gnucash.org/XML/gnc',
-        'act'        : 'http://www.gnucash.org/XML/act',
-        'book'       : 'http://www.gnucash.org/XML/book',
-        'cd'         : 'http://www.gnucash.org/XML/cd',
-        'cmdty'      : 'http://www.gnucash.org/XML/cmdty',
-        'price'      : 'http://www.gnucash.org/XML/price',
-        'slot'       : 'http://www.gnucash.org/XML/slot',
-        'split'      : 'http://www.gnucash.org/XML/split',
-        'sx'         : 'http://www.gnucash.org/XML/sx',
-        'trn'        : 'http://www.gnucash.org/XML/trn',
-        'ts'         : 'http://www.gnucash.org/XML/ts',
-        'fs'         : 'http://www.gnucash.org/XML/fs',
-        'bgt'        : 'http://www.gnucash.org/XML/bgt',
-        'recurrence' : 'http://www.gnucash.org/XML/recurrence',
-        'lot'        : 'http://www.gnucash.org/XML/lot',
-        'addr'       : 'http://www.gnucash.org/XML/addr',
-        'billterm'   : 'http://www.gnucash.org/XML/billterm',
-        'bt-days'    : 'http://www.gnucash.org/XML/bt-days',
-        'bt-prox'    : 'http://www.gnucash.org/XML/bt-prox',
-        'cust'       : 'http://www.gnucash.org/XML/cust',
-        'employee'   : 'http://www.gnucash.org/XML/employee',
-        'entry'      : 'http://www.gnucash.org/XML/entry',
-        'invoice'    : 'http://www.gnucash.org/XML/invoice',
-        'job'        : 'http://www.gnucash.org/XML/job',
-        'order'      : 'http://www.gnucash.org/XML/order',
-        'owner'      : 'http://www.gnucash.org/XML/owner',
-        'taxtable'   : 'http://www.gnucash.org/XML/taxtable',
-        'tte'        : 'http://www.gnucash.org/XML/tte',
-        'vendor'     : 'http://www.gnucash.org/XML/vendor'
-    }
+    if (cache):
+        cache.save(book)
+
+    return book
+
+
+## Keeps the book in memory and remakes reports each time the GNUCash or config file is saved.
+# @brief The GNUCash file is updated with only what changed and only reports that would come out
+#        different are written again. A changed config file remakes every report, reusing the book if
+#        the input file is the same. Files that can't be read are reported and tried again the next
+#        time they are saved. Runs until interrupted.
+# @param[in]    args        Argparse object.
+# @param[in]    opts        ReportContext object with options for each report, from getConfigFile().
+# @param[in]    jobs        Integer, most jobs to run at once.
+def watchReports(args, opts, jobs = 1):
+    watcher = FileWatcher([opts.input, args.config.name])
+    broken  = False     # Last read of the GNUCash file failed, it has to be read from scratch.
+
+    print("Watching {} and {} for changes, Ctrl+C to stop.".format(opts.input, args.config.name))
+
+    while (True):
+        changed = watcher.wait()
+        start   = time.perf_counter()
+        book    = opts.book
+        changes = None      # What changed in the book, when only the book changed.
+
+        if (args.config.name in changed):
+            try:
+                opts = getConfigFile(args, None if (broken) else opts)
+            except SystemExit:
+                print("ERROR: Unable to read config file, using the last one.")
+                continue
+            except (KeyError, ValueError, configparser.Error) as err:
+                print("ERROR: Unable to read config file, using the last one. {}".format(err))
+                continue
+
+            broken = False
+            watcher.watch([opts.input, args.config.name])
+
+        # Unless the config file pointed at another file, or it was just read from scratch.
+        if (opts.input in changed and opts.book is book):
+            try:
+                with Profile.stage('parse'):
+                    opts.book, bookChanges = readBook(opts.input, None if (broken) else opts.book)
+            except (ET.ParseError, OSError, EOFError, sqlite3.Error) as err:
+                print("ERROR: Unable to read GNUCash file, will try again when it is saved. {}".format(err))
+                broken = True
+                continue
+
+            broken = False
+            if (args.config.name not in changed):
+                changes = bookChanges
+
+        plan = ReportPlan(opts)
+        if (changes is not None):
+            plan = ReportPlan(opts, plan.affectedBy(changes))
+
+        plan.run(jobs)
+
+        names = [getattr(opts, reportName).ReportType for reportName in plan.treeKeys]
+        print("{}: {} in {:.2f}s".format(time.strftime('%H:%M:%S'),
+                                        ', '.join(names) if (names) else 'No reports changed',
+                                        time.perf_counter() - start))
 
 
 # Start here.
 if __name__ == '__main__':
 
     # Report options set by commonad line and/or config file.
-    opts = getArguments()
-    opts = getConfigFile(opts)
-    Options.set(opts)   # Make these "global".
-
-    # Obj contains GNUCash data from use beginnig of file to end date.
-    BalanceObj = None
-    if (opts.accountBalances.RunReport or opts.assetsByCategory.RunReport):
-        BalanceObj = ParseData_Balance(opts.accountBalances.Accounts)
-
-    # Create Account Balances report
-    if (opts.accountBalances.RunReport):
-        if (opts.verbose):
-            print("\n== Running Account Balances ==")
-        CreateCSV(BalanceObj, opts.accountBalances)
-
-    # Create Account Changes report, uses begining and end date.
-    if (opts.accountChanges.RunReport):
-        if (opts.verbose):
-            print("\n== Running Account Changes ==")
-        CreateCSV(ParseData_Changes(), opts.accountChanges)
-
-    # Create Assets by Category report
-    if (opts.assetsByCategory.RunReport):
-        if (opts.verbose):
-            print("\n== Running Assets by Category ==")
-        CreateCSV_AssetCategory(BalanceObj, opts.assetsByCategory)
-
-    # Create Income Statement report
-    if (opts.incomeStatement.RunReport):
-        if (opts.verbose):
-            print("\n== Running Income Statement ==")
-        CreateCSV(ParseData_Balance(opts.incomeStatement.Accounts), opts.incomeStatement)
+    args = getArguments()
+    Profile.enabled = bool(args.profile)
+    start = time.perf_counter(), time.process_time()
+
+    opts = getConfigFile(args)
+
+    # Work out what the reports share before running any of them.
+    plan = ReportPlan(opts)
+
+    if (args.explain):
+        plan.explain()
+    elif (args.serve is not None):
+        try:
+            serve(opts, args.serve)
+        except KeyboardInterrupt:
+            pass
+    else:
+        plan.run(args.jobs)
+
+    if (args.watch and not args.explain and args.serve is None):
+        try:
+            watchReports(args, opts, args.jobs)
+        except KeyboardInterrupt:
+            pass
+
+    # CPU time is this process only, time in --jobs workers is in the stages.
+    if (args.profile):
+        Profile.write(args.profile, {'input'      : opts.input,
+                                     'engine'     : opts.engine,
+                                     'jobs'       : args.jobs,
+                                     'periodJobs' : args.periodJobs,
+                                     'wall'       : time.perf_counter() - start[0],
+                                     'cpu'        : time.process_time() - start[1]})
@@ -0,0 +1,47 @@
+##
+# @file
+# Helpers shared by the tests.
+#
+# Run from the top folder: python -m pytest Tests
+#
+
+import configparser
+import csv
+import os
+
+## Top folder of the repository.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+## Example book and config file.
+EXAMPLE_BOOK   = os.path.join(ROOT, 'example_accounts.gnucash')
+EXAMPLE_CONFIG = os.path.join(ROOT, 'example_config.ini')
+
+## Report output settings, in the order the CSVs are compared.
+OUTPUTS = ('accountBalancesOutput', 'accountChangesOutput', 'assetsByCategoryOutput', 'incomeStatmentOutput')
+
+
+## Reads the example config file with the CSVs saved to another folder.
+# @param[in]    folder          **String**, folder to save the CSVs in.
+# @param[in]    general         Settings to change under [GENERAL], like dates.
+# @return                       **ConfigParser Object**.
+def makeConfig(folder, **general):
+    config = configparser.ConfigParser()
+    config.read(EXAMPLE_CONFIG)
+
+    config['GENERAL']['input']   = EXAMPLE_BOOK
+    config['GENERAL']['verbose'] = 'no'
+    for output in OUTPUTS:
+        config['GENERAL'][output] = os.path.join(folder, os.path.basename(config['GENERAL'][output])).replace(os.sep, '/')
+
+    for key, value in general.items():
+        config['GENERAL'][key] = value
+
+    return config
+
+
+## Reads a CSV written by a report.
+# @param[in]    filePath        **String**, CSV file.
+# @return                       **List** of rows, each a **List** of Strings.
+def readCSV(filePath):
+    with open(filePath, newline='', encoding='utf-8') as f:
+        return list(csv.reader(f))
@@ -0,0 +1,97 @@
+##
+# @file
+# Tests the accounts picked by account selectors.
+#
+
+import unittest
+
+from types import SimpleNamespace
+
+from App.Common.AccountPaths import AccountPaths
+from App.Common.BookFile     import readBook
+from Tests.common            import EXAMPLE_BOOK
+
+
+## Account Registry Tests
+# @brief Selectors with wildcards and regular expressions on the example book.
+class AccountRegistryTest(unittest.TestCase):
+
+    ## Reads the book.
+    @classmethod
+    def setUpClass(cls):
+        cls.book, _  = readBook(EXAMPLE_BOOK)
+        cls.registry = cls.book.registry
+
+
+    ## GUIDs of accounts.
+    # @param[in]    paths           **List** of full account paths.
+    # @return                       **List** of GUIDs, in the same order.
+    def ids(self, paths):
+        return [self.registry.byPath[path][-1] for path in paths]
+
+
+    ## GUIDs of the accounts a selector picks.
+    # @param[in]    selector        **String**, account selector.
+    # @return                       **List** of GUIDs, in the order they were picked.
+    def select(self, selector):
+        selected = self.registry.select(selector)
+
+        # Each path's GUIDs are the accounts from the root down to it.
+        for path, accountIds in selected:
+            self.assertEqual(self.registry.byPath[path], accountIds)
+
+        return [accountIds[-1] for path, accountIds in selected]
+
+
+    ## A full path is one account.
+    def test_path(self):
+        self.assertEqual(self.select('Assets:Investments:Vanguard'), self.ids(['Assets:Investments:Vanguard']))
+
+
+    ## * is any name.
+    def test_star(self):
+        self.assertEqual(self.select('Assets:Investments:*'),
+                         self.ids(['Assets:Investments:Fidelity', 'Assets:Investments:Vanguard']))
+        self.assertEqual(sorted(self.select('*:Other')), sorted(self.ids(['Assets:Other', 'Liabilities:Other'])))
+
+
+    ## ? is any one character.
+    def test_question(self):
+        self.assertEqual(self.select('Assets:Investments:Vanguard:???'), self.ids(['Assets:Investments:Vanguard:VOO']))
+        self.assertEqual(sorted(self.select('Assets:Investments:*:????')),
+                         sorted(self.ids(['Assets:Investments:Fidelity:AMZN', 'Assets:Investments:Fidelity:BABA',
+                                          'Assets:Investments:Vanguard:MSFT', 'Assets:Investments:Vanguard:NVDA'])))
+
+
+    ## A regular expression picks every path it is found in, but not accounts below one already picked.
+    def test_regex(self):
+        self.assertEqual(sorted(self.select('re:_Cash Balance$')),
+                         sorted(self.ids(['Assets:Investments:Fidelity:_Cash Balance',
+                                          'Assets:Investments:Vanguard:_Cash Balance'])))
+        self.assertEqual(self.select('re:^Assets:Speculative'), self.ids(['Assets:Speculative Investments']))
+
+
+    ## Selectors that find nothing.
+    def test_nothing(self):
+        for selector in ('Assets:Nothing', 'Assets:Nothing*', 'Assets:*:Nothing', 're:^Nothing'):
+            self.assertEqual(self.select(selector), [])
+
+
+    ## An account found by more than one selector is only kept for the first one, selectors that find
+    #  nothing are listed.
+    def test_overlapping(self):
+        paths = AccountPaths(SimpleNamespace(book=self.book),
+                             ['Assets:Investments:*', 're:Fidelity', 'Assets:Investments:Vanguard:VOO', 'Assets:Nothing*'])
+
+        self.assertEqual([path[-1] for path in paths.pathsByGUID],
+                         self.ids(['Assets:Investments:Fidelity', 'Assets:Investments:Vanguard',
+                                   'Assets:Investments:Vanguard:VOO']))
+        self.assertEqual(paths.paths, ['Assets:Investments:Fidelity', 'Assets:Investments:Vanguard',
+                                       'Assets:Investments:Vanguard:VOO'])
+        self.assertEqual(paths.sources, [0, 0, 2])
+        self.assertEqual(paths.unmatched, ['Assets:Nothing*'])
+        self.assertFalse(paths.verified)
+
+
+if __name__ == '__main__':
+    unittest.main()
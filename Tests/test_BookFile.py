@@ -0,0 +1,73 @@
+##
+# @file
+# Tests that compressed GNUCash files that can't be read give an error instead of a traceback.
+#
+
+import contextlib
+import gzip
+import io
+import os
+import tempfile
+import unittest
+
+from App.Common.BookFile    import readBook
+from GNUCashReport          import getBook
+from Tests.common           import EXAMPLE_BOOK
+
+
+## Book File Tests
+# @brief The example book compressed, then broken.
+class BookFileTest(unittest.TestCase):
+
+    ## Compresses the example book.
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        with open(EXAMPLE_BOOK, 'rb') as f:
+            self.data = gzip.compress(f.read())
+
+
+    ## Removes the files.
+    def tearDown(self):
+        self.folder.cleanup()
+
+
+    ## Writes a compressed book.
+    # @param[in]    name            **String**, file name.
+    # @param[in]    data            **Bytes**, the compressed file.
+    # @return                       **String**, path of the file.
+    def writeBook(self, name, data):
+        filePath = os.path.join(self.folder.name, name)
+        with open(filePath, 'wb') as f:
+            f.write(data)
+
+        return filePath
+
+
+    ## A file with part of its deflate stream overwritten.
+    # @return                       **String**, path of the file.
+    def corruptBook(self):
+        data = bytearray(self.data)
+        for index in range(40, 56):
+            data[index] ^= 0xff
+
+        return self.writeBook('corrupt.gnucash.gz', bytes(data))
+
+
+    ## A corrupt deflate stream is an OSError, like other files that can't be read.
+    def test_corrupt(self):
+        with self.assertRaises(OSError):
+            readBook(self.corruptBook())
+
+
+    ## The command line prints an error and stops, for corrupt and truncated files.
+    def test_getBook(self):
+        for filePath in (self.corruptBook(), self.writeBook('truncated.gnucash.gz', self.data[:len(self.data) // 2])):
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output), self.assertRaises(SystemExit):
+                getBook(filePath)
+
+            self.assertIn('ERROR: Unable to read GNUCash file', output.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+##
+# @file
+# Tests that a GNUCash SQLite book reads and reports the same as the XML of the same book.
+#
+
+import os
+import tempfile
+import unittest
+
+from App.Reports            import generate_reports
+from App.Common.BookFile    import readBook
+from App.Common.BookSQLite  import BookSQLite
+from Benchmarks.GenerateBook import generateBook
+from Tests.common           import makeConfig, readCSV
+
+
+## Book SQLite Tests
+# @brief A small generated book is written as both XML and SQLite.
+class BookSQLiteTest(unittest.TestCase):
+
+    ## Settings of the generated book.
+    settings = {'depth' : 2, 'width' : 2, 'transactions' : 400, 'splits' : 3, 'commodities' : 4, 'prices' : 20,
+                'years' : 2, 'seed' : 7}
+
+    ## Writes the books.
+    @classmethod
+    def setUpClass(cls):
+        cls.folder = tempfile.TemporaryDirectory()
+        cls.xml    = os.path.join(cls.folder.name, 'book.gnucash')
+        cls.sqlite = os.path.join(cls.folder.name, 'book.sqlite.gnucash')
+
+        generateBook(cls.xml, **cls.settings)
+        generateBook(cls.sqlite, sqlite=True, **cls.settings)
+
+
+    ## Removes the books.
+    @classmethod
+    def tearDownClass(cls):
+        cls.folder.cleanup()
+
+
+    ## Makes every report of a book.
+    # @param[in]    book            **Book Object**, or path of the GNUCash file.
+    # @param[in]    engine          **Optional String**, python or numpy.
+    # @return                       **Dictonary** of report type to the rows of its CSV.
+    def makeReports(self, book, engine = 'python'):
+        with tempfile.TemporaryDirectory() as folder:
+            config = makeConfig(folder, dates='quarterly 2024-01..2025-12, yearly 2024..2025', engine=engine)
+            config['BALANCE REPORTS']['accounts'] = 'Assets, 2, Liabilities, 2'
+            config['INCOME REPORTS']['accounts']  = 'Expenses, 1, Income, 1'
+
+            return {name : readCSV(path) for name, path in generate_reports(book, config).items()}
+
+
+    ## Both files are read into the same records.
+    def test_records(self):
+        xmlBook, _    = readBook(self.xml)
+        sqliteBook, _ = readBook(self.sqlite)
+
+        self.assertIsInstance(sqliteBook, BookSQLite)
+        self.assertNotIsInstance(xmlBook, BookSQLite)
+
+        self.assertEqual(sqliteBook.accounts, xmlBook.accounts)
+        self.assertEqual(sqliteBook.prices, xmlBook.prices)
+        self.assertEqual([(commodity.space, commodity.id, commodity.name) for commodity in sqliteBook.commodities],
+                         [(commodity.space, commodity.id, commodity.name) for commodity in xmlBook.commodities])
+        self.assertEqual(sqliteBook.scale, xmlBook.scale)
+
+        # Date entered is kept as GNUCash saved it, that differs between the formats.
+        self.assertEqual([(transaction.id, transaction.currencyId, transaction.datePosted, transaction.splits)
+                          for transaction in sqliteBook.transactions],
+                         [(transaction.id, transaction.currencyId, transaction.datePosted, transaction.splits)
+                          for transaction in xmlBook.transactions])
+
+
+    ## Both files make the same CSVs, whichever engine the XML book is summed with.
+    def test_reports(self):
+        sqliteReports = self.makeReports(self.sqlite)
+
+        self.assertEqual(len(sqliteReports), 4)
+        self.assertEqual(sqliteReports, self.makeReports(self.xml))
+        self.assertEqual(sqliteReports, self.makeReports(self.xml, engine='numpy'))
+
+
+if __name__ == '__main__':
+    unittest.main()
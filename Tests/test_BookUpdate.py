@@ -0,0 +1,144 @@
+##
+# @file
+# Tests that a book updated with only what changed in its file is the same as the file read again.
+#
+
+import os
+import pickle
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+
+from datetime import datetime
+
+from App.Common.Book        import NAMESPACES
+from App.Common.BookFile    import readBook
+from Tests.common           import EXAMPLE_BOOK
+
+
+## Book Update Tests
+# @brief The example book is read, changed and saved, then the book read before is updated from it.
+class BookUpdateTest(unittest.TestCase):
+
+    ## Month ends of the year the example book covers.
+    periods = [(datetime(2020, month, 1), datetime(2020 + month // 12, month % 12 + 1, 1)) for month in range(1, 13)]
+
+    ## Reads the example book, then changes it.
+    def setUp(self):
+        self.folder   = tempfile.TemporaryDirectory()
+        self.filePath = os.path.join(self.folder.name, 'book.gnucash')
+
+        for prefix, uri in NAMESPACES.items():
+            ET.register_namespace(prefix, uri)
+
+        self.tree = ET.parse(EXAMPLE_BOOK)
+        self.book = self.tree.getroot().find('gnc:book', NAMESPACES)
+        self.stale, _ = readBook(EXAMPLE_BOOK)
+
+
+    ## Removes the files.
+    def tearDown(self):
+        self.folder.cleanup()
+
+
+    ## Saves the changed book and updates the book read before from it.
+    # @return                       **Tuple** of the updated book, its BookChanges, and the file read again.
+    def update(self):
+        self.tree.write(self.filePath, encoding='utf-8', xml_declaration=True)
+
+        book, changes = readBook(self.filePath, self.stale)
+        fresh, _      = readBook(self.filePath)
+
+        return book, changes, fresh
+
+
+    ## Accounts of a transaction element's splits.
+    # @param[in]    elem            **Element**, gnc:transaction.
+    # @return                       **Set** of account GUIDs.
+    def splitAccounts(self, elem):
+        return {split.findtext('split:account', None, NAMESPACES)
+                for split in elem.iterfind('trn:splits/trn:split', NAMESPACES)}
+
+
+    ## Adds to the numerator of a fraction string, keeping its denominator.
+    # @param[in]    elem            **Element** holding a fraction like "12345/100".
+    # @param[in]    amount          **Integer** to add.
+    def addTo(self, elem, amount):
+        numerator, denominator = elem.text.split('/')
+        elem.text = '{}/{}'.format(int(numerator) + amount, denominator)
+
+
+    ## Checks everything built from the records matches a book read from scratch.
+    # @param[in]    book            **Book Object**, updated.
+    # @param[in]    fresh           **Book Object**, read from scratch.
+    def assertSameBook(self, book, fresh):
+        self.assertEqual(book.scale, fresh.scale)
+        self.assertEqual(book.transactions, fresh.transactions)
+        self.assertEqual(book.prices, fresh.prices)
+
+        # Transactions on the same day can be in another order, the windows between days can't.
+        self.assertEqual(book.transactionIndex.dates, fresh.transactionIndex.dates)
+        for startDate, endDate in self.periods:
+            self.assertEqual(sorted(transaction.id for transaction in book.transactionIndex.window(endDate, startDate)),
+                             sorted(transaction.id for transaction in fresh.transactionIndex.window(endDate, startDate)))
+
+        self.assertEqual(book.priceHistory.dates, fresh.priceHistory.dates)
+        self.assertEqual(book.priceHistory.values, fresh.priceHistory.values)
+
+        self.assertEqual(set(book.ledger.dates), set(fresh.ledger.dates))
+        for accountId in fresh.ledger.dates:
+            for startDate, endDate in self.periods:
+                self.assertEqual(book.ledger.sum(accountId, endDate, startDate), fresh.ledger.sum(accountId, endDate, startDate))
+
+        for engine in ('python', 'numpy'):
+            for changes in (False, True):
+                self.assertEqual(book.periodSums(self.periods, changes=changes, engine=engine).get(),
+                                 fresh.periodSums(self.periods, changes=changes, engine=engine).get())
+
+
+    ## A transaction deleted, a split changed and a price changed.
+    def test_update(self):
+        transactions = self.book.findall('gnc:transaction', NAMESPACES)
+        deleted      = transactions[5]
+        changed      = transactions[10]
+        price        = self.book.find('gnc:pricedb/price', NAMESPACES)
+
+        self.book.remove(deleted)
+        split = changed.find('trn:splits/trn:split', NAMESPACES)
+        self.addTo(split.find('split:value', NAMESPACES), 1234)
+        self.addTo(split.find('split:quantity', NAMESPACES), 1234)
+        self.addTo(price.find('price:value', NAMESPACES), 7)
+
+        # Built, so it is updated too.
+        self.stale.ledger
+
+        book, changes, fresh = self.update()
+
+        self.assertIs(book, self.stale)
+        self.assertFalse(changes.structure)
+        self.assertEqual(changes.accounts, self.splitAccounts(deleted) | self.splitAccounts(changed))
+        self.assertEqual(changes.commodities, {price.findtext('price:commodity/cmdty:id', None, NAMESPACES)})
+        self.assertSameBook(book, fresh)
+
+
+    ## The ledger is only built when asked for, and isn't saved with the book.
+    def test_ledger(self):
+        self.assertIsNone(self.stale.builtLedger)
+
+        ledger = self.stale.ledger
+        self.assertIs(self.stale.ledger, ledger)
+        self.assertIsNone(pickle.loads(pickle.dumps(self.stale)).builtLedger)
+
+
+    ## Nothing changed.
+    def test_unchanged(self):
+        book, changes, fresh = self.update()
+
+        self.assertFalse(changes.structure)
+        self.assertEqual(changes.accounts, set())
+        self.assertEqual(changes.commodities, set())
+        self.assertSameBook(book, fresh)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+##
+# @file
+# Tests the columns of CSVs with more than one top level account.
+#
+
+import os
+import tempfile
+import unittest
+
+from App.Reports            import generate_reports
+from Tests.common           import EXAMPLE_BOOK, makeConfig, readCSV
+
+
+## Create CSV Tests
+# @brief Account Balances of the example book, with a different depth for each top level account.
+class CreateCSVTest(unittest.TestCase):
+
+    ## Makes the Account Balances CSV.
+    # @param[in]    accounts        **String**, accounts and depths like the config file's.
+    # @return                       **List** of rows.
+    def makeBalances(self, accounts):
+        with tempfile.TemporaryDirectory() as folder:
+            config = makeConfig(folder)
+            config['BALANCE REPORTS']['accounts'] = accounts
+
+            return readCSV(generate_reports(EXAMPLE_BOOK, config)['Account Balances'])
+
+
+    ## Drops the empty cells at the end of each row, header rows are only as long as their names.
+    # @param[in]    rows            **List** of rows.
+    # @return                       **List** of rows.
+    def trim(self, rows):
+        trimmed = []
+
+        for row in rows:
+            while (row and row[-1] == ''):
+                row = row[:-1]
+            trimmed.append(row)
+
+        return trimmed
+
+
+    ## CSVs of top level accounts on their own, side by side. Header rows line up from the top, a
+    #  report without as many has empty cells under its last one.
+    # @param[in]    reports         **List** of CSVs, each a **List** of rows from makeBalances().
+    # @return                       **List** of rows.
+    def sideBySide(self, reports):
+        headers = [[row for row in report if (row[0] == '')] for report in reports]
+        periods = [[row for row in report if (row[0] != '')] for report in reports]
+        widths  = [max(len(row) for row in report) - 1 for report in reports]
+        rows    = []
+
+        for index in range(max(len(header) for header in headers)):
+            row = ['']
+            for header, width in zip(headers, widths):
+                cells = header[index][1:] if (index < len(header)) else []
+                row.extend((cells + [''] * width)[:width])
+            rows.append(row)
+
+        for index, date in enumerate(row[0] for row in periods[0]):
+            row = [date]
+            for period, width in zip(periods, widths):
+                row.extend((period[index][1:] + [''] * width)[:width])
+            rows.append(row)
+
+        return self.trim(rows)
+
+
+    ## A top level account not as deep as the others keeps its own columns, either way around.
+    def test_mixedDepths(self):
+        investments = self.makeBalances('Assets:Investments, 2')
+        liabilities = self.makeBalances('Liabilities, 1')
+
+        self.assertEqual(self.trim(self.makeBalances('Assets:Investments, 2, Liabilities, 1')),
+                         self.sideBySide([investments, liabilities]))
+        self.assertEqual(self.trim(self.makeBalances('Liabilities, 1, Assets:Investments, 2')),
+                         self.sideBySide([liabilities, investments]))
+
+
+    ## Accounts with the same name under different top level accounts each have a column.
+    def test_sameNames(self):
+        rows = self.trim(self.makeBalances('Assets, 1, Liabilities, 1'))
+
+        self.assertEqual(rows[1].count('Other'), 2)
+        self.assertEqual(rows, self.sideBySide([self.makeBalances('Assets, 1'), self.makeBalances('Liabilities, 1')]))
+
+
+if __name__ == '__main__':
+    unittest.main()
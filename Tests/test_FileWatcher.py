@@ -0,0 +1,178 @@
+##
+# @file
+# Tests that files are only seen as changed once they're saved, and that --watch remakes only the
+# reports a saved book changes.
+#
+
+import os
+import queue
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+import xml.etree.ElementTree as ET
+
+from App.Common.Book        import NAMESPACES
+from App.Common.FileWatcher import FileWatcher
+from Tests.common           import EXAMPLE_BOOK, OUTPUTS, ROOT, makeConfig
+
+
+## File Watcher Tests
+# @brief Polls files in a temporary folder.
+class FileWatcherTest(unittest.TestCase):
+
+    ## Makes the folder.
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+
+
+    ## Removes the folder.
+    def tearDown(self):
+        self.folder.cleanup()
+
+
+    ## Writes a file.
+    # @param[in]    filePath        **String**, file to write.
+    # @param[in]    text            **String**, what to write.
+    def write(self, filePath, text):
+        with open(filePath, 'w') as f:
+            f.write(text)
+
+
+    ## A file changes after it stops changing for one poll, and only once.
+    def test_poll(self):
+        filePath = os.path.join(self.folder.name, 'book.gnucash')
+        missing  = os.path.join(self.folder.name, 'missing.gnucash')
+        self.write(filePath, 'first')
+
+        watcher = FileWatcher([filePath, missing])
+        self.assertEqual(watcher.poll(), set())
+
+        self.write(filePath, 'second save')
+        self.assertEqual(watcher.poll(), set())         # Still being saved, as far as it knows.
+        self.assertEqual(watcher.poll(), {filePath})
+        self.assertEqual(watcher.poll(), set())
+
+        # Removed while being saved again isn't a change.
+        os.remove(filePath)
+        self.assertEqual(watcher.poll(), set())
+        self.assertEqual(watcher.poll(), set())
+
+
+## Watch Reports Tests
+# @brief The command line with --watch, on a copy of the example book that is saved while it runs.
+class WatchReportsTest(unittest.TestCase):
+
+    ## Seconds to wait for the reports to be made.
+    timeout = 30
+
+    ## Starts watching a copy of the example book.
+    def setUp(self):
+        self.folder   = tempfile.TemporaryDirectory()
+        self.bookPath = os.path.join(self.folder.name, 'book.gnucash')
+        shutil.copyfile(EXAMPLE_BOOK, self.bookPath)
+
+        self.config = makeConfig(self.folder.name, input=self.bookPath)
+        configPath  = os.path.join(self.folder.name, 'config.ini')
+        with open(configPath, 'w') as f:
+            self.config.write(f)
+
+        self.process = subprocess.Popen([sys.executable, '-u', 'GNUCashReport.py', '-c', configPath, '--watch'],
+                                        cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+
+        # Lines are read in a thread so waiting for one can time out.
+        self.lines  = queue.Queue()
+        self.reader = threading.Thread(target=lambda: [self.lines.put(line.rstrip()) for line in self.process.stdout])
+        self.reader.start()
+
+        self.waitFor('Watching ')
+
+
+    ## Stops watching.
+    def tearDown(self):
+        self.process.terminate()
+        self.process.wait()
+        self.reader.join()
+        self.process.stdout.close()
+        self.folder.cleanup()
+
+
+    ## Waits for a line of output.
+    # @param[in]    start           **String**, regular expression the line starts with.
+    # @return                       **String**, the line.
+    def waitFor(self, start):
+        deadline = time.monotonic() + self.timeout
+
+        while (True):
+            try:
+                line = self.lines.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                self.fail("No line starting with {!r}".format(start))
+
+            if (re.match(start, line)):
+                return line
+
+
+    ## Waits for the reports to be made again.
+    # @return                       **List** of the report types made.
+    def waitForReports(self):
+        line = self.waitFor(r'\d\d:\d\d:\d\d: ')
+        return line.split(': ', 1)[1].rsplit(' in ', 1)[0].split(', ')
+
+
+    ## Modification times of the CSVs.
+    # @return                       **Dictonary** of CSV path to its modification time.
+    def modified(self):
+        return {self.config['GENERAL'][output] : os.stat(self.config['GENERAL'][output]).st_mtime_ns
+                for output in OUTPUTS}
+
+
+    ## Saves the book with its first price changed.
+    # @param[in]    amount          **Integer** to add to the price's numerator.
+    def savePrice(self, amount):
+        for prefix, uri in NAMESPACES.items():
+            ET.register_namespace(prefix, uri)
+
+        tree  = ET.parse(EXAMPLE_BOOK)
+        price = tree.getroot().find('gnc:book/gnc:pricedb/price/price:value', NAMESPACES)
+
+        numerator, denominator = price.text.split('/')
+        price.text = '{}/{}'.format(int(numerator) + amount, denominator)
+
+        tree.write(self.bookPath, encoding='utf-8', xml_declaration=True)
+
+
+    ## Only the reports of accounts with a changed price are written again, a broken save is reported
+    #  and the next save remakes everything.
+    def test_watch(self):
+        before = self.modified()
+
+        # The price is of gold, only in the balance reports.
+        self.savePrice(1000)
+        self.assertEqual(self.waitForReports(), ['Account Balances', 'Assets by Category'])
+
+        after   = self.modified()
+        written = {os.path.basename(self.config['GENERAL'][output]) for output in OUTPUTS
+                   if (after[self.config['GENERAL'][output]] != before[self.config['GENERAL'][output]])}
+        self.assertEqual(written, {os.path.basename(self.config['GENERAL']['accountBalancesOutput']),
+                                   os.path.basename(self.config['GENERAL']['assetsByCategoryOutput'])})
+
+        # Half a file, like a save that didn't finish.
+        with open(EXAMPLE_BOOK, 'rb') as f:
+            data = f.read()
+        with open(self.bookPath, 'wb') as f:
+            f.write(data[:len(data) // 2])
+        self.waitFor(r'ERROR: Unable to read GNUCash file, will try again when it is saved\.')
+        self.assertIsNone(self.process.poll())
+
+        # The book the reports were made from is gone, it's read from scratch.
+        self.savePrice(2000)
+        self.assertEqual(self.waitForReports(), ['Account Balances', 'Account Changes', 'Assets by Category', 'Income Statement'])
+
+
+if __name__ == '__main__':
+    unittest.main()
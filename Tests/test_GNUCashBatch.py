@@ -0,0 +1,93 @@
+##
+# @file
+# Tests that a batch makes the reports of every config that works, even when others don't.
+#
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from Tests.common           import OUTPUTS, ROOT, makeConfig
+
+
+## GNUCash Batch Tests
+# @brief Runs the batch command line on a manifest of configs for the example book.
+class GNUCashBatchTest(unittest.TestCase):
+
+    ## Makes the folder.
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+
+
+    ## Removes the folder.
+    def tearDown(self):
+        self.folder.cleanup()
+
+
+    ## Saves a config file with its CSVs in their own folder.
+    # @param[in]    name            **String**, name of the config and its folder.
+    # @param[in]    general         Settings to change under [GENERAL].
+    # @return                       **Tuple** of the config path and **ConfigParser Object**.
+    def saveConfig(self, name, **general):
+        folder = os.path.join(self.folder.name, name)
+        os.mkdir(folder)
+
+        config     = makeConfig(folder, **general)
+        configPath = os.path.join(self.folder.name, name + '.ini')
+        with open(configPath, 'w') as f:
+            config.write(f)
+
+        return configPath, config
+
+
+    ## Reads the CSVs of a config.
+    # @param[in]    config          **ConfigParser Object**.
+    # @return                       **Dictonary** of CSV file name to its bytes.
+    def readOutputs(self, config):
+        files = {}
+        for output in OUTPUTS:
+            with open(config['GENERAL'][output], 'rb') as f:
+                files[os.path.basename(f.name)] = f.read()
+
+        return files
+
+
+    ## The good config makes the same CSVs as GNUCashReport.py, the broken one is a failure.
+    def test_brokenConfig(self):
+        goodPath, good     = self.saveConfig('good')
+        brokenPath, broken = self.saveConfig('broken', dates='every other tuesday')
+        singlePath, single = self.saveConfig('single')
+
+        manifestPath = os.path.join(self.folder.name, 'manifest.txt')
+        summaryPath  = os.path.join(self.folder.name, 'summary.json')
+        with open(manifestPath, 'w') as f:
+            f.write("# The broken config comes first so the good one has to run after it.\n")
+            f.write("{}\n{}\n".format(brokenPath, goodPath))
+
+        batch = subprocess.run([sys.executable, 'GNUCashBatch.py', manifestPath, '--workers', '2', '--summary', summaryPath],
+                               cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        self.assertEqual(batch.returncode, 1, batch.stdout)
+        self.assertIn("1 books, 2 configs, 1 failed", batch.stdout)
+
+        subprocess.run([sys.executable, 'GNUCashReport.py', '-c', singlePath],
+                       cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+        self.assertEqual(self.readOutputs(good), self.readOutputs(single))
+
+        for output in OUTPUTS:
+            self.assertFalse(os.path.exists(broken['GENERAL'][output]))
+
+        with open(summaryPath, encoding='utf-8') as f:
+            summary = json.load(f)
+
+        configs = {config['config'] : config for book in summary['books'] for config in book['configs']}
+        self.assertEqual(summary['failures'], 1)
+        self.assertTrue(configs[brokenPath]['error'])
+        self.assertIsNone(configs[goodPath]['error'])
+        self.assertEqual(len(configs[goodPath]['reports']), len(OUTPUTS))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+##
+# @file
+# Tests that splitting periods across processes makes the same CSVs as building them one at a time.
+#
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from Tests.common           import OUTPUTS, ROOT, makeConfig
+
+
+## Period Jobs Tests
+# @brief The command line is run on its own, workers are only forked when nothing else is running in
+#        threads.
+class PeriodJobsTest(unittest.TestCase):
+
+    ## Makes every report of the example book with the command line.
+    # @param[in]    folder          **String**, folder to save the config and CSVs in.
+    # @param[in]    arguments       More command line arguments.
+    # @return                       **Dictonary** of CSV file name to its bytes.
+    def makeReports(self, folder, *arguments):
+        os.mkdir(folder)
+
+        # Every day of the book, more periods than a worker builds at once.
+        config     = makeConfig(folder, dates='daily 2020-08-01..2021-01-31')
+        configPath = os.path.join(folder, 'config.ini')
+        with open(configPath, 'w') as f:
+            config.write(f)
+
+        subprocess.run([sys.executable, 'GNUCashReport.py', '-c', configPath] + list(arguments),
+                       cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+
+        files = {}
+        for output in OUTPUTS:
+            with open(config['GENERAL'][output], 'rb') as f:
+                files[os.path.basename(f.name)] = f.read()
+
+        return files
+
+
+    ## --period-jobs, with and without --jobs, gives the same bytes as a serial run.
+    def test_periodJobs(self):
+        with tempfile.TemporaryDirectory() as folder:
+            serial = self.makeReports(os.path.join(folder, 'serial'))
+
+            self.assertEqual(self.makeReports(os.path.join(folder, 'periods'), '--period-jobs', '3'), serial)
+            self.assertEqual(self.makeReports(os.path.join(folder, 'both'), '--period-jobs', '2', '--jobs', '2'), serial)
+
+
+if __name__ == '__main__':
+    unittest.main()
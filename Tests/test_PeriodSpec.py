@@ -0,0 +1,55 @@
+##
+# @file
+# Tests of report periods made from the config file's dates.
+#
+
+import tempfile
+import unittest
+
+from datetime import datetime
+
+from App.Reports           import generate_reports
+from App.Common.PeriodSpec import PeriodSpec
+from Tests.common          import makeConfig, readCSV
+
+
+## Period Spec Tests
+class PeriodSpecTest(unittest.TestCase):
+
+    ## Pairs and rules are kept in config order.
+    def test_mixed(self):
+        periods = list(PeriodSpec('2020-01-01, 2020-01-31, monthly 2020-02..2020-03, fiscal-year:07-01 2019..2019'))
+
+        self.assertEqual(periods, [(datetime(2020, 1, 1),  datetime(2020, 1, 31)),
+                                   (datetime(2020, 2, 1),  datetime(2020, 2, 29)),
+                                   (datetime(2020, 3, 1),  datetime(2020, 3, 31)),
+                                   (datetime(2019, 7, 1),  datetime(2020, 6, 30))])
+
+
+    ## Bad dates and rules are config errors.
+    def test_invalid(self):
+        for text in ('2020-01-01', 'hourly 2020..2021', 'monthly 2020-03..2020-01', 'fiscal-year:02-29 2020..2021'):
+            with self.assertRaises(ValueError):
+                PeriodSpec(text)
+
+
+    ## Rules ending on the same date each get their own row, the same as the row of either alone.
+    def test_overlappingRules(self):
+        with tempfile.TemporaryDirectory() as folder:
+            config = makeConfig(folder, dates='monthly 2020-09..2020-12, yearly 2020..2020')
+            both   = {name : readCSV(path) for name, path in generate_reports(config['GENERAL']['input'], config).items()}
+
+            config  = makeConfig(folder, dates='monthly 2020-09..2020-12')
+            monthly = {name : readCSV(path) for name, path in generate_reports(config['GENERAL']['input'], config).items()}
+
+        categories = both['Assets by Category']
+        self.assertEqual(len(categories), 1 + 5)
+        self.assertEqual(categories[:5], monthly['Assets by Category'])
+
+        # The year ends with December, so its balances are December's.
+        self.assertEqual(categories[5], categories[4])
+        self.assertEqual(both['Account Balances'][-1], both['Account Balances'][-2])
+
+
+if __name__ == '__main__':
+    unittest.main()
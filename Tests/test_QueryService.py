@@ -0,0 +1,166 @@
+##
+# @file
+# Tests of the query server against the CSV reports of the same book.
+#
+
+import io
+import json
+import tempfile
+import threading
+import unittest
+
+from contextlib     import redirect_stdout
+from urllib.error   import HTTPError
+from urllib.parse   import urlencode
+from urllib.request import urlopen
+
+from App.QueryService       import makeServer
+from App.ReportContext      import ReportContext
+from App.Reports            import generate_reports
+from App.Common.BookFile    import readBook
+from Tests.common           import makeConfig, readCSV
+
+
+## Turns a CSV amount like "$-1,234.56" into a number.
+# @param[in]    text            **String**, formatted amount.
+# @return                       **Float**.
+def fromCurrency(text):
+    return float(text.replace('$', '').replace(',', ''))
+
+
+## Query Service Tests
+# @brief Answers come from a server on a free local port, reports of the same book and dates are the
+#        expected values.
+class QueryServiceTest(unittest.TestCase):
+
+    ## Dates of the reports and queries.
+    dates = 'monthly 2020-09..2020-12'
+
+    ## Reads the book, makes the reports, and starts the server.
+    @classmethod
+    def setUpClass(cls):
+        cls.folder = tempfile.TemporaryDirectory()
+        config     = makeConfig(cls.folder.name, dates=cls.dates)
+
+        book, _     = readBook(config['GENERAL']['input'])
+        cls.reports = {name : readCSV(path) for name, path in generate_reports(book, config).items()}
+
+        context = ReportContext.fromConfig(config, book)
+        context.verbose = True     # Still nothing printed while answering.
+
+        cls.server = makeServer(context, 0)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+
+    ## Stops the server.
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.folder.cleanup()
+
+
+    ## Asks the server a question.
+    # @param[in]    query           **String**, balance, change or category.
+    # @param[in]    params          **List** of (name, value) tuples.
+    # @return                       **Tuple** of the HTTP status and the JSON answer.
+    def get(self, query, params):
+        url = 'http://127.0.0.1:{}/{}?{}'.format(self.server.server_address[1], query, urlencode(params))
+
+        try:
+            with urlopen(url) as response:
+                return response.status, json.load(response)
+        except HTTPError as err:
+            return err.code, json.load(err)
+
+
+    ## Report columns by account name, for each period.
+    # @param[in]    reportType      **String**, report to read.
+    # @return                       **List** of **Dictonary** of account name to amount.
+    def columns(self, reportType):
+        rows  = self.reports[reportType]
+        names = rows[1]
+        return [{name : fromCurrency(value) for name, value in zip(names[1:], row[1:]) if (value)} for row in rows[2:]]
+
+
+    ## Checks the children of each account in an answer against the report's columns.
+    # @param[in]    answer          **Dictonary**, JSON answer.
+    # @param[in]    reportType      **String**, report with the same accounts.
+    def assertMatchesReport(self, answer, reportType):
+        expected = self.columns(reportType)
+        self.assertEqual(len(answer['periods']), len(expected))
+
+        for period, columns in zip(answer['periods'], expected):
+            children = {child['account'].split(':')[-1] : child['total']
+                        for account in period['accounts'] for child in account['children']}
+            self.assertEqual(children, columns)
+
+
+    ## Balances are the Account Balances report.
+    def test_balance(self):
+        status, answer = self.get('balance', [('account', 'Assets:Investments'), ('account', 'Assets:Speculative Investments'),
+                                              ('account', 'Liabilities'), ('depth', 1), ('dates', self.dates)])
+
+        self.assertEqual(status, 200)
+        self.assertMatchesReport(answer, 'Account Balances')
+
+
+    ## Changes are the Account Changes report.
+    def test_change(self):
+        status, answer = self.get('change', [('account', 'Assets:Investments'), ('account', 'Assets:Speculative Investments'),
+                                             ('account', 'Liabilities'), ('depth', 1), ('dates', self.dates)])
+
+        self.assertEqual(status, 200)
+        self.assertEqual(answer['periods'][0]['start'], '2020-09-01')
+        self.assertMatchesReport(answer, 'Account Changes')
+
+
+    ## Categories are the Assets by Category report.
+    def test_category(self):
+        status, answer = self.get('category', [('account', 'Assets:Investments'), ('account', 'Assets:Speculative Investments'),
+                                               ('account', 'Liabilities'), ('dates', self.dates)])
+
+        self.assertEqual(status, 200)
+
+        rows = self.reports['Assets by Category']
+        for period, row in zip(answer['periods'], rows[1:]):
+            self.assertEqual(period['end'], row[0])
+
+            expected = {category : fromCurrency(value) for category, value in zip(rows[0][1:], row[1:])}
+            for category, value in expected.items():
+                self.assertAlmostEqual(period['categories'].get(category, 0), value, places=2)
+
+
+    ## One date is a balance on that day.
+    def test_date(self):
+        status, answer = self.get('balance', [('account', 'Assets:Investments:Fidelity'), ('date', '2020-09-30')])
+
+        self.assertEqual(status, 200)
+        self.assertEqual(answer['periods'][0]['accounts'][0]['total'], self.columns('Account Balances')[0]['Fidelity'])
+
+
+    ## Bad queries are answered with 400 and an error, nothing is printed.
+    def test_badParameters(self):
+        bad = [('balance',  [('date', '2020-09-30')]),
+               ('balance',  [('account', 'Assets:Nope'), ('date', '2020-09-30')]),
+               ('balance',  [('account', 'Assets'), ('date', '2020-13-01')]),
+               ('balance',  [('account', 'Assets')]),
+               ('balance',  [('account', 're:('), ('date', '2020-09-30')]),
+               ('change',   [('account', 'Assets'), ('dates', 'hourly 2020..2021')]),
+               ('forecast', [('account', 'Assets'), ('date', '2020-09-30')])]
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            for query, params in bad:
+                status, answer = self.get(query, params)
+                self.assertEqual(status, 400, (query, params))
+                self.assertIn('error', answer)
+
+            self.get('balance', [('account', 'Assets'), ('date', '2020-09-30')])
+
+        self.assertEqual(output.getvalue(), '')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+##
+# @file
+# Tests that generate_reports() can be called from threads.
+#
+
+import os
+import tempfile
+import threading
+import unittest
+
+from App.Reports            import generate_reports
+from App.Common.BookFile    import readBook
+from Tests.common           import EXAMPLE_BOOK, makeConfig, readCSV
+
+
+## Reports Tests
+# @brief Reports made from threads, with jobs, match the same reports made one at a time.
+class ReportsTest(unittest.TestCase):
+
+    ## Makes every report of the example book.
+    # @param[in]    book            **Book Object**.
+    # @param[in]    folder          **String**, folder to save the CSVs in.
+    # @param[in]    jobs            **Integer**, most reports to run at the same time.
+    # @return                       **Dictonary** of report type to the rows of its CSV.
+    def makeReports(self, book, folder, jobs):
+        config = makeConfig(folder)
+        return {name : readCSV(path) for name, path in generate_reports(book, config, jobs).items()}
+
+
+    ## Two threads making reports with jobs get the same CSVs as the main thread without jobs.
+    def test_threads(self):
+        book, _ = readBook(EXAMPLE_BOOK)
+
+        with tempfile.TemporaryDirectory() as folder:
+            for name in ('serial', 'first', 'second'):
+                os.mkdir(os.path.join(folder, name))
+
+            expected = self.makeReports(book, os.path.join(folder, 'serial'), 1)
+            results  = {}
+            errors   = []
+
+            def run(name):
+                try:
+                    results[name] = self.makeReports(book, os.path.join(folder, name), 2)
+                except Exception as err:
+                    errors.append(err)
+
+            threads = [threading.Thread(target=run, args=(name,)) for name in ('first', 'second')]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(60)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(results, {'first' : expected, 'second' : expected})
+
+
+if __name__ == '__main__':
+    unittest.main()
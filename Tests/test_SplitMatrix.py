@@ -0,0 +1,84 @@
+##
+# @file
+# Tests that the NumPy engine gives the same sums as the python engine, or isn't used when it can't.
+#
+
+import unittest
+
+from datetime import datetime
+
+from App.Common.BalanceSweep import BalanceSweep
+from App.Common.BookFile     import readBook
+from App.Common.SplitMatrix  import INT64_MAX, SplitMatrix, SplitMatrixSums
+from Tests.common            import EXAMPLE_BOOK
+
+
+## Split Matrix Tests
+# @brief Sums of the example book, and of the same book with amounts made big enough to overflow int64.
+@unittest.skipUnless(SplitMatrix.available(), 'NumPy is not installed')
+class SplitMatrixTest(unittest.TestCase):
+
+    ## A year over the months the example book covers, then months around them. The year ends last, so
+    #  its sums are worked out after the months that come after it.
+    periods = [(datetime(2020, 1, 1), datetime(2021, 1, 1))] + \
+              [(datetime(2020, month, 1), datetime(2020, month + 1, 1)) for month in range(6, 12)]
+
+    ## Reads the book.
+    def setUp(self):
+        self.book, _ = readBook(EXAMPLE_BOOK)
+
+
+    ## Makes every split amount bigger, so the largest one is as big as an int64 can hold.
+    def growAmounts(self):
+        largest    = max(abs(split.value) for transaction in self.book.transactions for split in transaction.splits)
+        multiplier = INT64_MAX // largest
+
+        self.book.transactions = [transaction._replace(splits = tuple(
+                                      split._replace(value = split.value * multiplier, quantity = split.quantity * multiplier)
+                                      for split in transaction.splits))
+                                  for transaction in self.book.transactions]
+        self.book.buildIndexes()
+
+
+    ## Sums without the accounts that have nothing in a period, the NumPy engine keeps them as zeros.
+    # @param[in]    sums            **SplitMatrixSums** or **BalanceSweep Object**.
+    # @return                       **List** of **Dictonary** of account GUID to (value, quantity) tuples.
+    def nonZero(self, sums):
+        return [{account : amounts for account, amounts in period.items() if (amounts != (0, 0))}
+                for period in sums.get()]
+
+
+    ## Sums given out a period at a time are in the order of the periods, each the same as that period
+    #  summed on its own.
+    def test_iterate(self):
+        for engine in ('python', 'numpy'):
+            for changes in (False, True):
+                sums  = list(self.book.periodSums(self.periods, changes=changes, engine=engine))
+                alone = [self.book.periodSums([period], changes=changes, engine=engine).get()[0] for period in self.periods]
+
+                self.assertEqual(sums, alone)
+
+
+    ## Both engines give the same balances and changes.
+    def test_sums(self):
+        for changes in (False, True):
+            sums = self.book.periodSums(self.periods, changes=changes, engine='numpy')
+
+            self.assertIsInstance(sums, SplitMatrixSums)
+            self.assertEqual(self.nonZero(sums), self.nonZero(BalanceSweep(self.book, self.periods, None, changes)))
+
+
+    ## Amounts that each fit in an int64, but add up to more, are summed by the python engine.
+    def test_overflow(self):
+        self.growAmounts()
+
+        for changes in (False, True):
+            sums = self.book.periodSums(self.periods, changes=changes, engine='numpy')
+
+            self.assertFalse(self.book.splitMatrix.exact)
+            self.assertIsInstance(sums, BalanceSweep)
+            self.assertEqual(sums.get(), BalanceSweep(self.book, self.periods, None, changes).get())
+
+
+if __name__ == '__main__':
+    unittest.main()